@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Agent Service
+
+Runs the finance assistant across several worker processes. Queries are
+read one per line from a file or stdin and routed by ticker, so follow-up
+questions about a stock reach the worker whose caches already hold it.
+Simple lookups are answered by the intent router inside the worker; the
+rest go to that worker's orchestration agent. Results are printed as they
+finish, with each worker's queue depth.
+
+    python agent_service.py --workers 4 queries.txt
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import as_completed
+from typing import Dict, Optional
+
+from utils import deadline, memprofile, metrics
+from utils.worker_pool import WorkerPool
+
+# Per-process orchestration agents, keyed by analysis mode; created on first use in each worker
+_agents: Dict = {}
+
+
+def affinity_key(query: str) -> Optional[str]:
+    """The ticker a query is about, if one can be picked out."""
+    from intent_router import CN_TICKER, US_TICKER
+
+    cn = CN_TICKER.search(query)
+    if cn:
+        return cn.group(1)
+    us = US_TICKER.search(query)
+    return us.group(1) if us else None
+
+
+def handle_query(request: Dict) -> Dict:
+    """Answer one query in a worker process."""
+    import intent_router
+    from finance_assistant_swarm import analysis_request, create_initial_messages, create_orchestration_agent
+
+    started = time.perf_counter()
+    # Only queries the router takes are profiled as fast-path requests; the rest are profiled once, below
+    if intent_router.parse(request["query"]) is not None:
+        with memprofile.request("fast_path"):
+            fast = intent_router.answer(request["query"])
+        if fast is not None:
+            return {"answer": fast, "fast_path": True, "seconds": round(time.perf_counter() - started, 2)}
+
+    mode = request.get("mode", "swarm")
+    if mode not in _agents:
+        _agents[mode] = create_orchestration_agent(mode=mode)
+    agent = _agents[mode]
+    # The reset is inside the profiled request, so only what outlives the query counts as retained
+    with memprofile.request(mode):
+        agent.messages = create_initial_messages()
+        try:
+            with deadline.budget(request.get("deadline")):
+                response = agent(analysis_request(request["query"]))
+        finally:
+            # Reset conversation after each query to maintain clean context
+            agent.messages = create_initial_messages()
+    return {"answer": str(response), "fast_path": False, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main():
+    """Main function to run the agent service."""
+    from finance_assistant_swarm import ANALYSIS_MODES, DEFAULT_DEADLINE
+
+    parser = argparse.ArgumentParser(description="Serve stock analysis queries from a pool of worker processes")
+    parser.add_argument("queries", nargs="?", help="file with one query per line (default: stdin)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: one per core)")
+    parser.add_argument("--mode", choices=sorted(ANALYSIS_MODES), default="swarm")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE)
+    parser.add_argument(
+        "--memprofile", action="store_true", help="record memory per query and per tool in the workers' metrics"
+    )
+    args = parser.parse_args()
+    if args.memprofile:
+        # Set before the pool starts so the spawned workers inherit it
+        memprofile.enable()
+
+    source = open(args.queries, encoding="utf-8") if args.queries else sys.stdin
+    with WorkerPool(handle_query, args.workers) as pool:
+        print(f"\n🤖 Agent service with {len(pool.workers)} workers\n")
+        futures = {}
+        for line in source:
+            query = line.strip()
+            if not query:
+                continue
+            request = {"query": query, "mode": args.mode, "deadline": args.deadline}
+            futures[pool.submit(request, key=affinity_key(query))] = query
+        print(f"Queued {len(futures)} queries, depth per worker: {pool.depths()}")
+
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                result = future.result()
+                print(f"\n[{result['seconds']}s] {query}\n{result['answer']}")
+            except Exception as e:
+                print(f"\nError for {query}: {str(e)}")
+            print(f"Queue depth per worker: {pool.depths()}")
+        metrics.write()
+
+
+if __name__ == "__main__":
+    main()
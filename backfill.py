@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+A-Share History Backfill
+
+Fills the local bar store for the whole A-share universe. Symbols from
+ak.stock_info_a_code_name() are sharded across worker processes, each taking
+an equal share of the provider rate limits. Every symbol is written
+atomically by the bar store and recorded in a checkpoint manifest, so an
+interrupted run picks up where it stopped. Failures are retried once at the
+end.
+
+    python backfill.py --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Tuple
+
+from utils import bar_store, datasources, ratelimit
+from utils.cache import CACHE_DIR, atomic_write_bytes
+
+MANIFEST_PATH = os.path.join(CACHE_DIR, "backfill", "manifest.json")
+
+
+def load_manifest(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"done": {}, "failed": {}}
+
+
+def save_manifest(path: str, manifest: Dict):
+    atomic_write_bytes(path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+
+def init_worker(workers: int):
+    """Split each provider's rate budget evenly between the worker processes."""
+    ratelimit.set_share(1.0 / workers)
+
+
+def backfill_symbol(args: Tuple[str, bool]) -> Tuple[str, int, str]:
+    """Update one symbol's bars (and factors); returns (symbol, rows, error)."""
+    symbol, with_factors = args
+    store = bar_store.get_store()
+    try:
+        bars = store.update_raw(symbol)
+        if with_factors:
+            store.factors(symbol)
+        return symbol, len(bars), ""
+    except Exception as e:
+        return symbol, 0, str(e)
+
+
+def run_pass(symbols: List[str], workers: int, with_factors: bool, manifest: Dict, path: str) -> List[str]:
+    """Backfill symbols across a process pool; returns the symbols that failed."""
+    failed = []
+    started = time.time()
+    chunksize = max(1, min(20, len(symbols) // (workers * 4) or 1))
+    tasks = [(symbol, with_factors) for symbol in symbols]
+
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(workers,)) as pool:
+        for idx, (symbol, rows, error) in enumerate(pool.imap_unordered(backfill_symbol, tasks, chunksize), 1):
+            if error:
+                failed.append(symbol)
+                manifest["failed"][symbol] = error
+            else:
+                manifest["done"][symbol] = rows
+                manifest["failed"].pop(symbol, None)
+
+            # The parent is the only writer of the manifest
+            if idx % 20 == 0 or idx == len(tasks):
+                save_manifest(path, manifest)
+                rate = idx / max(time.time() - started, 1e-9)
+                print(f"[{idx}/{len(tasks)}] {rate:.2f} symbols/s, {len(failed)} failed")
+    return failed
+
+
+def main():
+    """Main function to run the universe backfill."""
+    parser = argparse.ArgumentParser(description="Backfill daily bars for every A-share")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--symbols", help="comma separated subset instead of the whole universe")
+    parser.add_argument("--no-factors", action="store_true", help="skip the adjustment factor tables")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--restart", action="store_true", help="ignore the existing manifest")
+    args = parser.parse_args()
+
+    if args.symbols:
+        universe = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    else:
+        universe = datasources.a_share_universe()["code"].astype(str).str.zfill(6).tolist()
+
+    manifest = {"done": {}, "failed": {}} if args.restart else load_manifest(args.manifest)
+    pending = [symbol for symbol in universe if symbol not in manifest["done"]]
+    print(f"\n📦 Backfilling {len(pending)} of {len(universe)} symbols with {args.workers} workers\n")
+
+    started = time.time()
+    failed = run_pass(pending, args.workers, not args.no_factors, manifest, args.manifest) if pending else []
+    if failed:
+        print(f"\nRetrying {len(failed)} failed symbols...\n")
+        failed = run_pass(failed, args.workers, not args.no_factors, manifest, args.manifest)
+
+    elapsed = time.time() - started
+    completed = len(pending) - len(failed)
+    print(
+        f"\nBackfilled {completed} symbols in {elapsed:.1f}s "
+        f"({completed / max(elapsed, 1e-9):.2f} symbols/s), {len(failed)} failed"
+    )
+    if failed:
+        print(f"Failed: {', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: sequential swarm vs parallel analysts
+
+Runs both multi-agent analysis modes of finance_assistant_swarm on the same
+tickers and compares wall-clock latency and how complete the final analysis
+is. Needs Bedrock credentials and network access to the data providers.
+
+    python benchmarks/bench_analysis_modes.py AMZN MSFT --runs 2
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import statistics
+import time
+
+from finance_assistant_swarm import ANALYSIS_MODES
+
+# Topics a complete analysis should cover, each with words that indicate it
+COMPLETENESS_TOPICS = {
+    "business": ["商业模式", "业务", "business"],
+    "valuation": ["市盈率", "估值", "P/E", "valuation"],
+    "financial_health": ["利润率", "负债", "现金流", "margin", "debt"],
+    "sentiment": ["情绪", "新闻", "sentiment", "news"],
+    "recommendation": ["买入", "持有", "卖出", "建议", "buy", "hold", "sell"],
+}
+
+
+def completeness(text: str) -> float:
+    lowered = text.lower()
+    covered = [topic for topic, words in COMPLETENESS_TOPICS.items() if any(w.lower() in lowered for w in words)]
+    return len(covered) / len(COMPLETENESS_TOPICS)
+
+
+def run_mode(mode: str, ticker: str):
+    analysis_tool = ANALYSIS_MODES[mode]
+    started = time.perf_counter()
+    result = analysis_tool(ticker)
+    elapsed = time.perf_counter() - started
+    ok = result.get("status") == "success"
+    return elapsed, ok, completeness(result.get("collaborative_analysis", "")) if ok else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare swarm and parallel analysis modes")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = []
+    for mode in ANALYSIS_MODES:
+        latencies, scores, failures = [], [], 0
+        for ticker in args.tickers:
+            for _ in range(args.runs):
+                elapsed, ok, score = run_mode(mode, ticker)
+                latencies.append(elapsed)
+                scores.append(score)
+                failures += not ok
+                print(f"{mode:<9} {ticker:<8} {elapsed:7.1f}s  completeness {score:.0%}{'' if ok else '  FAILED'}")
+        rows.append((mode, statistics.median(latencies), max(latencies), statistics.mean(scores), failures))
+
+    print(f"\n{'mode':<9} {'median s':>9} {'max s':>7} {'complete':>9} {'failures':>9}")
+    for mode, median, worst, score, failures in rows:
+        print(f"{mode:<9} {median:9.1f} {worst:7.1f} {score:9.0%} {failures:9d}")
+
+
+if __name__ == "__main__":
+    main()
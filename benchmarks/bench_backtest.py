@@ -0,0 +1,78 @@
+"""
+Benchmark: vectorized backtests
+
+Times utils.backtest on synthetic daily bars (random walks with suspensions
+and limit days) for growing numbers of symbols and parameter combinations,
+and reports symbol x combination backtests per second, split into signal
+generation and the simulation. Runs offline; --tickers backtests real
+symbols from the local bar store instead.
+
+    python benchmarks/bench_backtest.py --days 1250
+    python benchmarks/bench_backtest.py --tickers 600519 000858 300750
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+
+import numpy as np
+
+from utils import backtest
+
+GRIDS = {
+    "1": {"fast": [20], "slow": [60]},
+    "9": {"fast": [5, 10, 20], "slow": [30, 60, 120]},
+    "36": {"fast": [3, 5, 8, 10, 15, 20], "slow": [30, 40, 60, 90, 120, 250]},
+}
+
+
+def synthetic_bars(days: int, count: int, seed: int = 0) -> backtest.BarMatrix:
+    rng = np.random.default_rng(seed)
+    returns = np.clip(rng.standard_t(4, (days, count)) * 0.015, -0.1, 0.1)
+    close = 10 * np.cumprod(1 + returns, axis=0)
+    open_ = close / (1 + returns * rng.uniform(0, 1, (days, count)))
+    # About 1% of symbol-days suspended
+    suspended = rng.uniform(size=(days, count)) < 0.01
+    close[suspended], open_[suspended] = np.nan, np.nan
+    limit_up, limit_down = returns >= 0.0999, returns <= -0.0999
+    return backtest.BarMatrix(
+        np.arange(18000, 18000 + days, dtype=np.int32), [f"{600000 + i}" for i in range(count)],
+        open_, close, limit_up, limit_up & (rng.uniform(size=(days, count)) < 0.5), limit_down, limit_down,
+    )
+
+
+def time_run(bars: backtest.BarMatrix, grid) -> tuple:
+    started = time.perf_counter()
+    targets, combos = backtest.signals(bars.close, "ma_cross", grid)
+    signalled = time.perf_counter()
+    backtest.simulate(bars, targets)
+    finished = time.perf_counter()
+    return len(combos), signalled - started, finished - signalled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized backtest engine")
+    parser.add_argument("--days", type=int, default=1250)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 50, 300, 1000])
+    parser.add_argument("--tickers", nargs="+", help="backtest these symbols from the bar store instead")
+    args = parser.parse_args()
+
+    if args.tickers:
+        started = time.perf_counter()
+        bars = backtest.load_bars(args.tickers)
+        print(f"Loaded {len(args.tickers)} symbols x {len(bars.days)} days in {time.perf_counter() - started:.2f}s")
+        cases = [(bars, name, grid) for name, grid in GRIDS.items()]
+    else:
+        cases = [(synthetic_bars(args.days, count), name, grid) for count in args.symbols for name, grid in GRIDS.items()]
+
+    print(f"\n{'symbols':>8} {'combos':>7} {'signals s':>10} {'simulate s':>11} {'backtests/s':>12}")
+    for bars, _, grid in cases:
+        combos, signal_time, simulate_time = time_run(bars, grid)
+        total = len(bars.symbols) * combos
+        print(f"{len(bars.symbols):8d} {combos:7d} {signal_time:10.3f} {simulate_time:11.3f} {total / (signal_time + simulate_time):12.0f}")
+
+
+if __name__ == "__main__":
+    main()
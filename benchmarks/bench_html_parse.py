@@ -0,0 +1,148 @@
+"""
+Benchmark: news page parsing backends
+
+Times the old BeautifulSoup(html.parser) approach against each registered
+utils.html_parse backend on saved news pages. Pages are files named
+<source>*.html (marketwatch, cnbc, seeking_alpha, google_news) in the pages
+directory. It ships with a fixed <source>-sample.html set, modelled on each
+source's result markup with the page chrome around it, so results can be
+compared across backends and runs; --save fetches the current pages for a
+ticker alongside them.
+Peak memory is the RSS growth of a fresh process parsing the page once, so
+lxml's C-side tree is counted too.
+
+    python benchmarks/bench_html_parse.py --save AAPL
+    python benchmarks/bench_html_parse.py --repeat 50
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import glob
+import multiprocessing
+import re
+import resource
+import statistics
+import time
+import urllib.parse
+
+import requests
+from bs4 import BeautifulSoup
+
+from utils import html_parse
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "pages")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
+}
+
+
+def page_urls(ticker: str):
+    query = urllib.parse.quote(f"{ticker} stock")
+    return {
+        "marketwatch": f"https://www.marketwatch.com/investing/stock/{ticker.lower()}",
+        "cnbc": f"https://www.cnbc.com/search/?query={query}&qsearchterm={query}",
+        "seeking_alpha": f"https://seekingalpha.com/symbol/{ticker.upper()}/news",
+        "google_news": f"https://www.google.com/search?q={urllib.parse.quote(f'{ticker} stock news')}&tbm=nws",
+    }
+
+
+def save_pages(ticker: str, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    for source, url in page_urls(ticker).items():
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=10)
+        except requests.RequestException as e:
+            print(f"{source}: {str(e)}")
+            continue
+        path = os.path.join(directory, f"{source}-{ticker.lower()}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"{source}: HTTP {response.status_code}, {len(response.text)} chars -> {path}")
+
+
+def baseline_parse(html: str, source: str):
+    """What get_stock_news did before: a full html.parser soup, then select over it."""
+    spec = html_parse.SOURCES[source]
+    soup = BeautifulSoup(html, "html.parser")
+    for selector in spec.items:
+        found = soup.select(selector)
+        if found:
+            return found[:5]
+    return [a for a in soup.find_all("a") if spec.link_fallback and spec.link_fallback in a.get("href", "").lower()][:5]
+
+
+def parsers():
+    yield "bs4-html.parser (old)", baseline_parse
+    for name in html_parse._BACKENDS:
+        try:
+            backend = html_parse.get_backend(name)
+        except ImportError:
+            continue
+        yield name, lambda html, source, backend=backend: html_parse.extract(html, source, backend=backend)
+
+
+def _high_water_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            return int(re.search(r"VmHWM:\s+(\d+)", f.read()).group(1))
+    except (OSError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _peak_rss_child(args):
+    name, path, source = args
+    html = open(path, encoding="utf-8").read()
+    parse = dict(parsers())[name]
+    try:
+        # Reset the high-water mark, which a forked child otherwise inherits from its parent
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    before = _high_water_kb()
+    parse(html, source)
+    return _high_water_kb() - before
+
+
+def peak_rss_kb(name: str, path: str, source: str) -> int:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_peak_rss_child, ((name, path, source),))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parsing backends on saved news pages")
+    parser.add_argument("--pages", default=PAGES_DIR)
+    parser.add_argument("--save", metavar="TICKER", help="fetch and save the current pages for a ticker first")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.pages)
+
+    pages = sorted(glob.glob(os.path.join(args.pages, "*.html")))
+    if not pages:
+        print(f"No pages in {args.pages}; run with --save TICKER first")
+        return
+
+    print(f"\n{'page':<28} {'parser':<24} {'median ms':>10} {'items':>6} {'peak RSS KB':>12}")
+    for path in pages:
+        source = next((s for s in html_parse.SOURCES if os.path.basename(path).startswith(s)), None)
+        if source is None:
+            continue
+        html = open(path, encoding="utf-8").read()
+        for name, parse in parsers():
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                items = parse(html, source)
+                timings.append((time.perf_counter() - started) * 1000)
+            rss = peak_rss_kb(name, path, source)
+            print(f"{os.path.basename(path):<28} {name:<24} {statistics.median(timings):10.2f} {len(items):6d} {rss:12d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,638 @@
+"""
+Load Test: concurrent agent sessions
+
+Simulates N users, each sending a mix of queries (price lookups, company
+analysis, full swarm analysis) one after another, and reports throughput,
+latency percentiles, queueing delay and the call rate to each provider as
+the number of users grows. The agents run unchanged, except that the
+Bedrock model is replaced by a stub and the data providers (AKShare,
+yfinance, scraped pages) are replayed from a recording:
+
+- The stub model scripts a plausible turn sequence. It calls each data tool
+  whose arguments it can fill, hands off to the next swarm agent, then
+  answers. It sleeps like a real model: time to first token grows with the
+  prompt and output streams at a fixed token rate.
+- Replayed provider responses wait as long as the recorded call took.
+
+Each user count runs in a fresh process with an empty cache directory, so
+every level starts cold, as a service does after a restart. With --workers
+the queries go through the agent service's worker pool instead of one
+thread per session; queueing delay then includes the workers' start-up for
+the first queries.
+
+    python benchmarks/load_test.py --record          # once, needs network access
+    python benchmarks/load_test.py --users 1 4 16 32 --duration 60
+    python benchmarks/load_test.py --users 8 32 --workers 4 --mix price=0.5,company=0.4,swarm=0.1
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import pickle
+import random
+import re
+import tempfile
+import threading
+import time
+import types
+import urllib.parse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from strands.models.model import Model
+
+DEFAULT_RECORDING = os.path.join(
+    os.environ.get("CN_FINANCE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cn-finance-assistant")),
+    "loadtest",
+    "recording.pkl",
+)
+
+KINDS = ("price", "company", "swarm")
+
+
+@dataclass
+class LoadConfig:
+    tickers: List[str]
+    mix: Dict[str, float]
+    recording: str
+    duration: float = 60.0
+    think_time: float = 2.0
+    workers: int = 0
+    sessions: int = 0
+    seed: int = 0
+    # Stub model: seconds to first token, extra seconds per 1k prompt tokens, output tokens per second
+    first_token: float = 0.6
+    prefill_per_1k: float = 0.05
+    tokens_per_second: float = 60.0
+    answer_tokens: int = 400
+    jitter: float = 0.3
+    # Replayed provider latency multiplier (0 makes providers instant)
+    provider_latency: float = 1.0
+    record: bool = False
+
+
+class ProviderNotRecorded(Exception):
+    """A provider call the recording has no response for."""
+
+
+class CallCounter:
+    """Thread-safe per-provider call counts."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, provider: str):
+        with self._lock:
+            self.counts[provider] += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+
+calls = CallCounter()
+
+
+def akshare_provider(name: str) -> str:
+    if name.endswith("_em"):
+        return "eastmoney"
+    if name.endswith("_xq"):
+        return "xueqiu"
+    if name.endswith("_tx"):
+        return "tencent"
+    if "sina" in name or name in ("stock_zh_a_daily", "stock_financial_analysis_indicator"):
+        return "sina"
+    return "akshare"
+
+
+def _args_key(args, kwargs) -> str:
+    return repr((args, sorted(kwargs.items())))
+
+
+class Recording:
+    """Provider responses keyed by call, recorded live once and replayed with their latency.
+
+    Calls whose arguments include today's date are also indexed without
+    them, so a recording made yesterday still answers today's requests.
+    """
+
+    def __init__(self, path: str, record: bool, latency: float = 1.0):
+        self.path = path
+        self.record = record
+        self.latency = latency
+        self.entries: Dict[tuple, tuple] = {}
+        self.loose: Dict[tuple, tuple] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if not record:
+            with open(path, "rb") as f:
+                self.entries, self.loose = pickle.load(f)
+
+    def call(self, provider: str, key: tuple, loose: tuple, fetch: Callable[[], Any]) -> Any:
+        if self.record and getattr(self._local, "depth", 0):
+            # A provider library calling requests under an outer provider call
+            return fetch()
+        calls.incr(provider)
+        if not self.record:
+            entry = self.entries.get(key) or self.loose.get(loose)
+            if entry is None:
+                calls.incr("unrecorded")
+                raise ProviderNotRecorded(f"No recorded response for {key}")
+            outcome, value, seconds = entry
+            time.sleep(seconds * self.latency)
+            if outcome == "error":
+                raise value
+            return value
+
+        self._local.depth = 1
+        started = time.perf_counter()
+        try:
+            value = fetch()
+            entry = ("value", value, time.perf_counter() - started)
+            return value
+        except Exception as e:
+            entry = ("error", e, time.perf_counter() - started)
+            raise
+        finally:
+            self._local.depth = 0
+            with self._lock:
+                self.entries[key] = self.loose[loose] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            pickle.dump((self.entries, self.loose), f)
+
+
+def _patch_akshare(recording: Recording):
+    import akshare as ak
+
+    for name in dir(ak):
+        fn = getattr(ak, name)
+        if name.startswith("_") or not isinstance(fn, types.FunctionType):
+            continue
+
+        def wrapper(*args, _name=name, _fn=fn, **kwargs):
+            symbol = kwargs.get("symbol", args[0] if args else None)
+            return recording.call(
+                akshare_provider(_name), ("akshare", _name, _args_key(args, kwargs)), ("akshare", _name, symbol),
+                lambda: _fn(*args, **kwargs),
+            )
+
+        setattr(ak, name, wrapper)
+
+
+def _patch_yfinance(recording: Recording):
+    import yfinance as yf
+
+    real_ticker = yf.Ticker
+
+    class RecordedTicker:
+        """yf.Ticker whose properties and method calls go through the recording."""
+
+        def __init__(self, symbol: str, *args, **kwargs):
+            self._symbol = symbol
+            self._real = real_ticker(symbol, *args, **kwargs) if recording.record else None
+
+        def __getattr__(self, name: str):
+            if name.startswith("_"):
+                raise AttributeError(name)
+            key = ("yahoo", self._symbol, name)
+            is_property = (
+                isinstance(getattr(real_ticker, name, None), property)
+                if recording.record else key in recording.entries
+            )
+            if is_property:
+                return recording.call("yahoo", key, key, lambda: getattr(self._real, name))
+
+            def method(*args, **kwargs):
+                return recording.call(
+                    "yahoo", key + (_args_key(args, kwargs),), key + ("call",),
+                    lambda: getattr(self._real, name)(*args, **kwargs),
+                )
+
+            return method
+
+    yf.Ticker = RecordedTicker
+
+
+def _patch_requests(recording: Recording):
+    import requests
+
+    real_get = requests.get
+
+    def get(url, *args, **kwargs):
+        host = urllib.parse.urlparse(url).hostname or "http"
+        return recording.call(host, ("http", url), ("http", url), lambda: real_get(url, *args, **kwargs))
+
+    requests.get = get
+
+
+# Tools the stub never calls: it can't fill their arguments sensibly
+SKIPPED_TOOLS = ("think", "http_request", "handoff_to_agent")
+FILLABLE = ("ticker", "query")
+HANDOFF = re.compile(r"交由\s*([A-Za-z_]+)")
+
+
+class StubModel(Model):
+    """strands Model that answers with scripted tool calls and text after a realistic delay."""
+
+    load: LoadConfig = None
+    _seeds = itertools.count()
+
+    def __init__(self, **model_config):
+        self.model_config = {"model_id": "stub", **model_config}
+        self.random = random.Random(self.load.seed * 1000003 + next(self._seeds))
+
+    def update_config(self, **model_config):
+        self.model_config.update(model_config)
+
+    def get_config(self):
+        return self.model_config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("The stub model has no structured output")
+        yield  # pragma: no cover
+
+    def _ticker(self, texts: List[str]) -> str:
+        for text in texts:
+            for ticker in self.load.tickers:
+                if re.search(rf"(?<![A-Za-z0-9]){re.escape(ticker)}(?![A-Za-z0-9])", text, re.IGNORECASE):
+                    return ticker
+        return self.load.tickers[0]
+
+    def _next_action(self, messages, tool_specs, system_prompt: str):
+        # Tools already used since the last user text, i.e. in this invocation
+        used, texts = set(), [system_prompt]
+        for message in messages:
+            for block in message.get("content", []):
+                if message["role"] == "user" and "text" in block:
+                    used = set()
+                    texts.append(block["text"])
+                elif "toolUse" in block:
+                    used.add(block["toolUse"]["name"])
+        ticker = self._ticker(list(reversed(texts[1:])) + texts[:1])
+        names = {spec["name"] for spec in tool_specs}
+        for spec in tool_specs:
+            schema = spec.get("inputSchema", {}).get("json", {})
+            required = schema.get("required", [])
+            if spec["name"] in used or spec["name"] in SKIPPED_TOOLS or not set(required) <= set(FILLABLE):
+                continue
+            return "tool", spec["name"], {name: ticker for name in FILLABLE if name in schema.get("properties", {})}
+        handoff = HANDOFF.search(system_prompt)
+        if handoff and "handoff_to_agent" in names and "handoff_to_agent" not in used:
+            return "tool", "handoff_to_agent", {"agent_name": handoff.group(1), "message": f"继续分析 {ticker}"}
+        return "text", ticker, None
+
+    async def _sleep(self, seconds: float):
+        await asyncio.sleep(seconds * self.random.lognormvariate(0, self.load.jitter))
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        calls.incr("bedrock")
+        prompt_tokens = len(json.dumps(messages, ensure_ascii=False, default=str)) // 4 + len(system_prompt or "") // 2
+        await self._sleep(self.load.first_token + self.load.prefill_per_1k * prompt_tokens / 1000)
+        action, name, arguments = self._next_action(messages, tool_specs or [], system_prompt or "")
+
+        yield {"messageStart": {"role": "assistant"}}
+        if action == "tool":
+            output_tokens = 40
+            await self._sleep(output_tokens / self.load.tokens_per_second)
+            tool_use_id = f"tooluse_{self.random.getrandbits(48):012x}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"name": name, "toolUseId": tool_use_id}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments, ensure_ascii=False)}}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            output_tokens = self.load.answer_tokens
+            chunks = 10
+            yield {"contentBlockStart": {"start": {}}}
+            for i in range(chunks):
+                await self._sleep(output_tokens / chunks / self.load.tokens_per_second)
+                yield {"contentBlockDelta": {"delta": {"text": f"{name} 分析要点 {i + 1}: " + "数据" * (output_tokens // chunks // 2) + "\n"}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        yield {
+            "metadata": {
+                "usage": {"inputTokens": prompt_tokens, "outputTokens": output_tokens, "totalTokens": prompt_tokens + output_tokens},
+                "metrics": {"latencyMs": 0},
+            }
+        }
+
+
+_installed: Optional[Recording] = None
+
+
+def install(config: LoadConfig) -> Recording:
+    """Swap in the stub model and the provider recording for this process (once)."""
+    global _installed
+    if _installed is not None:
+        return _installed
+    recording = Recording(config.recording, config.record, config.provider_latency)
+    _patch_akshare(recording)
+    _patch_yfinance(recording)
+    _patch_requests(recording)
+
+    StubModel.load = config
+    import strands.models
+    import cn_company_analysis_agent, cn_stock_price_agent, company_analysis_agent, finance_assistant_swarm
+    import financial_metrics_agent, stock_price_agent
+
+    strands.models.BedrockModel = StubModel
+    for module in (cn_company_analysis_agent, cn_stock_price_agent, company_analysis_agent, finance_assistant_swarm,
+                   financial_metrics_agent, stock_price_agent):
+        module.BedrockModel = StubModel
+    # The agents print streamed text and tool progress; thousands of sessions' worth is noise here
+    for logger in ("strands", "strands.multiagent"):
+        logging.getLogger(logger).setLevel(logging.WARNING)
+    if not config.record:
+        sys.stdout = open(os.devnull, "w")
+    _installed = recording
+    return recording
+
+
+_local = threading.local()
+
+
+def _ask(module, create: Callable, prompt: str) -> str:
+    """Run one query on this thread's agent from create(), with a fresh conversation."""
+    agents = _local.__dict__.setdefault("agents", {})
+    if create not in agents:
+        agents[create] = create()
+    agent = agents[create]
+    agent.messages = module.create_initial_messages()
+    try:
+        return str(agent(prompt))
+    finally:
+        agent.messages = module.create_initial_messages()
+
+
+def _is_cn(ticker: str) -> bool:
+    from utils import symbols
+
+    try:
+        return symbols.classify(ticker).market == "cn"
+    except ValueError:
+        return False
+
+
+def run_price(ticker: str) -> str:
+    import intent_router
+
+    answer = intent_router.answer(f"{ticker} 股价")
+    if answer is not None:
+        return answer
+    import cn_stock_price_agent, stock_price_agent
+    module = cn_stock_price_agent if _is_cn(ticker) else stock_price_agent
+    return _ask(module, module.create_stock_price_agent, f"{ticker} 最近的股价走势如何?")
+
+
+def run_company(ticker: str) -> str:
+    import cn_company_analysis_agent, company_analysis_agent
+    module = cn_company_analysis_agent if _is_cn(ticker) else company_analysis_agent
+    return _ask(module, module.create_company_analysis_agent, f"分析 {ticker} 的公司基本面")
+
+
+def run_swarm(ticker: str) -> str:
+    import finance_assistant_swarm
+    from utils import deadline
+
+    with deadline.budget(finance_assistant_swarm.DEFAULT_DEADLINE):
+        return _ask(finance_assistant_swarm, finance_assistant_swarm.create_orchestration_agent,
+                    finance_assistant_swarm.analysis_request(ticker))
+
+
+RUNNERS = {"price": run_price, "company": run_company, "swarm": run_swarm}
+
+
+def handle(request: Dict) -> Dict:
+    """Serve one simulated query; runs in a session thread or a pool worker."""
+    started = time.time()
+    install(request["config"])
+    before = calls.snapshot()
+    try:
+        RUNNERS[request["kind"]](request["ticker"])
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)}"
+    finished = time.time()
+    return {"started": started, "finished": finished, "error": error, "calls": dict(calls.snapshot() - before)}
+
+
+@dataclass
+class Sample:
+    kind: str
+    submitted: float
+    started: float
+    finished: float
+    done: float
+    error: Optional[str]
+
+    @property
+    def latency(self) -> float:
+        return self.done - self.submitted
+
+    @property
+    def queued(self) -> float:
+        return max(0.0, self.started - self.submitted)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": None, "p90": None, "p99": None}
+    return {f"p{q}": round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))], 3) for q in (50, 90, 99)}
+
+
+def run_level(config: LoadConfig, users: int, results):
+    """Drive `users` closed-loop users for config.duration seconds in this (fresh) process."""
+    os.environ["CN_FINANCE_CACHE_DIR"] = tempfile.mkdtemp(prefix="loadtest-")
+    try:
+        install(config)
+        samples: List[Sample] = []
+        lock = threading.Lock()
+        if config.workers:
+            from agent_service import affinity_key
+            from utils.worker_pool import WorkerPool
+
+            server = WorkerPool(handle, config.workers)
+            submit = lambda request: server.submit(request, key=affinity_key(request["ticker"]))
+        else:
+            server = ThreadPoolExecutor(max_workers=config.sessions or users)
+            submit = lambda request: server.submit(handle, request)
+
+        kinds, weights = zip(*config.mix.items())
+        started = time.time()
+        stop_at = started + config.duration
+
+        def user(index: int):
+            rng = random.Random(config.seed * 7919 + index)
+            while time.time() < stop_at:
+                request = {"kind": rng.choices(kinds, weights)[0], "ticker": rng.choice(config.tickers), "config": config}
+                submitted = time.time()
+                try:
+                    outcome = submit(request).result()
+                except Exception as e:
+                    outcome = {"started": submitted, "finished": time.time(), "error": f"{type(e).__name__}: {str(e)}", "calls": {}}
+                sample = Sample(request["kind"], submitted, outcome["started"], outcome["finished"], time.time(), outcome["error"])
+                with lock:
+                    samples.append(sample)
+                    if config.workers:
+                        calls.counts.update(outcome["calls"])
+                if config.think_time:
+                    time.sleep(rng.expovariate(1.0 / config.think_time))
+
+        threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = max(s.done for s in samples) - started if samples else config.duration
+        server.shutdown()
+        results.put(summarize(users, samples, calls.snapshot(), elapsed))
+    except Exception as e:
+        results.put({"users": users, "error": f"{type(e).__name__}: {str(e)}"})
+
+
+def summarize(users: int, samples: List[Sample], provider_calls: Counter, elapsed: float) -> Dict:
+    return {
+        "users": users,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s.error),
+        "seconds": round(elapsed, 1),
+        "throughput": round(len(samples) / elapsed, 3),
+        "latency": percentiles([s.latency for s in samples]),
+        "queued": percentiles([s.queued for s in samples]),
+        "by_kind": {
+            kind: {"requests": len(group), **percentiles([s.latency for s in group])}
+            for kind in KINDS
+            for group in [[s for s in samples if s.kind == kind]]
+            if group
+        },
+        "provider_calls_per_second": {provider: round(count / elapsed, 3) for provider, count in sorted(provider_calls.items())},
+        "error_examples": sorted({s.error for s in samples if s.error})[:5],
+    }
+
+
+def record(config: LoadConfig):
+    """Run every query kind once per ticker against the live providers and save their responses."""
+    os.environ["CN_FINANCE_CACHE_DIR"] = tempfile.mkdtemp(prefix="loadtest-record-")
+    recording = install(config)
+    for kind in config.mix:
+        for ticker in config.tickers:
+            started = time.perf_counter()
+            outcome = handle({"kind": kind, "ticker": ticker, "config": config})
+            status = outcome["error"] or "ok"
+            print(f"{kind:<8} {ticker:<8} {time.perf_counter() - started:6.1f}s  {status}", file=sys.stderr)
+    recording.save()
+    print(f"Recorded {len(recording.entries)} provider responses to {config.recording}", file=sys.stderr)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"price=0.6,company=0.3,swarm=0.1" -> weights by query kind."""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in RUNNERS:
+            raise ValueError(f"Unknown query kind {kind}; known: {', '.join(RUNNERS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def print_report(levels: List[Dict]):
+    print(f"\n{'users':>6} {'requests':>9} {'errors':>7} {'req/s':>7} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} {'queue p50':>10} {'queue p99':>10}")
+    for level in levels:
+        if "error" in level:
+            print(f"{level['users']:>6}  failed: {level['error']}")
+            continue
+        latency, queued = level["latency"], level["queued"]
+        print(
+            f"{level['users']:>6} {level['requests']:>9} {level['errors']:>7} {level['throughput']:>7.2f} "
+            f"{latency['p50'] or 0:>7.2f} {latency['p90'] or 0:>7.2f} {latency['p99'] or 0:>7.2f} "
+            f"{queued['p50'] or 0:>10.3f} {queued['p99'] or 0:>10.3f}"
+        )
+
+    print(f"\n{'users':>6} {'kind':>8} {'requests':>9} {'p50 s':>7} {'p99 s':>7}")
+    for level in levels:
+        for kind, stats in level.get("by_kind", {}).items():
+            print(f"{level['users']:>6} {kind:>8} {stats['requests']:>9} {stats['p50']:>7.2f} {stats['p99']:>7.2f}")
+
+    providers = sorted({p for level in levels for p in level.get("provider_calls_per_second", {})})
+    print("\nProvider calls per second\n" + f"{'users':>6} " + " ".join(f"{p[:12]:>12}" for p in providers))
+    for level in levels:
+        rates = level.get("provider_calls_per_second", {})
+        print(f"{level['users']:>6} " + " ".join(f"{rates.get(p, 0):>12.2f}" for p in providers))
+
+    for level in levels:
+        for example in level.get("error_examples", []):
+            print(f"{level['users']:>6} error: {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the agents with a stub model and recorded provider responses")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 32], help="concurrent users per level")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds each level runs")
+    parser.add_argument("--think-time", type=float, default=2.0, help="mean pause between a user's queries, seconds")
+    parser.add_argument("--mix", default="price=0.6,company=0.3,swarm=0.1", help="query kinds and their weights")
+    parser.add_argument("--tickers", default="600519,000858,300750,AAPL,MSFT")
+    parser.add_argument("--workers", type=int, default=0, help="serve through a worker pool of this many processes")
+    parser.add_argument("--sessions", type=int, default=0, help="cap on concurrent sessions in thread mode (default: one per user)")
+    parser.add_argument("--first-token", type=float, default=0.6, help="stub model seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="stub model output rate")
+    parser.add_argument("--provider-latency", type=float, default=1.0, help="multiplier on recorded provider latency")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING)
+    parser.add_argument("--record", action="store_true", help="record provider responses (live network) and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        tickers=[t.strip() for t in args.tickers.split(",") if t.strip()],
+        mix=parse_mix(args.mix),
+        recording=args.recording,
+        duration=args.duration,
+        think_time=args.think_time,
+        workers=args.workers,
+        sessions=args.sessions,
+        seed=args.seed,
+        first_token=args.first_token,
+        tokens_per_second=args.tokens_per_second,
+        provider_latency=args.provider_latency,
+        record=args.record,
+    )
+    if args.record:
+        record(config)
+        return
+    if not os.path.exists(config.recording):
+        parser.error(f"No recording at {config.recording}; run with --record first")
+
+    # Each level in a fresh process: cold caches, no agents or threads left over from the last level
+    context = multiprocessing.get_context("spawn")
+    levels = []
+    for users in args.users:
+        results = context.Queue()
+        process = context.Process(target=run_level, args=(config, users, results))
+        process.start()
+        level = results.get()
+        process.join()
+        levels.append(level)
+        print(f"{users} users: {level.get('throughput', 0):.2f} req/s, p50 {level.get('latency', {}).get('p50')}s", file=sys.stderr)
+
+    print_report(levels)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": asdict(config), "levels": levels}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Fundamentals Snapshot Builder
+
+Builds the nightly fundamentals snapshot get_financial_metrics answers
+from: every A-share from the bulk AKShare spot and results endpoints, plus
+yfinance for the symbols on a watchlist (US and HK tickers included). The
+snapshot replaces the previous one atomically; running agents map the new
+file on their next lookup. Meant to run after the evening results update
+(21:00 Asia/Shanghai), e.g. from cron:
+
+    15 21 * * 1-5  python build_fundamentals.py watchlist.txt
+"""
+
+import argparse
+import json
+from typing import List
+
+from utils import fundamentals
+
+
+def read_watchlist(path: str) -> List[str]:
+    """One ticker per line in any spelling the symbol parser accepts; '#' starts a comment."""
+    tickers = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            ticker = line.split("#", 1)[0].split(",")[0].strip()
+            if ticker and ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def main():
+    """Main function to build the fundamentals snapshot."""
+    parser = argparse.ArgumentParser(description="Build the nightly fundamentals snapshot")
+    parser.add_argument("watchlist", nargs="?", help="file with tickers to add yfinance fields for")
+    parser.add_argument("--period", help="results report period as YYYYMMDD (default: latest fully disclosed)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent yfinance fetches")
+    args = parser.parse_args()
+
+    watchlist = read_watchlist(args.watchlist) if args.watchlist else []
+    print(f"\n📊 Building fundamentals snapshot ({len(watchlist)} watchlist symbols from yfinance)\n")
+    summary = fundamentals.build(watchlist, args.period, args.workers)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Watchlist Cache Warmer
+
+Prefetches daily bars and adjustment factors, company profiles, news,
+financial indicators and industry peer distributions for every symbol on a
+watchlist so the analysts' first queries of the day are served from the
+local cache. Meant to be scheduled shortly after the A-share close
+(15:00 Asia/Shanghai), e.g. from cron:
+
+    30 15 * * 1-5  python cache_warmer.py watchlist.txt
+
+Progress is checkpointed after every symbol; rerunning the same day resumes
+where the previous run stopped.
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+from utils import bar_store, common, datasources, peers
+from utils.cache import CACHE_DIR, atomic_write_bytes
+from utils.trading_calendar import MARKET_TZ, SESSIONS, get_calendar
+
+MARKET_CLOSE = SESSIONS[-1][1]
+
+# Market data refreshes itself once the trading calendar says the close has
+# passed; news has no such boundary so it is always refetched
+SOURCES = {
+    "hist": lambda code: bar_store.get_store().update(code),
+    "company_info": lambda code: datasources.company_profile(common.format_stock_code(code)),
+    "news": lambda code: datasources.stock_news(code, refresh=True),
+    "financial_indicator": lambda code: datasources.financial_indicator(code),
+    # Builds the distribution of the symbol's industry board
+    "peers": lambda code: peers.compare(code),
+}
+
+
+def read_watchlist(path: str) -> List[str]:
+    """One symbol per line; blank lines, '#' comments and SH/SZ prefixes are allowed."""
+    symbols = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            code = common.short_stock_code(line.split(",")[0].strip().upper())
+            if code not in symbols:
+                symbols.append(code)
+    return symbols
+
+
+def run_date(now: dt.datetime = None) -> str:
+    """Trading date whose close the run is warming for."""
+    return get_calendar().last_trading_day(now).strftime("%Y%m%d")
+
+
+class Checkpoint:
+    """JSON record of finished and failed symbols for one run date."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {"done": {}, "failed": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def done_sources(self, symbol: str) -> List[str]:
+        return self.state["done"].get(symbol, [])
+
+    def record(self, symbol: str, done: List[str], errors: Dict[str, str]):
+        with self._lock:
+            self.state["done"][symbol] = done
+            if errors:
+                self.state["failed"][symbol] = errors
+            else:
+                self.state["failed"].pop(symbol, None)
+            payload = json.dumps(self.state, ensure_ascii=False, indent=1).encode("utf-8")
+            atomic_write_bytes(self.path, payload)
+
+
+def warm_symbol(symbol: str, sources: List[str], checkpoint: Checkpoint) -> Dict[str, str]:
+    """Fetch every source not yet done for the symbol; return errors by source."""
+    done = list(checkpoint.done_sources(symbol))
+    errors = {}
+    for source in sources:
+        if source in done:
+            continue
+        try:
+            SOURCES[source](symbol)
+            done.append(source)
+        except Exception as e:
+            errors[source] = str(e)
+    checkpoint.record(symbol, done, errors)
+    return errors
+
+
+def warm(symbols: List[str], sources: List[str], workers: int, checkpoint: Checkpoint) -> Dict:
+    """Warm all symbols in parallel; provider rate limits are enforced by datasources."""
+    pending = [s for s in symbols if not set(sources) <= set(checkpoint.done_sources(s))]
+    skipped = len(symbols) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} symbols already warmed")
+
+    started = time.time()
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(warm_symbol, symbol, sources, checkpoint): symbol for symbol in pending}
+        for idx, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            errors = future.result()
+            if errors:
+                failed[symbol] = errors
+                print(f"[{idx}/{len(pending)}] {symbol} failed: {', '.join(errors)}")
+            else:
+                print(f"[{idx}/{len(pending)}] {symbol} ok")
+
+    return {
+        "symbols": len(symbols),
+        "warmed": len(pending) - len(failed),
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(time.time() - started, 1),
+    }
+
+
+def wait_for_close():
+    """Sleep until the A-share market has closed for the day."""
+    now = dt.datetime.now(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0)
+    if get_calendar().is_trading_day(now.date()) and now < close:
+        print(f"Waiting {int((close - now).total_seconds())}s for the market close...")
+        time.sleep((close - now).total_seconds())
+
+
+def main():
+    """Main function to run the cache warmer."""
+    parser = argparse.ArgumentParser(description="Prefetch market data for a watchlist")
+    parser.add_argument("watchlist", help="file with one stock code per line")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--sources", default=",".join(SOURCES), help="comma separated subset of sources")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: one per run date in the cache dir)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--wait-for-close", action="store_true", help="sleep until 15:00 Asia/Shanghai first")
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    if args.wait_for_close:
+        wait_for_close()
+
+    path = args.checkpoint or os.path.join(CACHE_DIR, "warmer", f"{run_date()}.json")
+    if args.restart and os.path.exists(path):
+        os.remove(path)
+
+    symbols = read_watchlist(args.watchlist)
+    print(f"\n🔥 Warming {len(symbols)} symbols ({', '.join(sources)}) with {args.workers} workers\n")
+    report = warm(symbols, sources, args.workers, Checkpoint(path))
+
+    print(
+        f"\nWarmed {report['warmed']} symbols, skipped {report['skipped']}, "
+        f"failed {len(report['failed'])} in {report['seconds']}s"
+    )
+    if report["failed"]:
+        print(f"Rerun to retry the failures; checkpoint: {path}")
+
+
+if __name__ == "__main__":
+    main()
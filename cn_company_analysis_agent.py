@@ -4,6 +4,7 @@ Company Analysis Tool
 
 A command-line tool that uses the Strands Agent SDK to provide comprehensive company analysis.
 """
+import argparse
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -15,12 +16,11 @@ from typing import Dict, Union
 # Third-party imports
 from bs4 import BeautifulSoup
 import yfinance as yf
-import akshare as ak
-import requests
 from strands import Agent, tool
 from strands.models import BedrockModel
 from strands_tools import think, http_request
-from utils import common
+from utils import common, datasources, http_cache, memprofile, peers, sentiment, symbols
+from utils.session import add_session_argument, session_from_args, session_turn
 
 
 @tool
@@ -29,24 +29,19 @@ def get_company_info(ticker: str) -> Union[Dict, str]:
     try:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
-        
-        standard_code = common.format_stock_code(ticker)
-        info = ak.stock_individual_basic_info_xq(symbol=standard_code)
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
 
+        standard_code = common.format_stock_code(ticker)
+        profile = datasources.company_profile(standard_code)
 
         # Get company information
         company_data = {
             "status": "success",
             "data": {
                 "symbol": standard_code,
-                "company_name": info.values[1][1], # org_name_cn 
-                "sector": info.values[29][1], # classi_name 
-                "industry": info.values[38][1]['ind_name'], # affiliate_industry 
-                "description": info.values[5][1], # main_operation_business
-                "website": info.values[19][1], # org_website   
-                "register_asset": info.values[13][1], # reg_asset 
-                "employees": info.values[14][1], # staff_num    
-                "province": info.values[27][1],  # provincial_name 
+                **profile,
                 "date": dt.datetime.now().strftime("%Y-%m-%d"),
             },
         }
@@ -57,20 +52,49 @@ def get_company_info(ticker: str) -> Union[Dict, str]:
         return {"status": "error", "message": f"Error fetching company info: {str(e)}"}
 
 
+@tool
+def compare_with_peers(ticker: str, industry: str = "") -> Union[Dict, str]:
+    """Ranks a company's valuation, growth and profitability against the other stocks in its industry.
+
+    Args:
+        ticker: A-share stock code, e.g. 600519
+        industry: Eastmoney industry board name; defaults to the company's own industry
+
+    Returns:
+        For each metric (pe, pb, market_cap, revenue_growth, profit_growth, roe, gross_margin)
+        the company's value, its percentile among peers (0-100) and the industry quartiles,
+        plus the largest companies in the industry
+    """
+    try:
+        if not ticker.strip():
+            return {"status": "error", "message": "Ticker symbol is required"}
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
+
+        comparison = peers.compare(ticker, industry.strip() or None)
+        return {"status": "success", "data": {**comparison, "date": dt.datetime.now().strftime("%Y-%m-%d")}}
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error comparing with peers: {str(e)}"}
+
+
 @tool
 def get_stock_news(ticker: str) -> Union[Dict, str]:
     """Fetches stock news from multiple sources for comprehensive coverage."""
     try:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
-        
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
+
         standard_code = common.format_stock_code(ticker)
         stock_code = common.short_stock_code(ticker)
 
         # Get company name for better search results
         try:
-            info = ak.stock_individual_basic_info_xq(symbol=standard_code)
-            company_name = info.values[1][1], # org_name_cn 
+            company_name = datasources.company_profile(standard_code)["company_name"] or ticker
         except Exception:
             company_name = ticker
 
@@ -82,7 +106,7 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
         # 1. Try AKShare API directly
         sources_tried.append("东方财富指定个股的新闻资讯数据")
         try:
-            news_data =  ak.stock_news_em(symbol=stock_code)
+            news_data = datasources.stock_news(stock_code)
 
             for i in range(10):
                 # print("\n ******")
@@ -118,7 +142,7 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
                 }
 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = http_cache.get(url, headers=headers, timeout=10)
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, "html.parser")
 
@@ -201,12 +225,18 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                 if item["summary"]:
                     print(f"Summary: {item['summary'][:100]}...")
 
+            # Score sentiment locally so the agent reads a compact summary, not raw bodies
+            scored_news = sentiment.score_articles(all_news[:8])
+            for item in scored_news:
+                item["summary"] = item["summary"][:200]
+
             return {
                 "status": "success",
                 "data": {
                     "symbol": ticker,
                     "company_name": company_name,
-                    "recent_news": all_news[:8],  # Return at most 8 news items
+                    "recent_news": scored_news,  # Return at most 8 news items
+                    "sentiment": sentiment.aggregate(scored_news),
                     "sources_checked": sources_tried,
                     "date": dt.datetime.now().strftime("%Y-%m-%d"),
                 },
@@ -258,16 +288,24 @@ def create_initial_messages():
     ]
 
 
-def create_company_analysis_agent():
-    """Create and configure the company analysis agent."""
-    return Agent(
+def create_company_analysis_agent(session=None):
+    """Create and configure the company analysis agent.
+
+    With a ChatSession, tool results other than live ones are memoized for the conversation.
+    """
+    tools = [get_company_info, compare_with_peers, get_stock_news, http_request, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
         system_prompt="""你是一名技能全面的公司分析专家。请按照以下步骤执行:
 
 <input>
 当用户提供公司股票代码时：
 1. 使用 get_company_info 获取公司概览  
-2. 使用 get_stock_news 评估市场状况  
-3. 按以下格式提供客观分析，如果没有确实信息，不要猜测 ，可以略过
+2. 使用 compare_with_peers 对比同行业公司的估值、成长性和盈利能力, percentile 是在行业内的百分位  
+3. 使用 get_stock_news 评估市场状况, 结果中的 sentiment 字段是新闻情绪的汇总评分  
+4. 按以下格式提供客观分析，如果没有确实信息，不要猜测 ，可以略过
 </input>
 
 <output_format>
@@ -282,6 +320,7 @@ def create_company_analysis_agent():
    - 重要比率  
    - 现金流评估  
    - 盈利能力分析  
+   - 同行业对比（估值与成长性百分位）  
 
 3. 市场分析：  
    - 技术指标  
@@ -295,14 +334,19 @@ def create_company_analysis_agent():
    - 综合评估  
 </output_format>""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_company_info, get_stock_news, http_request, think],
-    )
+        tools=tools,
+    ))
 
 
 def main():
     """Main function to run the company analysis tool."""
+    parser = argparse.ArgumentParser(description="A-share company analysis tool")
+    add_session_argument(parser)
+    args = parser.parse_args()
+    session = session_from_args(args)
+
     # Create and initialize the agent
-    company_analysis_agent = create_company_analysis_agent()
+    company_analysis_agent = create_company_analysis_agent(session)
     company_analysis_agent.messages = create_initial_messages()
 
     print("\n🏢 Company Analysis Tool 🔍\n")
@@ -325,18 +369,13 @@ def main():
                 ],
             }
 
-            # Add message to conversation
-            company_analysis_agent.messages.append(user_message)
-
-            # Get response
-            response = company_analysis_agent(user_message["content"][0]["text"])
+            # Get response; session_turn adds it to the history, then resets or compacts the history
+            with session_turn(company_analysis_agent, session, create_initial_messages, user_message):
+                response = company_analysis_agent(user_message["content"][0]["text"])
             print(f"Analysis Results:\n{response}\n")
 
         except Exception as e:
             print(f"Error: {str(e)}\n")
-        finally:
-            # Reset conversation after each query
-            company_analysis_agent.messages = create_initial_messages()
 
 
 if __name__ == "__main__":
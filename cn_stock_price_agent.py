@@ -5,14 +5,18 @@ Stock Price Analysis Tool
 A command-line tool that uses the Strands Agent SDK to analyze stock prices.
 """
 
+import argparse
 import datetime as dt
 from typing import Dict, Union
 
 # Third-party imports
-import akshare as ak
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
+from utils import backtest, bar_store, datasources, indicators, memprofile, portfolio, quotes, symbols, trading_calendar
+from utils.session import add_session_argument, session_from_args, session_turn
+
+import intent_router
 
 
 @tool
@@ -23,18 +27,28 @@ def get_stock_prices(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        # Get stock data
-        current_date = dt.datetime.now().strftime('%Y%m%d')
-        start_date = (dt.datetime.now() - dt.timedelta(days=70)).strftime('%Y%m%d')
+        # Only A-share listings are served here; send anything else elsewhere without a fetch
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
+        symbol = symbols.classify(ticker)
+
+        # Get the last 70 days from the local bar store, forward-adjusted on read
+        start_date = (dt.datetime.now() - dt.timedelta(days=70)).strftime('%Y-%m-%d')
 
-        data = ak.stock_zh_a_hist(symbol=ticker, period="daily", start_date=start_date, end_date=current_date, adjust="qfq")
+        data = bar_store.get_store().load(ticker, adjust="qfq", start_date=start_date)
 
         if data.empty:
             return {"status": "error", "message": f"No data found for ticker {ticker}"}
 
-        # Calculate metrics
-        current_price = float(data["收盘"].iloc[-1])
-        previous_close = float(data["收盘"].iloc[-2])
+        # Calculate metrics, preferring the live in-memory quote over the last close
+        quote = quotes.latest_quote(symbol.code, max_age=60) if symbol.asset == "stock" else None
+        if quote:
+            current_price = quote["price"]
+            previous_close = quote["previous_close"]
+        else:
+            current_price = float(data["收盘"].iloc[-1])
+            previous_close = float(data["收盘"].iloc[-2])
         price_change = current_price - previous_close
         price_change_percent = (price_change / previous_close) * 100
 
@@ -58,6 +72,162 @@ def get_stock_prices(ticker: str) -> Union[Dict, str]:
         return {"status": "error", "message": f"Error fetching price data: {str(e)}"}
 
 
+@tool
+def get_realtime_quote(ticker: str) -> Union[Dict, str]:
+    """Returns the latest intraday quote for a ticker from the in-memory quote store."""
+    try:
+        if not ticker.strip():
+            return {"status": "error", "message": "Ticker symbol is required"}
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
+        ticker = symbols.classify(ticker).code
+
+        quote = quotes.latest_quote(ticker)
+        if quote is None:
+            # Poller not running in this process: one bulk snapshot serves every symbol
+            quotes.get_store().ingest(datasources.spot_quotes())
+            quote = quotes.latest_quote(ticker)
+        if quote is None:
+            return {"status": "error", "message": f"No quote found for ticker {ticker}"}
+
+        return {
+            "status": "success",
+            "data": {
+                "symbol": ticker,
+                "current_price": round(quote["price"], 2),
+                "previous_close": round(quote["previous_close"], 2),
+                "price_change_percent": round(quote["change_percent"], 2),
+                "open": round(quote["open"], 2),
+                "high": round(quote["high"], 2),
+                "low": round(quote["low"], 2),
+                "volume": quote["volume"],
+                "amount": quote["amount"],
+                "quote_time": dt.datetime.fromtimestamp(quote["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+            },
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error fetching quote: {str(e)}"}
+
+
+@tool
+def get_technical_indicators(ticker: str) -> Union[Dict, str]:
+    """Returns moving averages, RSI, MACD and VWAP for a ticker, live while the market is open."""
+    try:
+        if not ticker.strip():
+            return {"status": "error", "message": "Ticker symbol is required"}
+        blocked = symbols.wrong_market(ticker, "cn")
+        if blocked:
+            return blocked
+        symbol = symbols.classify(ticker)
+
+        calendar = trading_calendar.get_calendar()
+        bars = bar_store.get_store().load(ticker, adjust="qfq")
+        if bars.empty:
+            return {"status": "error", "message": f"No data found for ticker {ticker}"}
+
+        # Only completed daily bars go into the running state
+        state = indicators.get_book().sync(symbol.prefixed, bars, through=str(calendar.last_trading_day()))
+
+        quote = quotes.latest_quote(symbol.code, max_age=60) if calendar.is_open() and symbol.asset == "stock" else None
+        if quote:
+            values = state.snapshot(price=quote["price"])
+            values["intraday_vwap"] = quote["amount"] / (quote["volume"] * 100) if quote["volume"] else None
+            values["price"] = quote["price"]
+        else:
+            values = state.snapshot()
+            values["price"] = state.last_close
+
+        def rounded(value):
+            if isinstance(value, dict):
+                return {k: rounded(v) for k, v in value.items()}
+            return round(value, 3) if isinstance(value, float) else value
+
+        return {
+            "status": "success",
+            "data": {
+                "symbol": ticker,
+                "live": quote is not None,
+                "indicators": rounded(values),
+                "date": dt.datetime.now().strftime("%Y-%m-%d"),
+            },
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error computing indicators: {str(e)}"}
+
+
+@tool
+def get_portfolio_risk(tickers: str, benchmark: str = "沪深300", start_date: str = "", window: int = 60) -> Union[Dict, str]:
+    """Risk of a basket of A-shares: correlation, beta, rolling beta, VaR and drawdowns.
+
+    tickers is "600519 000858" for equal weights or "600519:0.6,000858:0.4"
+    with weights. start_date is YYYY-MM-DD and defaults to one year ago.
+    """
+    try:
+        names, weights = portfolio.parse_weights(tickers)
+        if not names:
+            return {"status": "error", "message": "At least one ticker is required"}
+        for name in names:
+            blocked = symbols.wrong_market(name, "cn")
+            if blocked:
+                return blocked
+        if weights is not None and weights.sum() <= 0:
+            return {"status": "error", "message": "Weights must add up to more than zero"}
+
+        start_date = start_date or (dt.datetime.now() - dt.timedelta(days=365)).strftime("%Y-%m-%d")
+        matrix = portfolio.load_returns(names, benchmark=benchmark, start_date=start_date)
+        if len(matrix.days) < 20:
+            return {"status": "error", "message": f"Not enough trading days since {start_date}"}
+
+        return {
+            "status": "success",
+            "data": {"benchmark": benchmark, **portfolio.analyze(matrix, weights, window=window)},
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error computing portfolio risk: {str(e)}"}
+
+
+@tool
+def backtest_strategy(
+    tickers: str, rule: str = "ma_cross", params: str = "", start_date: str = "", execution: str = "open"
+) -> Union[Dict, str]:
+    """Backtest a long/flat signal rule on A-share daily bars with T+1 and price-limit rules.
+
+    tickers is one or more codes separated by spaces or commas. rule is
+    ma_cross (params fast, slow), momentum (lookback) or rsi (period, lower,
+    upper); params such as "fast=20;slow=60" or "fast=5,10,20;slow=60,120"
+    fix values or give a grid, otherwise the rule's default grid is tried.
+    execution is "open" (next day's open) or "close". start_date is
+    YYYY-MM-DD and defaults to three years ago. ST stocks are checked
+    against their board's normal price limit, not the 5% ST limit.
+    """
+    try:
+        names = tickers.replace("，", ",").replace(",", " ").split()
+        if not names:
+            return {"status": "error", "message": "At least one ticker is required"}
+        for name in names:
+            blocked = symbols.wrong_market(name, "cn")
+            if blocked:
+                return blocked
+        if rule not in backtest.rule_names():
+            return {"status": "error", "message": f"Unknown rule {rule}; choose from {', '.join(backtest.rule_names())}"}
+        if execution not in ("open", "close"):
+            return {"status": "error", "message": "execution must be 'open' or 'close'"}
+
+        start_date = start_date or (dt.datetime.now() - dt.timedelta(days=3 * 365)).strftime("%Y-%m-%d")
+        bars = backtest.load_bars(names, start_date=start_date)
+        if len(bars.days) < 30:
+            return {"status": "error", "message": f"Not enough trading days since {start_date}"}
+
+        return {"status": "success", "data": backtest.run(bars, rule, backtest.parse_grid(params), execution)}
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error running backtest: {str(e)}"}
+
+
 def create_initial_messages():
     """Create initial conversation messages."""
     return [
@@ -76,16 +246,26 @@ def create_initial_messages():
     ]
 
 
-def create_stock_price_agent():
-    """Create and configure the stock price analysis agent."""
-    return Agent(
+def create_stock_price_agent(session=None):
+    """Create and configure the stock price analysis agent.
+
+    With a ChatSession, tool results other than live ones are memoized for the conversation.
+    """
+    tools = [get_stock_prices, get_realtime_quote, get_technical_indicators, get_portfolio_risk, backtest_strategy, http_request, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
         system_prompt="""你是一名股票价格分析专家。请按照以下步骤执行:
 
 <input>
 当用户提供公司名称或股票代码时：
-1. 使用 get_stock_prices 获取数据, 数据包含 data_70d, 这里的每行记录是过去某天的数据，包含 ”开盘“，“收盘”，“最高”，“最低”，“成交量”, "换手率" 等交易数据
-2. 分析价格走势和趋势  
-3. 按以下格式提供分析  
+1. 使用 get_realtime_quote 获取盘中最新报价; 使用 get_stock_prices 获取数据, 数据包含 data_70d, 这里的每行记录是过去某天的数据，包含 ”开盘“，“收盘”，“最高”，“最低”，“成交量”, "换手率" 等交易数据
+2. 使用 get_technical_indicators 获取均线、RSI、MACD 和 VWAP 等技术指标
+   如果用户询问多只股票组成的组合，使用 get_portfolio_risk 获取相关性、贝塔、VaR 和回撤
+   如果用户询问某个交易策略（如均线交叉）的历史表现，使用 backtest_strategy 回测，不要凭空估计
+3. 分析价格走势和趋势  
+4. 按以下格式提供分析  
 </input>
 
 <output_format>
@@ -102,16 +282,24 @@ def create_stock_price_agent():
 3. 关键指标摘要  
 </output_format>""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_stock_prices, http_request, think],
-    )
+        tools=tools,
+    ))
 
 
 def main():
     """Main function to run the stock price analysis tool."""
+    parser = argparse.ArgumentParser(description="A-share stock price analysis tool")
+    add_session_argument(parser)
+    args = parser.parse_args()
+    session = session_from_args(args)
+
     # Create and initialize the agent
-    stock_price_agent = create_stock_price_agent()
+    stock_price_agent = create_stock_price_agent(session)
     stock_price_agent.messages = create_initial_messages()
 
+    # Keep intraday quotes in memory for the whole session
+    quotes.start_polling()
+
     print("\n🔎 股票价格分析工具 🔍\n")
 
     while True:
@@ -121,6 +309,12 @@ def main():
             print("\nGoodbye! 👋")
             break
 
+        # Simple lookups are answered straight from the tools, no model call
+        fast_answer = intent_router.answer(query)
+        if fast_answer is not None:
+            print(f"\n{fast_answer}\n")
+            continue
+
         print("\nSearching...\n")
 
         try:
@@ -130,20 +324,15 @@ def main():
                 "content": [{"text": f"请分析下这个股票价格: {query}"}],
             }
 
-            # Add message to conversation
-            stock_price_agent.messages.append(user_message)
-
-            # Get response
-            response = stock_price_agent(user_message["content"][0]["text"])
+            # Get response; session_turn adds it to the history, then resets or compacts the history
+            with session_turn(stock_price_agent, session, create_initial_messages, user_message):
+                response = stock_price_agent(user_message["content"][0]["text"])
             print("\n\n******************************\n")
             print("\n整理分析...\n")
             print(f"\n总结报告: {response}\n")
 
         except Exception as e:
             print(f"Error: {str(e)}\n")
-        finally:
-            # Reset conversation after each query
-            stock_price_agent.messages = create_initial_messages()
 
 
 if __name__ == "__main__":
@@ -5,17 +5,19 @@ Company Analysis Tool
 A command-line tool that uses the Strands Agent SDK to provide comprehensive company analysis.
 """
 
+import argparse
 import datetime as dt
+import time
 import urllib.parse
 from typing import Dict, Union
 
 # Third-party imports
-from bs4 import BeautifulSoup
 import yfinance as yf
-import requests
 from strands import Agent, tool
 from strands.models import BedrockModel
 from strands_tools import think, http_request
+from utils import breaker, deadline, html_parse, http_cache, memprofile, metrics, sentiment, symbols
+from utils.session import add_session_argument, session_from_args, session_turn
 
 
 @tool
@@ -25,8 +27,8 @@ def get_company_info(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        stock = yf.Ticker(symbols.yahoo_symbol(ticker))
+        info = deadline.call(lambda: stock.info, "Yahoo company info")
 
         # Get company information
         company_data = {
@@ -61,10 +63,9 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
 
         # Get company name for better search results
         try:
-            stock = yf.Ticker(ticker)
-            company_name = (
-                stock.info.get("shortName") or stock.info.get("longName") or ticker
-            )
+            stock = yf.Ticker(symbols.yahoo_symbol(ticker))
+            info = deadline.call(lambda: stock.info, "Yahoo company info")
+            company_name = info.get("shortName") or info.get("longName") or ticker
         except Exception:
             company_name = ticker
 
@@ -76,8 +77,8 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
         # 1. Try Yahoo Finance news API directly
         sources_tried.append("Yahoo Finance API")
         try:
-            stock = yf.Ticker(ticker)
-            news_data = stock.news
+            stock = yf.Ticker(symbols.yahoo_symbol(ticker))
+            news_data = deadline.call(lambda: stock.news, "Yahoo news")
 
             if news_data and len(news_data) > 0:
                 for item in news_data[:5]:
@@ -100,8 +101,12 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
             print(f"Error with Yahoo Finance API: {str(e)}")
 
         # 2. Try MarketWatch
-        if len(all_news) < 5:
+        scraper = breaker.get_breaker("marketwatch")
+        if len(all_news) < 5 and not deadline.expired() and scraper.allow():
             sources_tried.append("MarketWatch")
+            # A timeout cut short by the deadline doesn't count against the source
+            timeout = deadline.cap(10)
+            started, usable = time.monotonic(), False
             try:
                 url = f"https://www.marketwatch.com/investing/stock/{ticker.lower()}"
                 headers = {
@@ -109,47 +114,34 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
                 }
 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = http_cache.get(url, headers=headers, timeout=timeout)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for news articles
-                    articles = soup.select(".article__content")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(".article__headline")
-                        link_elem = article.select_one("a.link")
-
-                        if title_elem and link_elem:
-                            title = title_elem.text.strip()
-                            link = link_elem.get("href", "")
-
-                            # Make sure link is absolute
-                            if link and not link.startswith("http"):
-                                link = f"https://www.marketwatch.com{link}"
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",  # MarketWatch doesn't show summaries in the list
-                                "url": link,
-                                "source": "MarketWatch",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from MarketWatch")
+                    found = html_parse.extract(response.text, "marketwatch", limit=5)
+                    # A captcha or block page has none of the article markup
+                    usable = bool(found)
+
+                    for item in found:
+                        news_item = {
+                            "title": item["title"],
+                            "summary": "",  # MarketWatch doesn't show summaries in the list
+                            "url": item["url"],
+                            "source": "MarketWatch",
+                            "date": dt.datetime.now().strftime("%Y-%m-%d"),
+                        }
+                        if news_item not in all_news:
+                            all_news.append(news_item)
+
+                    print(f"Found {len(found)} news items from MarketWatch")
             except Exception as e:
                 print(f"Error with MarketWatch: {str(e)}")
+            scraper.record(usable, time.monotonic() - started, truncated=timeout < 10)
 
         # 3. Try CNBC
-        if len(all_news) < 5:
+        scraper = breaker.get_breaker("cnbc")
+        if len(all_news) < 5 and not deadline.expired() and scraper.allow():
             sources_tried.append("CNBC")
+            timeout = deadline.cap(10)
+            started, usable = time.monotonic(), False
             try:
                 # Use search to find news about the company
                 search_query = f"{company_name} stock"
@@ -160,43 +152,34 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
                 }
 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = http_cache.get(url, headers=headers, timeout=timeout)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for search results
-                    articles = soup.select(".SearchResult-searchResultContent")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(".Card-title")
-                        link_elem = article.select_one("a.resultlink")
-
-                        if title_elem and link_elem:
-                            title = title_elem.text.strip()
-                            link = link_elem.get("href", "")
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "CNBC",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from CNBC")
+                    found = html_parse.extract(response.text, "cnbc", limit=5)
+                    # A captcha or block page has none of the article markup
+                    usable = bool(found)
+
+                    for item in found:
+                        news_item = {
+                            "title": item["title"],
+                            "summary": "",
+                            "url": item["url"],
+                            "source": "CNBC",
+                            "date": dt.datetime.now().strftime("%Y-%m-%d"),
+                        }
+                        if news_item not in all_news:
+                            all_news.append(news_item)
+
+                    print(f"Found {len(found)} news items from CNBC")
             except Exception as e:
                 print(f"Error with CNBC: {str(e)}")
+            scraper.record(usable, time.monotonic() - started, truncated=timeout < 10)
 
         # 4. Try Seeking Alpha
-        if len(all_news) < 5:
+        scraper = breaker.get_breaker("seeking_alpha")
+        if len(all_news) < 5 and not deadline.expired() and scraper.allow():
             sources_tried.append("Seeking Alpha")
+            timeout = deadline.cap(10)
+            started, usable = time.monotonic(), False
             try:
                 url = f"https://seekingalpha.com/symbol/{ticker.upper()}/news"
 
@@ -205,48 +188,34 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
                 }
 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = http_cache.get(url, headers=headers, timeout=timeout)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for news articles
-                    articles = soup.select("article")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(
-                            'a[data-test-id="post-list-item-title"]'
-                        )
-
-                        if title_elem:
-                            title = title_elem.text.strip()
-                            link = title_elem.get("href", "")
-
-                            # Make sure link is absolute
-                            if link and not link.startswith("http"):
-                                link = f"https://seekingalpha.com{link}"
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "Seeking Alpha",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from Seeking Alpha")
+                    found = html_parse.extract(response.text, "seeking_alpha", limit=5)
+                    # A captcha or block page has none of the article markup
+                    usable = bool(found)
+
+                    for item in found:
+                        news_item = {
+                            "title": item["title"],
+                            "summary": "",
+                            "url": item["url"],
+                            "source": "Seeking Alpha",
+                            "date": dt.datetime.now().strftime("%Y-%m-%d"),
+                        }
+                        if news_item not in all_news:
+                            all_news.append(news_item)
+
+                    print(f"Found {len(found)} news items from Seeking Alpha")
             except Exception as e:
                 print(f"Error with Seeking Alpha: {str(e)}")
+            scraper.record(usable, time.monotonic() - started, truncated=timeout < 10)
 
         # 5. Try Google News as a fallback
-        if len(all_news) < 5:
+        scraper = breaker.get_breaker("google_news")
+        if len(all_news) < 5 and not deadline.expired() and scraper.allow():
             sources_tried.append("Google News")
+            timeout = deadline.cap(10)
+            started, usable = time.monotonic(), False
             try:
                 search_query = f"{company_name} stock news"
                 url = f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&tbm=nws"
@@ -256,75 +225,27 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
                 }
 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = http_cache.get(url, headers=headers, timeout=timeout)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Try different selectors for Google News
-                    news_elements = []
-                    selectors = [
-                        "div.SoaBEf",
-                        "div.dbsr",
-                        "g-card",
-                        ".WlydOe",
-                        ".ftSUBd",
-                    ]
-
-                    for selector in selectors:
-                        if not news_elements:
-                            news_elements = soup.select(selector)
-
-                    # If still no results, try to find any links with news-like content
-                    if not news_elements:
-                        all_links = soup.find_all("a")
-                        for link in all_links:
-                            href = link.get("href", "")
-                            if (
-                                "news" in href.lower()
-                                and link.text
-                                and len(link.text.strip()) > 20
-                            ):
-                                news_elements.append(link)
-
-                    for element in news_elements[:5]:
-                        # Try to find title and link
-                        title = None
-                        link = None
-
-                        # If it's a link element directly
-                        if element.name == "a":
-                            title = element.text.strip()
-                            link = element.get("href", "")
-                            if link.startswith("/url?q="):
-                                link = link.split("/url?q=")[1].split("&")[0]
-                        else:
-                            # Try to find a link inside the element
-                            link_elem = element.find("a")
-                            if link_elem:
-                                title = link_elem.text.strip()
-                                link = link_elem.get("href", "")
-                                if link.startswith("/url?q="):
-                                    link = link.split("/url?q=")[1].split("&")[0]
-
-                        if title and link and len(title) > 10:
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "Google News",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(news_elements)} news items from Google News")
+                    found = html_parse.extract(response.text, "google_news", limit=5)
+                    # A captcha or block page has none of the article markup
+                    usable = bool(found)
+
+                    for item in found:
+                        news_item = {
+                            "title": item["title"],
+                            "summary": "",
+                            "url": item["url"],
+                            "source": "Google News",
+                            "date": dt.datetime.now().strftime("%Y-%m-%d"),
+                        }
+                        if news_item not in all_news:
+                            all_news.append(news_item)
+
+                    print(f"Found {len(found)} news items from Google News")
             except Exception as e:
                 print(f"Error with Google News: {str(e)}")
+            scraper.record(usable, time.monotonic() - started, truncated=timeout < 10)
 
         # Print the news items we found
         if all_news:
@@ -339,13 +260,21 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
                 if item["summary"]:
                     print(f"Summary: {item['summary'][:100]}...")
 
+            # Score sentiment locally so the agent reads a compact summary, not raw bodies
+            scored_news = sentiment.score_articles(all_news[:5])
+            for item in scored_news:
+                item["summary"] = item["summary"][:300]
+
             return {
                 "status": "success",
                 "data": {
                     "symbol": ticker,
                     "company_name": company_name,
-                    "recent_news": all_news[:5],  # Return at most 5 news items
+                    "recent_news": scored_news,  # Return at most 5 news items
+                    "sentiment": sentiment.aggregate(scored_news),
                     "sources_checked": sources_tried,
+                    # Sources after the last one checked were skipped for lack of time
+                    "incomplete": deadline.expired(),
                     "date": dt.datetime.now().strftime("%Y-%m-%d"),
                 },
             }
@@ -396,15 +325,22 @@ def create_initial_messages():
     ]
 
 
-def create_company_analysis_agent():
-    """Create and configure the company analysis agent."""
-    return Agent(
+def create_company_analysis_agent(session=None):
+    """Create and configure the company analysis agent.
+
+    With a ChatSession, tool results other than live ones are memoized for the conversation.
+    """
+    tools = [get_company_info, get_stock_news, http_request, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
         system_prompt="""你是一名技能全面的公司分析专家。请按照以下步骤执行:
 
 <input>
 当用户提供公司股票代码时：
 1. 使用 get_company_info 获取公司概览  
-2. 使用 get_stock_news 评估市场状况  
+2. 使用 get_stock_news 评估市场状况, 结果中的 sentiment 字段是新闻情绪的汇总评分  
 3. 按以下格式提供详细分析  
 </input>
 
@@ -433,14 +369,19 @@ def create_company_analysis_agent():
    - 综合评估  
 </output_format>""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_company_info, get_stock_news, http_request, think],
-    )
+        tools=tools,
+    ))
 
 
 def main():
     """Main function to run the company analysis tool."""
+    parser = argparse.ArgumentParser(description="Company analysis tool")
+    add_session_argument(parser)
+    args = parser.parse_args()
+    session = session_from_args(args)
+
     # Create and initialize the agent
-    company_analysis_agent = create_company_analysis_agent()
+    company_analysis_agent = create_company_analysis_agent(session)
     company_analysis_agent.messages = create_initial_messages()
 
     print("\n🏢 Company Analysis Tool 🔍\n")
@@ -463,18 +404,16 @@ def main():
                 ],
             }
 
-            # Add message to conversation
-            company_analysis_agent.messages.append(user_message)
-
-            # Get response
-            response = company_analysis_agent(user_message["content"][0]["text"])
+            # Get response; session_turn adds it to the history, then resets or compacts the history
+            with session_turn(company_analysis_agent, session, create_initial_messages, user_message):
+                response = company_analysis_agent(user_message["content"][0]["text"])
             print(f"Analysis Results:\n{response}\n")
 
         except Exception as e:
             print(f"Error: {str(e)}\n")
         finally:
-            # Reset conversation after each query
-            company_analysis_agent.messages = create_initial_messages()
+            # Latency, hedging and breaker state for this process
+            metrics.write()
 
 
 if __name__ == "__main__":
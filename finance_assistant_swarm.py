@@ -5,15 +5,20 @@ Finance Assistant Swarm Agent
 A collaborative swarm of specialized agents for comprehensive stock analysis.
 """
 # Standard library imports
+import argparse
+import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Any, List
 
 # Third-party imports
 from strands import Agent, tool
 from strands.models import BedrockModel
-from strands.multiagent import Swarm
+from strands.multiagent import Status, Swarm
 from strands_tools import think
+from utils import deadline, memprofile, metrics, symbols
+from utils.session import add_session_argument, session_from_args, session_turn
 import yfinance as yf
 
 from stock_price_agent import get_stock_prices, create_stock_price_agent
@@ -31,7 +36,7 @@ logging.basicConfig(
 def get_real_stock_data(ticker: str) -> Dict[str, Any]:
     """Get accurate stock data outside the swarm"""
     try:
-        stock = yf.Ticker(ticker)
+        stock = yf.Ticker(symbols.yahoo_symbol(ticker))
         info = stock.info
         hist = stock.history(period="5d")
         
@@ -86,44 +91,178 @@ def analyze_company_with_collaborative_swarm(query: str, stock_data: str = "") -
         
         market_analyst = Agent(
             name="market_analyst",
-            system_prompt=f"综合所有见解。使用 get_stock_news 提供最终建议。",
+            system_prompt=f"综合所有见解。使用 get_stock_news 并参考其中的 sentiment 情绪汇总，提供最终建议。",
             model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
             tools=[get_stock_news]
         )
         
-        swarm = Swarm(
-            [company_strategist, financial_analyst, market_analyst],
-            max_handoffs=3,
-            max_iterations=3,
-            execution_timeout=120.0,
-            node_timeout=30.0
-        )
-        
-        result = swarm(f"Analyze {ticker}")
-        
+        # The data tool calls happen in the specialists
+        nodes = [memprofile.instrument(agent) for agent in (company_strategist, financial_analyst, market_analyst)]
+
+        # Half of what is left goes to the swarm, the rest to the orchestrator's synthesis
+        with deadline.budget(deadline.share(2, default=120.0)) as budget:
+            swarm = Swarm(
+                nodes,
+                max_handoffs=3,
+                max_iterations=3,
+                execution_timeout=budget.remaining(),
+                node_timeout=budget.share(len(nodes), floor=5.0)
+            )
+            result = swarm(f"Analyze {ticker}")
+
+        # Keep every node that finished, even when a later one ran out of time
+        reports = {
+            node.node_id: str(result.results[node.node_id])
+            for node in result.node_history
+            if node.node_id in result.results
+        }
+        if not reports:
+            return {"status": "error", "collaborative_analysis": "Analysis failed: no analyst finished before the deadline"}
+
+        incomplete = result.status != Status.COMPLETED
+        return {
+            "status": "success",
+            "collaborative_analysis": list(reports.values())[-1],
+            "specialist_reports": reports,
+            "collaboration_path": list(reports),
+            "incomplete": incomplete,
+        }
+    except Exception as e:
+        return {"status": "error", "collaborative_analysis": f"Analysis failed: {str(e)}"}
+
+def prefetch_company_data(ticker: str) -> Dict[str, Any]:
+    """Fetch company info, financial metrics and news concurrently
+
+    Fetches still running when their share of the deadline is spent are
+    reported as errors so the analysts work with whatever arrived.
+    """
+    fetchers = {
+        "company_info": get_company_info,
+        "financial_metrics": get_financial_metrics,
+        "stock_news": get_stock_news,
+    }
+
+    def fetch(tool):
+        # Called directly rather than by an agent, so recorded here instead of by the tool hooks
+        with memprofile.tool(tool.tool_name):
+            return tool(ticker)
+
+    pool = ThreadPoolExecutor(max_workers=len(fetchers))
+    futures = {name: deadline.submit(pool, fetch, tool) for name, tool in fetchers.items()}
+    wait(futures.values(), timeout=deadline.share(3, default=None))
+    pool.shutdown(wait=False, cancel_futures=True)
+    return {
+        name: future.result() if future.done() else {"status": "error", "message": "Deadline reached before data arrived"}
+        for name, future in futures.items()
+    }
+
+# Each specialist reads the same prefetched data and focuses on its own part
+SPECIALIST_PROMPTS = {
+    "company_strategist": "你是公司战略分析师。基于提供的数据，分析 {ticker} 的商业模式、行业地位和竞争优势。",
+    "financial_analyst": "你是财务分析师。基于提供的数据，分析 {ticker} 的估值、盈利能力、成长性和财务健康状况。",
+    "market_analyst": "你是市场分析师。基于提供的新闻及其 sentiment 情绪汇总，分析 {ticker} 的市场情绪和近期风险。",
+}
+
+@tool
+def analyze_company_with_parallel_analysts(query: str, stock_data: str = "") -> Dict[str, Any]:
+    """Specialist analysts run concurrently on shared prefetched data, then a synthesizer merges them"""
+    try:
+        ticker = query.upper()
+        with deadline.budget(deadline.share(2, default=None)):
+            data = prefetch_company_data(ticker)
+            data_text = json.dumps(data, ensure_ascii=False, default=str)
+
+            agents = {
+                name: Agent(
+                    name=name,
+                    system_prompt=SPECIALIST_PROMPTS[name].format(ticker=ticker),
+                    model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
+                    callback_handler=None,
+                )
+                for name in SPECIALIST_PROMPTS
+            }
+            prompt = f"数据如下:\n{data_text}\n\n请给出简明的专业分析。"
+
+            # Fan out: the three specialists run at the same time, cancelled when their share is spent
+            pool = ThreadPoolExecutor(max_workers=len(agents))
+            futures = {name: deadline.submit(pool, agent, prompt) for name, agent in agents.items()}
+            _, pending = wait(futures.values(), timeout=deadline.share(2, default=None))
+            for name, future in futures.items():
+                if future in pending:
+                    agents[name].cancel()
+            wait(pending, timeout=5.0)
+            pool.shutdown(wait=False)
+            reports = {name: str(future.result()) for name, future in futures.items() if future.done() and not future.exception()}
+            reports = {name: report for name, report in reports.items() if report.strip()}
+            if not reports:
+                return {"status": "error", "collaborative_analysis": "Analysis failed: no analyst finished before the deadline"}
+
+            incomplete = bool(pending) or any(item.get("status") == "error" for item in data.values())
+            joined = "\n\n".join(f"## {name}\n{report}" for name, report in reports.items())
+
+            # Fan in: one synthesizer merges the specialist reports, if there is time left for it
+            merged, synthesized = joined, False
+            if deadline.expired():
+                incomplete = True
+            else:
+                synthesizer = Agent(
+                    name="synthesizer",
+                    system_prompt=f"综合分析师对 {ticker} 的报告，消除重复，给出统一结论和最终建议。",
+                    model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
+                    callback_handler=None,
+                )
+                try:
+                    merged = str(deadline.call(lambda: synthesizer(joined), "synthesizing the reports"))
+                    synthesized = True
+                except deadline.DeadlineExceeded:
+                    synthesizer.cancel()
+                    incomplete = True
+
         return {
             "status": "success",
-            "collaborative_analysis": result.final_response,
-            "collaboration_path": [node.node_id for node in result.node_history]
+            "collaborative_analysis": merged,
+            "specialist_reports": reports,
+            "collaboration_path": list(reports) + (["synthesizer"] if synthesized else []),
+            "incomplete": incomplete,
         }
     except Exception as e:
         return {"status": "error", "collaborative_analysis": f"Analysis failed: {str(e)}"}
 
-def create_orchestration_agent() -> Agent:
-    """Orchestrator with Nova Pro for deep synthesis"""
-    return Agent(
-        system_prompt="""你是一名资深金融公司研究总监。
+# Seconds a query may take end to end, unless --deadline says otherwise
+DEFAULT_DEADLINE = 240.0
+
+# Tool the orchestrator uses for the multi-agent analysis, by execution mode
+ANALYSIS_MODES = {
+    "swarm": analyze_company_with_collaborative_swarm,
+    "parallel": analyze_company_with_parallel_analysts,
+}
+
+def create_orchestration_agent(session=None, mode: str = "swarm") -> Agent:
+    """Orchestrator with Nova Pro for deep synthesis
+
+    mode picks the sequential swarm or the parallel analysts. With a
+    ChatSession, tool results other than live ones are memoized for the
+    conversation.
+    """
+    analysis_tool = ANALYSIS_MODES[mode]
+    tools = [get_real_stock_data, analysis_tool, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
+        system_prompt=f"""你是一名资深金融公司研究总监。
 
         工作流程 (WORKFLOW):  
         1. 使用 get_real_stock_data 获取真实股票数据  
-        2. 使用 analyze_company_with_collaborative_swarm 获取一次协作分析  
+        2. 使用 {analysis_tool.tool_name} 获取一次协作分析  
         3. 使用 think 工具综合分析，形成深度战略洞察  
 
         关键规则 (CRITICAL RULES):  
-        - 禁止多次调用 analyze_company_with_collaborative_swarm  
+        - 禁止多次调用 {analysis_tool.tool_name}  
         - 聚焦于综合与战略结论  
         - 必须突出显示当前股价  
         - 提供能够体现协作智能体价值的深度洞察  
+        - 如果工具结果中 incomplete 为 true，基于已有的部分结果作答，并注明哪些部分因时间不足而缺失  
 
         报告结构 (REPORT STRUCTURE):  
         1. 执行摘要（当前股价 + 核心论点）  
@@ -132,8 +271,8 @@ def create_orchestration_agent() -> Agent:
         4. 市场情绪分析（新闻 + 趋势）  
         5. 投资建议（买入/持有/卖出及其理由）""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_real_stock_data, analyze_company_with_collaborative_swarm, think],
-    )
+        tools=tools,
+    ))
 
 def create_initial_messages() -> List[Dict]:
     """Create initial conversation messages."""
@@ -152,10 +291,30 @@ def create_initial_messages() -> List[Dict]:
         },
     ]
 
+def analysis_request(query: str) -> str:
+    """The orchestrator prompt for a user's company query."""
+    return f"请使用真实股票数据和协作多智能体分析来分析{query}。确保各智能体在彼此见解的基础上进行拓展，并提供全面的战略分析。请突出显示当前股价。 "
+
 def main():
     """Main function to run the finance assistant swarm."""
+    parser = argparse.ArgumentParser(description="Multi-agent stock analysis")
+    add_session_argument(parser)
+    parser.add_argument(
+        "--mode", choices=sorted(ANALYSIS_MODES), default="swarm", help="sequential swarm or parallel analysts"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=DEFAULT_DEADLINE, help="seconds each query may take before partial results are returned"
+    )
+    parser.add_argument(
+        "--memprofile", action="store_true", help="record memory per query and per tool with the metrics"
+    )
+    args = parser.parse_args()
+    session = session_from_args(args)
+    if args.memprofile:
+        memprofile.enable()
+
     # Create the orchestration agent
-    orchestration_agent = create_orchestration_agent()
+    orchestration_agent = create_orchestration_agent(session, args.mode)
 
     # Initialize messages for the orchestration agent
     orchestration_agent.messages = create_initial_messages()
@@ -172,41 +331,40 @@ def main():
 
         print("\nInitiating hybrid collaborative analysis...\n")
 
-        try:
-            # Create the user message with proper Nova format
-            user_message = {
-                "role": "user",
-                "content": [
-                    {
-                        "text": f"请使用真实股票数据和协作多智能体分析来分析{query}。确保各智能体在彼此见解的基础上进行拓展，并提供全面的战略分析。请突出显示当前股价。 "
-                    }
-                ],
-            }
+        # The history reset or compaction is inside the profiled query, so only what outlives it counts as retained
+        with memprofile.request(args.mode):
+            try:
+                # Create the user message with proper Nova format
+                user_message = {
+                    "role": "user",
+                    "content": [
+                        {
+                            "text": analysis_request(query)
+                        }
+                    ],
+                }
 
-            # Add message to conversation
-            orchestration_agent.messages.append(user_message)
+                # Get response; every tool and agent node shares this query's time budget
+                with session_turn(orchestration_agent, session, create_initial_messages, user_message):
+                    with deadline.budget(args.deadline):
+                        response = orchestration_agent(user_message["content"][0]["text"])
 
-            # Get response
-            response = orchestration_agent(user_message["content"][0]["text"])
+                # Format and print response
+                if isinstance(response, dict) and "content" in response:
+                    print("\nHybrid Collaborative Analysis Results:")
+                    for content in response["content"]:
+                        if "text" in content:
+                            print(content["text"])
+                else:
+                    print(f"\nHybrid Collaborative Analysis Results:\n{response}\n")
 
-            # Format and print response
-            if isinstance(response, dict) and "content" in response:
-                print("\nHybrid Collaborative Analysis Results:")
-                for content in response["content"]:
-                    if "text" in content:
-                        print(content["text"])
-            else:
-                print(f"\nHybrid Collaborative Analysis Results:\n{response}\n")
-
-        except Exception as e:
-            print(f"Error: {str(e)}\n")
-            if "ThrottlingException" in str(e):
-                print("Rate limit reached. Waiting 10 seconds before retry...")
-                time.sleep(10)
-                continue
-        finally:
-            # Reset conversation after each query to maintain clean context
-            orchestration_agent.messages = create_initial_messages()
+            except Exception as e:
+                print(f"Error: {str(e)}\n")
+                if "ThrottlingException" in str(e):
+                    print("Rate limit reached. Waiting 10 seconds before retry...")
+                    time.sleep(10)
+        # Latency, hedging, breaker and (with --memprofile) memory state for this process
+        metrics.write()
             
 if __name__ == "__main__":
     main()
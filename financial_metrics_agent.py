@@ -5,6 +5,7 @@ Financial Metrics Analysis Tool
 A command-line tool that uses the Strands Agent SDK to analyze financial metrics of stocks.
 """
 
+import argparse
 import datetime as dt
 from typing import Dict, Union
 
@@ -13,6 +14,10 @@ import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
+from utils import deadline, fundamentals, memprofile, symbols
+from utils.session import add_session_argument, session_from_args, session_turn
+
+import intent_router
 
 
 @tool
@@ -22,8 +27,12 @@ def get_financial_metrics(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        # Answered from the nightly snapshot while it is current, else fetched live
+        data = fundamentals.lookup(ticker)
+        if data is None:
+            stock = yf.Ticker(symbols.yahoo_symbol(ticker))
+            info = deadline.call(lambda: stock.info, "Yahoo financial metrics")
+            data = {**fundamentals.from_yahoo(info), "as_of": None}
 
         # Get financial data
         try:
@@ -31,18 +40,9 @@ def get_financial_metrics(ticker: str) -> Union[Dict, str]:
                 "status": "success",
                 "data": {
                     "symbol": ticker,
-                    "market_cap": info.get("marketCap", "N/A"),
-                    "pe_ratio": info.get("trailingPE", "N/A"),
-                    "forward_pe": info.get("forwardPE", "N/A"),
-                    "peg_ratio": info.get("pegRatio", "N/A"),
-                    "price_to_book": info.get("priceToBook", "N/A"),
-                    "dividend_yield": info.get("dividendYield", "N/A"),
-                    "profit_margins": info.get("profitMargins", "N/A"),
-                    "revenue_growth": info.get("revenueGrowth", "N/A"),
-                    "debt_to_equity": info.get("debtToEquity", "N/A"),
-                    "return_on_equity": info.get("returnOnEquity", "N/A"),
-                    "current_ratio": info.get("currentRatio", "N/A"),
-                    "beta": info.get("beta", "N/A"),
+                    **{field: "N/A" if data[field] is None else data[field] for field in fundamentals.FIELDS},
+                    "source": "snapshot" if data["as_of"] else "yahoo",
+                    "as_of": data["as_of"],
                     "date": dt.datetime.now().strftime("%Y-%m-%d"),
                 },
             }
@@ -95,9 +95,18 @@ def create_initial_messages():
     ]
 
 
-def create_financial_metrics_agent():
-    """Create and configure the financial metrics analysis agent."""
-    return Agent(
+def create_financial_metrics_agent(session=None):
+    """Create and configure the financial metrics analysis agent.
+
+    With a ChatSession, tool results other than live ones are memoized for the conversation.
+    """
+    # Map the fundamentals snapshot now rather than on the first query
+    fundamentals.get_snapshot()
+    tools = [get_financial_metrics, http_request, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
         system_prompt="""你是一名财务分析专家。请按照以下步骤执行:
 
 <input>
@@ -129,14 +138,19 @@ def create_financial_metrics_agent():
    - 风险评估  
 </output_format>""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_financial_metrics, http_request, think],
-    )
+        tools=tools,
+    ))
 
 
 def main():
     """Main function to run the financial metrics analysis tool."""
+    parser = argparse.ArgumentParser(description="Financial metrics analysis tool")
+    add_session_argument(parser)
+    args = parser.parse_args()
+    session = session_from_args(args)
+
     # Create and initialize the agent
-    financial_metrics_agent = create_financial_metrics_agent()
+    financial_metrics_agent = create_financial_metrics_agent(session)
     financial_metrics_agent.messages = create_initial_messages()
 
     print("\n📊 Financial Metrics Analyzer 📊\n")
@@ -148,6 +162,12 @@ def main():
             print("\nGoodbye! 👋")
             break
 
+        # Simple lookups are answered straight from the tools, no model call
+        fast_answer = intent_router.answer(query)
+        if fast_answer is not None:
+            print(f"\n{fast_answer}\n")
+            continue
+
         print("\nAnalyzing...\n")
 
         try:
@@ -159,18 +179,13 @@ def main():
                 ],
             }
 
-            # Add message to conversation
-            financial_metrics_agent.messages.append(user_message)
-
-            # Get response
-            response = financial_metrics_agent(user_message["content"][0]["text"])
+            # Get response; session_turn adds it to the history, then resets or compacts the history
+            with session_turn(financial_metrics_agent, session, create_initial_messages, user_message):
+                response = financial_metrics_agent(user_message["content"][0]["text"])
             print(f"Analysis Results:\n{response}\n")
 
         except Exception as e:
             print(f"Error: {str(e)}\n")
-        finally:
-            # Reset conversation after each query
-            financial_metrics_agent.messages = create_initial_messages()
 
 
 if __name__ == "__main__":
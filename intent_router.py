@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Intent Router
+
+Answers simple single-field lookups such as "600519 现价" or "AAPL PE"
+straight from the data tools, without a model round trip. Anything that
+looks like open-ended analysis falls through to the agents.
+"""
+
+import re
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from utils import symbols
+
+# Field intents, matched case-insensitively against the query
+INTENTS = {
+    "price": r"现价|股价|价格|最新价|多少钱|\bprice\b|\bquote\b",
+    "change": r"涨跌幅?|涨幅|跌幅|\bchange\b",
+    "pe": r"市盈率|\bp/?e\b|\bpe ratio\b",
+    "market_cap": r"总市值|市值|\bmarket ?cap\b",
+    "high_low": r"最高|最低|高低|\bhigh\b|\blow\b|52周|\b52w\b",
+}
+
+# Words that signal the user wants analysis rather than a number
+OPEN_ENDED = re.compile(
+    r"分析|为什么|怎么|如何|建议|预测|趋势|值得|比较|评估|\banaly[sz]|\bwhy\b|\bhow\b|\bshould\b|\bcompare\b|\bforecast\b",
+    re.IGNORECASE,
+)
+
+CN_TICKER = re.compile(r"(?:SH|SZ|BJ)?(?<!\d)(\d{6})(?!\d)", re.IGNORECASE)
+US_TICKER = re.compile(r"(?<![A-Za-z])([A-Z]{1,5}(?:\.[A-Z]{1,2})?)(?![A-Za-z])")
+
+# Filler allowed around a simple lookup, e.g. "600519 的现价是多少?"
+FILLER = re.compile(r"[\s的是多少呢吗啊？?！!,，。.:：]|what|is|the|of|current|today|今天|当前|目前|现在", re.IGNORECASE)
+
+
+def parse(query: str) -> Optional[Tuple[str, str, str]]:
+    """Return (market, ticker, intent) for a simple lookup, else None."""
+    if OPEN_ENDED.search(query):
+        return None
+
+    intents = [name for name, pattern in INTENTS.items() if re.search(pattern, query, re.IGNORECASE)]
+    if len(intents) != 1:
+        return None
+    intent = intents[0]
+
+    # Blank out the intent words so "PE" or "P/E" is never taken for a ticker
+    rest = re.sub(INTENTS[intent], " ", query, flags=re.IGNORECASE)
+    cn = CN_TICKER.search(rest)
+    if cn:
+        # Spot quotes only cover stocks; A-share ETFs, indices and codes we
+        # can't place (convertible bonds, random numbers) go to the agents
+        try:
+            asset = symbols.classify(cn.group(0)).asset
+        except ValueError:
+            return None
+        if asset != "stock":
+            return None
+        market, ticker, span = "cn", cn.group(1), cn.span()
+    else:
+        candidates = list(US_TICKER.finditer(rest))
+        if len(candidates) != 1:
+            return None
+        market, ticker, span = "us", candidates[0].group(1), candidates[0].span()
+
+    # Whatever is left besides ticker, intent and filler makes it open-ended
+    rest = rest[:span[0]] + " " + rest[span[1]:]
+    if FILLER.sub("", rest):
+        return None
+    return market, ticker, intent
+
+
+def _cn_spot_row(ticker: str) -> Dict:
+    from utils import datasources
+
+    spot = datasources.spot_quotes()
+    rows = spot[spot["代码"].astype(str) == ticker]
+    if rows.empty:
+        raise ValueError(f"No quote found for ticker {ticker}")
+    return rows.iloc[0].to_dict()
+
+
+def _answer_cn(ticker: str, intent: str) -> str:
+    from cn_stock_price_agent import get_realtime_quote, get_stock_prices
+
+    if intent in ("price", "change"):
+        result = get_realtime_quote(ticker)
+        if result["status"] != "success":
+            raise ValueError(result["message"])
+        data = result["data"]
+        if intent == "price":
+            return f"{ticker} 现价 {data['current_price']} (昨收 {data['previous_close']}, {data['quote_time']})"
+        return f"{ticker} 涨跌幅 {data['price_change_percent']}% (现价 {data['current_price']}, 昨收 {data['previous_close']})"
+
+    if intent == "high_low":
+        result = get_stock_prices(ticker)
+        if result["status"] != "success":
+            raise ValueError(result["message"])
+        bars = result["data"]["data_70d"]
+        return f"{ticker} 近70日最高 {float(bars['最高'].max()):.2f}, 最低 {float(bars['最低'].min()):.2f}"
+
+    row = _cn_spot_row(ticker)
+    if intent == "pe":
+        return f"{ticker} 市盈率(动态) {row['市盈率-动态']}"
+    return f"{ticker} 总市值 {float(row['总市值']) / 1e8:.2f} 亿元"
+
+
+def _answer_us(ticker: str, intent: str) -> str:
+    if intent in ("pe", "market_cap"):
+        from financial_metrics_agent import get_financial_metrics
+
+        result = get_financial_metrics(ticker)
+        if result["status"] != "success":
+            raise ValueError(result["message"])
+        data = result["data"]
+        if intent == "pe":
+            return f"{ticker} P/E {data['pe_ratio']} (forward {data['forward_pe']})"
+        return f"{ticker} market cap {data['market_cap']}"
+
+    from stock_price_agent import get_stock_prices
+
+    result = get_stock_prices(ticker)
+    if result["status"] != "success":
+        raise ValueError(result["message"])
+    data = result["data"]
+    if intent == "price":
+        return f"{ticker} price {data['current_price']} (previous close {data['previous_close']})"
+    if intent == "change":
+        return f"{ticker} change {data['price_change']} ({data['price_change_percent']}%)"
+    return f"{ticker} 90-day high {data['high_90d']}, low {data['low_90d']}"
+
+
+ANSWERERS: Dict[str, Callable[[str, str], str]] = {"cn": _answer_cn, "us": _answer_us}
+
+
+def answer(query: str) -> Optional[str]:
+    """Answer a simple lookup directly, or return None to fall through to the agent."""
+    parsed = parse(query.strip())
+    if parsed is None:
+        return None
+    market, ticker, intent = parsed
+    started = time.perf_counter()
+    try:
+        text = ANSWERERS[market](ticker, intent)
+    except Exception as e:
+        # Let the agent deal with anything the fast path can't answer
+        print(f"Fast path skipped: {str(e)}")
+        return None
+    return f"{text}  [{(time.perf_counter() - started) * 1000:.0f} ms, no model call]"
+
+
+def main():
+    """Main function to try the router interactively."""
+    print("\n⚡ Intent Router ⚡\n")
+    while True:
+        query = input("\nQuery> ").strip()
+        if query.lower() == "exit":
+            print("\nGoodbye! 👋")
+            break
+        print(f"\n{answer(query) or 'Not a simple lookup; an agent would handle this.'}\n")
+
+
+if __name__ == "__main__":
+    main()
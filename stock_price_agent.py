@@ -5,6 +5,7 @@ Stock Price Analysis Tool
 A command-line tool that uses the Strands Agent SDK to analyze stock prices.
 """
 
+import argparse
 import datetime as dt
 from typing import Dict, Union
 
@@ -13,6 +14,10 @@ import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
+from utils import deadline, memprofile, symbols
+from utils.session import add_session_argument, session_from_args, session_turn
+
+import intent_router
 
 
 @tool
@@ -24,8 +29,8 @@ def get_stock_prices(ticker: str) -> Union[Dict, str]:
             return {"status": "error", "message": "Ticker symbol is required"}
 
         # Get stock data
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="3mo")
+        stock = yf.Ticker(symbols.yahoo_symbol(ticker))
+        data = deadline.call(lambda: stock.history(period="3mo"), "Yahoo price history")
 
         if data.empty:
             return {"status": "error", "message": f"No data found for ticker {ticker}"}
@@ -73,9 +78,16 @@ def create_initial_messages():
     ]
 
 
-def create_stock_price_agent():
-    """Create and configure the stock price analysis agent."""
-    return Agent(
+def create_stock_price_agent(session=None):
+    """Create and configure the stock price analysis agent.
+
+    With a ChatSession, tool results other than live ones are memoized for the conversation.
+    """
+    tools = [get_stock_prices, http_request, think]
+    if session is not None:
+        tools = session.wrap_tools(tools)
+
+    return memprofile.instrument(Agent(
         system_prompt="""你是一名股票价格分析专家。请按照以下步骤执行:
 
 <input>
@@ -98,14 +110,19 @@ def create_stock_price_agent():
 3. 关键指标摘要  
 </output_format>""",
         model=BedrockModel(model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0", region="us-west-2"),
-        tools=[get_stock_prices, http_request, think],
-    )
+        tools=tools,
+    ))
 
 
 def main():
     """Main function to run the stock price analysis tool."""
+    parser = argparse.ArgumentParser(description="Stock price analysis tool")
+    add_session_argument(parser)
+    args = parser.parse_args()
+    session = session_from_args(args)
+
     # Create and initialize the agent
-    stock_price_agent = create_stock_price_agent()
+    stock_price_agent = create_stock_price_agent(session)
     stock_price_agent.messages = create_initial_messages()
 
     print("\n🔎 股票价格分析工具 🔍\n")
@@ -117,6 +134,12 @@ def main():
             print("\nGoodbye! 👋")
             break
 
+        # Simple lookups are answered straight from the tools, no model call
+        fast_answer = intent_router.answer(query)
+        if fast_answer is not None:
+            print(f"\n{fast_answer}\n")
+            continue
+
         print("\nSearching...\n")
 
         try:
@@ -126,18 +149,13 @@ def main():
                 "content": [{"text": f"请分析下这个股票价格: {query}"}],
             }
 
-            # Add message to conversation
-            stock_price_agent.messages.append(user_message)
-
-            # Get response
-            response = stock_price_agent(user_message["content"][0]["text"])
+            # Get response; session_turn adds it to the history, then resets or compacts the history
+            with session_turn(stock_price_agent, session, create_initial_messages, user_message):
+                response = stock_price_agent(user_message["content"][0]["text"])
             print(f"Results: {response}\n")
 
         except Exception as e:
             print(f"Error: {str(e)}\n")
-        finally:
-            # Reset conversation after each query
-            stock_price_agent.messages = create_initial_messages()
 
 
 if __name__ == "__main__":
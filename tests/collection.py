@@ -0,0 +1,14 @@
+"""Collect the repository root as a plain directory.
+
+The root is itself a package whose __init__ imports the agents; pytest would
+import it to set up the tests below it.
+"""
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collect_directory(path, parent):
+    if path == parent.config.rootpath:
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Point the disk caches at a scratch directory before any utils module reads CACHE_DIR
+os.environ.setdefault("CN_FINANCE_CACHE_DIR", tempfile.mkdtemp(prefix="cn-finance-tests-"))
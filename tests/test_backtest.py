@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from utils import backtest, symbols
+from utils.backtest import COMMISSION, STAMP_DUTY, BarMatrix
+
+
+def make_bars(open_, close, limit: float = 0.10) -> BarMatrix:
+    """One symbol's bars; NaN marks a suspended day."""
+    open_ = np.asarray(open_, dtype=float)[:, None]
+    close = np.asarray(close, dtype=float)[:, None]
+    prev_close = np.vstack([np.full((1, 1), np.nan), backtest._carry(close)[:-1]])
+    limits = np.array([limit])
+    limit_up, limit_down = backtest._at_limits(close, prev_close, limits)
+    limit_up_open, limit_down_open = backtest._at_limits(open_, prev_close, limits)
+    days = np.arange(19000, 19000 + len(close), dtype=np.int32)
+    return BarMatrix(days, ["600000"], open_, close, limit_up, limit_up_open, limit_down, limit_down_open)
+
+
+def targets(*wanted) -> np.ndarray:
+    return np.array(wanted, dtype=bool)[:, None, None]
+
+
+@pytest.mark.parametrize("ticker, limit", [
+    ("600519", 0.10), ("000001", 0.10), ("300750", 0.20), ("688981", 0.20), ("830799", 0.30),
+])
+def test_price_limit(ticker, limit):
+    assert backtest.price_limit(symbols.classify(ticker)) == limit
+
+
+def test_limit_prices_round_to_the_fen():
+    prev = np.array([[10.05]])
+    up, down = backtest._at_limits(np.array([[11.06]]), prev, np.array([0.10]))
+    assert up[0, 0] and not down[0, 0]
+    up, _ = backtest._at_limits(np.array([[11.05]]), prev, np.array([0.10]))
+    assert not up[0, 0]
+    _, down = backtest._at_limits(np.array([[9.05]]), prev, np.array([0.10]))
+    assert down[0, 0]
+
+
+def test_round_trip_costs():
+    bars = make_bars([10] * 4, [10] * 4)
+    stats = backtest.simulate(bars, targets(True, False, False, False), execution="close")
+    assert stats["trades"][0, 0] == 2
+    expected = (1 - COMMISSION) * (1 - COMMISSION - STAMP_DUTY) - 1
+    assert stats["total_return"][0, 0] == pytest.approx(expected)
+
+
+def test_next_open_execution_holds_overnight():
+    bars = make_bars([10, 10, 11, 12], [10, 10.5, 11.5, 12])
+    stats = backtest.simulate(bars, targets(True, False, False, False), execution="open")
+    # Bought at day 1's open, sold at day 2's open: T+1 allows no earlier exit
+    expected = (1 + 10.5 / 10 - 1 - COMMISSION) * (1 + 11 / 10.5 - 1 - COMMISSION - STAMP_DUTY) - 1
+    assert stats["total_return"][0, 0] == pytest.approx(expected)
+    assert stats["exposure"][0, 0] == pytest.approx(1 / 4)
+
+
+def test_buy_at_limit_up_does_not_fill():
+    # Day 1 opens locked at +10%, day 2 opens below the limit
+    bars = make_bars([10, 11, 11.5, 12], [10, 11, 12, 12])
+    stats = backtest.simulate(bars, targets(True, True, True, True), execution="open")
+    assert stats["blocked_buys"][0, 0] == 1
+    assert stats["trades"][0, 0] == 1
+    expected = 12 / 11.5 - 1 - COMMISSION
+    assert stats["total_return"][0, 0] == pytest.approx(expected)
+
+
+def test_sell_at_limit_down_does_not_fill():
+    bars = make_bars([10, 10, 9, 8.1, 8.5], [10, 10, 9, 8.1, 8.5])
+    stats = backtest.simulate(bars, targets(True, True, False, False, False), execution="close")
+    # Days 2 and 3 close at -10%, so the exit waits until day 4
+    assert stats["blocked_sells"][0, 0] == 2
+    assert stats["trades"][0, 0] == 2
+    expected = (1 - COMMISSION) * (9 / 10) * (8.1 / 9) * (1 + 8.5 / 8.1 - 1 - COMMISSION - STAMP_DUTY) - 1
+    assert stats["total_return"][0, 0] == pytest.approx(expected)
+
+
+def test_suspended_days_do_not_trade():
+    bars = make_bars([10, np.nan, np.nan, 10.5], [10, np.nan, np.nan, 10.5])
+    stats = backtest.simulate(bars, targets(False, True, True, True), execution="close")
+    assert stats["trades"][0, 0] == 1
+    assert stats["blocked_buys"][0, 0] == 0
+    # Bought at day 3's close: no return yet beyond the commission
+    assert stats["total_return"][0, 0] == pytest.approx(-COMMISSION)
+
+
+def test_signals_cover_the_grid():
+    close = np.cumsum(np.ones((50, 2)), axis=0)
+    stacked, combos = backtest.signals(close, "ma_cross", {"fast": [5, 10], "slow": [20]})
+    assert stacked.shape == (50, 2, 2)
+    assert combos == [{"fast": 5, "slow": 20}, {"fast": 10, "slow": 20}]
+    # A rising series is long once both averages exist
+    assert stacked[19:].all() and not stacked[:19].any()
+
+
+def test_parse_grid():
+    assert backtest.parse_grid("fast=5,10；slow=60") == {"fast": [5, 10], "slow": [60]}
+    assert backtest.parse_grid("lower=20.5") == {"lower": [20.5]}
@@ -0,0 +1,113 @@
+import pytest
+
+from utils import breaker
+from utils.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(breaker.time, "time", clock)
+    monkeypatch.setattr(breaker, "STATE_PATH", str(tmp_path / "breakers.json"))
+    monkeypatch.setattr(breaker, "_breakers", {})
+    return clock
+
+
+def tripped() -> CircuitBreaker:
+    source = CircuitBreaker("test", cooldown=60, max_cooldown=200)
+    for _ in range(4):
+        source.record(False, 0.1)
+    assert source.state == OPEN
+    return source
+
+
+def test_opens_at_failure_rate(clock):
+    source = CircuitBreaker("test")
+    source.record(True, 0.1)
+    source.record(False, 0.1)
+    source.record(True, 0.1)
+    # Too few calls to judge
+    assert source.state == CLOSED
+    source.record(False, 0.1)
+    assert source.state == OPEN
+    assert not source.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    source = CircuitBreaker("test", slow_call=2.0)
+    for _ in range(4):
+        source.record(True, 3.0)
+    assert source.state == OPEN
+
+
+def test_half_open_lets_one_probe_through(clock):
+    source = tripped()
+    clock.now += 59
+    assert not source.allow()
+    clock.now += 1
+    assert source.allow()
+    assert source.state == HALF_OPEN
+    assert not source.allow()
+
+
+def test_successful_probe_closes(clock):
+    source = tripped()
+    clock.now += 60
+    assert source.allow()
+    source.record(True, 0.1)
+    assert source.state == CLOSED
+    assert source.cooldown == 60
+    assert source.allow() and source.allow()
+
+
+def test_failed_probe_doubles_cooldown_up_to_the_cap(clock):
+    source = tripped()
+    for expected in (120, 200, 200):
+        clock.now += source.cooldown
+        assert source.allow()
+        source.record(False, 0.1)
+        assert (source.state, source.cooldown) == (OPEN, expected)
+
+
+def test_truncated_failures_are_not_counted(clock):
+    source = CircuitBreaker("test")
+    for _ in range(6):
+        source.record(False, 0.1, truncated=True)
+    assert source.state == CLOSED
+    assert not source.outcomes
+    # A truncated success is still a success
+    source.record(True, 0.1, truncated=True)
+    assert list(source.outcomes) == [False]
+
+
+def test_truncated_probe_is_released(clock):
+    source = tripped()
+    clock.now += 60
+    assert source.allow()
+    source.record(False, 0.1, truncated=True)
+    assert source.state == HALF_OPEN
+    # The next call gets to probe instead
+    assert source.allow()
+
+
+def test_open_state_survives_a_restart(clock, monkeypatch):
+    source = breaker.get_breaker("persisted", cooldown=60)
+    for _ in range(4):
+        source.record(False, 0.1)
+    assert source.state == OPEN
+
+    monkeypatch.setattr(breaker, "_breakers", {})
+    resumed = breaker.get_breaker("persisted", cooldown=60)
+    assert resumed is not source
+    assert (resumed.state, resumed.opened_at) == (OPEN, source.opened_at)
+    assert not resumed.allow()
+    clock.now += 60
+    assert resumed.allow()
@@ -0,0 +1,96 @@
+import email.utils
+
+import pytest
+
+from utils import http_cache
+from utils.http_cache import HEURISTIC_MAX, HttpCache, freshness_lifetime
+
+NOW = 1_700_000_000.0
+
+
+def http_date(timestamp: float) -> str:
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+@pytest.mark.parametrize("headers, lifetime", [
+    ({"Cache-Control": "no-store, max-age=60"}, None),
+    ({"Cache-Control": "no-cache"}, 0.0),
+    ({"Cache-Control": "public, max-age=300"}, 300.0),
+    ({"Cache-Control": "max-age=300", "Age": "100"}, 200.0),
+    ({"Cache-Control": "max-age=300", "Age": "400"}, 0.0),
+    ({"Cache-Control": 'max-age="120"'}, 120.0),
+    ({"Cache-Control": "max-age=soon"}, 0.0),
+    # A malformed or negative Age is ignored
+    ({"Cache-Control": "max-age=300", "Age": "abc"}, 300.0),
+    ({"Cache-Control": "max-age=300", "Age": "-50"}, 300.0),
+    ({"Date": http_date(NOW), "Expires": http_date(NOW + 600)}, 600.0),
+    ({"Date": http_date(NOW), "Expires": http_date(NOW + 600), "Age": "junk"}, 600.0),
+    ({"Date": http_date(NOW), "Expires": "0"}, 0.0),
+    ({"Date": http_date(NOW), "Last-Modified": http_date(NOW - 1000)}, 100.0),
+    ({"Date": http_date(NOW), "Last-Modified": http_date(NOW - 10 ** 6)}, float(HEURISTIC_MAX)),
+    ({}, 0.0),
+])
+def test_freshness_lifetime(headers, lifetime):
+    assert freshness_lifetime(headers) == lifetime
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, content=b""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+        self.encoding = "utf-8"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    calls = []
+    responses = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(dict(headers or {}))
+        return responses.pop(0)
+
+    monkeypatch.setattr(http_cache.requests, "get", fake_get)
+    return calls, responses
+
+
+def test_fresh_response_is_served_locally(server, tmp_path):
+    calls, responses = server
+    cache = HttpCache(str(tmp_path))
+    responses.append(FakeResponse(200, {"Cache-Control": "max-age=600"}, b"<html>news</html>"))
+
+    first = cache.get("https://example.com/news")
+    second = cache.get("https://example.com/news")
+    assert (first.source, second.source) == ("network", "fresh")
+    assert second.text == "<html>news</html>"
+    assert len(calls) == 1
+
+
+def test_stale_response_is_revalidated(server, tmp_path):
+    calls, responses = server
+    cache = HttpCache(str(tmp_path))
+    responses.append(FakeResponse(200, {"Cache-Control": "no-cache", "ETag": '"v1"'}, b"body"))
+    responses.append(FakeResponse(304, {"Cache-Control": "max-age=600"}))
+
+    cache.get("https://example.com/news")
+    revalidated = cache.get("https://example.com/news")
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert (revalidated.source, revalidated.status_code, revalidated.content) == ("revalidated", 200, b"body")
+    # The 304's freshness headers now apply to the stored body
+    assert cache.get("https://example.com/news").source == "fresh"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("response", [
+    FakeResponse(200, {"Cache-Control": "no-store"}, b"private"),
+    FakeResponse(403, {"Cache-Control": "max-age=600"}, b"blocked"),
+])
+def test_uncacheable_responses_are_not_stored(server, tmp_path, response):
+    calls, responses = server
+    cache = HttpCache(str(tmp_path))
+    responses.extend([response, response])
+    cache.get("https://example.com/news")
+    cache.get("https://example.com/news")
+    assert len(calls) == 2
+    assert "If-None-Match" not in calls[1]
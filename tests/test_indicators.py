@@ -0,0 +1,115 @@
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from utils.indicators import EMA, RSI, SMA, IndicatorBook, IndicatorSet
+
+
+def make_bars(count: int, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    dates = pd.bdate_range("2024-01-02", periods=count).strftime("%Y-%m-%d")
+    closes, close = [], 10.0
+    for _ in range(count):
+        close = round(close * (1 + rng.uniform(-0.04, 0.04)), 2)
+        closes.append(close)
+    volumes = [rng.randint(1_000, 50_000) for _ in range(count)]
+    return pd.DataFrame({
+        "日期": dates,
+        "收盘": closes,
+        "成交量": volumes,
+        "成交额": [c * v * 100 for c, v in zip(closes, volumes)],
+    })
+
+
+def full_recompute(bars: pd.DataFrame) -> IndicatorSet:
+    indicators = IndicatorSet()
+    for row in bars.itertuples(index=False):
+        indicators.update_bar(row[0], row[1], row[2], row[3])
+    return indicators
+
+
+def assert_same(left: dict, right: dict):
+    assert left.keys() == right.keys()
+    for key, value in left.items():
+        if isinstance(value, dict):
+            assert_same(value, right[key])
+        elif isinstance(value, float):
+            assert right[key] == pytest.approx(value, rel=1e-9)
+        else:
+            assert right[key] == value
+
+
+def test_sma_matches_window_mean():
+    sma = SMA(5)
+    values = [float(v) for v in range(1, 11)]
+    for i, value in enumerate(values):
+        result = sma.update(value)
+        expected = sum(values[i - 4:i + 1]) / 5 if i >= 4 else None
+        assert result == expected
+
+
+def test_ema_seeds_with_sma():
+    ema = EMA(3)
+    assert ema.update(1.0) is None and ema.update(2.0) is None
+    assert ema.update(3.0) == 2.0
+    assert ema.update(6.0) == 2.0 + 0.5 * (6.0 - 2.0)
+
+
+def test_rsi_extremes():
+    rsi = RSI(3)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        result = rsi.update(value)
+    assert result == 100.0
+    falling = RSI(3)
+    for value in (4.0, 3.0, 2.0, 1.0):
+        result = falling.update(value)
+    assert result == 0.0
+
+
+def test_peek_matches_update():
+    bars = make_bars(80)
+    indicators = full_recompute(bars.iloc[:-1])
+    last = bars.iloc[-1]
+    peeked = indicators.snapshot(price=float(last["收盘"]))
+    indicators.update_bar(last["日期"], float(last["收盘"]), float(last["成交量"]), float(last["成交额"]))
+    updated = indicators.snapshot()
+    for key in ("ma5", "ma20", "ma60", "rsi14", "macd"):
+        if isinstance(peeked[key], dict):
+            assert_same(peeked[key], updated[key])
+        else:
+            assert peeked[key] == pytest.approx(updated[key], rel=1e-9)
+
+
+def test_sync_incrementally_matches_full_recompute(tmp_path):
+    bars = make_bars(125)
+    book = IndicatorBook(str(tmp_path))
+    for end in (30, 31, 75, 120):
+        book.sync("600519", bars.iloc[:end])
+    assert_same(full_recompute(bars.iloc[:120]).snapshot(), book.sets["600519"].snapshot())
+
+    # A new process resumes from the checkpoint
+    resumed = IndicatorBook(str(tmp_path))
+    resumed.sync("600519", bars)
+    assert_same(full_recompute(bars).snapshot(), resumed.sets["600519"].snapshot())
+
+
+def test_sync_skips_bars_after_through(tmp_path):
+    bars = make_bars(40)
+    book = IndicatorBook(str(tmp_path))
+    indicators = book.sync("000001", bars, through=bars["日期"].iloc[-2])
+    assert indicators.last_date == bars["日期"].iloc[-2]
+    assert_same(full_recompute(bars.iloc[:-1]).snapshot(), indicators.snapshot())
+
+
+def test_sync_rebuilds_after_readjustment(tmp_path):
+    bars = make_bars(70)
+    book = IndicatorBook(str(tmp_path))
+    book.sync("000001", bars.iloc[:60])
+
+    # A dividend re-adjusts every earlier qfq close
+    adjusted = bars.assign(收盘=(bars["收盘"] * 0.95).round(2))
+    indicators = book.sync("000001", adjusted)
+    assert_same(full_recompute(adjusted).snapshot(), indicators.snapshot())
+    assert not math.isclose(indicators.snapshot()["ma5"], full_recompute(bars).snapshot()["ma5"])
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import portfolio
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(11)
+    bench = rng.normal(0, 0.01, 300)
+    matrix = np.column_stack([
+        1.2 * bench + rng.normal(0, 0.005, 300),
+        0.5 * bench + rng.normal(0, 0.01, 300),
+        rng.normal(0, 0.02, 300),
+    ])
+    # The third symbol listed a hundred days in
+    matrix[:100, 2] = np.nan
+    return matrix, bench
+
+
+def test_align_carries_over_suspensions():
+    days = np.array([1, 2, 3, 4, 5])
+    aligned = portfolio.align(days, np.array([2, 4]), np.array([10.0, 11.0]))
+    np.testing.assert_array_equal(aligned, [np.nan, 10.0, 10.0, 11.0, 11.0])
+    assert np.isnan(portfolio.align(days, np.array([], dtype=int), np.array([]))).all()
+
+
+def test_pairwise_cov_matches_pandas(returns):
+    matrix, _ = returns
+    cov, corr, overlap = portfolio.pairwise_cov(matrix)
+    frame = pd.DataFrame(matrix)
+    np.testing.assert_allclose(cov, frame.cov().to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(corr, frame.corr().to_numpy(), rtol=1e-9)
+    assert overlap[0, 1] == 300 and overlap[0, 2] == 200
+
+
+def test_betas_match_least_squares(returns):
+    matrix, bench = returns
+    beta = portfolio.betas(matrix, bench)
+    for i in range(matrix.shape[1]):
+        present = ~np.isnan(matrix[:, i])
+        expected = np.polyfit(bench[present], matrix[present, i], 1)[0]
+        assert beta[i] == pytest.approx(expected, rel=1e-9)
+    assert beta[0] == pytest.approx(1.2, abs=0.1)
+
+
+def test_rolling_beta_matches_each_window(returns):
+    matrix, bench = returns
+    rolling = portfolio.rolling_beta(matrix, bench, window=60)
+    assert np.isnan(rolling[:59]).all()
+    assert np.isnan(rolling[:158, 2]).all()
+    for end in (60, 150, 300):
+        window = slice(end - 60, end)
+        expected = portfolio.betas(matrix[window, :2], bench[window])
+        np.testing.assert_allclose(rolling[end - 1, :2], expected, rtol=1e-6)
+
+
+def test_historical_var_matches_quantile(returns):
+    matrix, _ = returns
+    var, shortfall = portfolio.historical_var(matrix, 0.95)
+    cutoff = np.nanquantile(matrix, 0.05, axis=0)
+    np.testing.assert_allclose(var, -cutoff, rtol=1e-9)
+    for i in range(matrix.shape[1]):
+        column = matrix[~np.isnan(matrix[:, i]), i]
+        assert shortfall[i] == pytest.approx(-column[column <= cutoff[i]].mean(), rel=1e-9)
+    assert (shortfall >= var).all()
+
+
+def test_parametric_var_is_normal_quantile():
+    values = np.array([[-0.02], [0.0], [0.02], [0.01], [-0.01]])
+    var, shortfall = portfolio.parametric_var(values, 0.95)
+    sigma = values.std(ddof=1)
+    assert var[0] == pytest.approx(1.6448536 * sigma, rel=1e-6)
+    assert shortfall[0] > var[0]
+
+
+def test_drawdowns():
+    path, max_dd, trough = portfolio.drawdowns(np.array([[0.1], [-0.5], [0.2], [0.5]]))
+    assert max_dd[0] == pytest.approx(-0.5)
+    assert trough[0] == 1
+    assert path[-1, 0] == pytest.approx(1.1 * 0.5 * 1.2 * 1.5 / 1.1 - 1)
+
+
+def test_parse_weights():
+    assert portfolio.parse_weights("600519 000858")[1] is None
+    tickers, weights = portfolio.parse_weights("600519:0.4，000858:0.6")
+    assert tickers == ["600519", "000858"]
+    np.testing.assert_array_equal(weights, [0.4, 0.6])
+    with pytest.raises(ValueError):
+        portfolio.parse_weights("600519:0.4 000858")
+
+
+def test_analyze_summary(returns):
+    matrix, bench = returns
+    days = np.arange(19000, 19300, dtype=np.int32)
+    summary = portfolio.analyze(portfolio.ReturnMatrix(days, ["600519", "000858", "300750"], matrix, bench))
+    assert summary["period"]["days"] == 300
+    assert [s["symbol"] for s in summary["symbols"]] == ["600519", "000858", "300750"]
+    assert sum(s["weight"] for s in summary["symbols"]) == pytest.approx(1.0, abs=1e-3)
+    assert summary["correlation"]["600519"]["600519"] == 1.0
+    assert summary["portfolio"]["var"]["99%"]["historical_pct"] >= summary["portfolio"]["var"]["95%"]["historical_pct"]
+    assert summary["portfolio"]["diversification_ratio"] > 1
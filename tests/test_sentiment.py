@@ -0,0 +1,75 @@
+import pytest
+
+from utils import sentiment
+
+
+@pytest.fixture
+def backend():
+    return sentiment.LexiconBackend()
+
+
+def test_positive_and_negative_terms(backend):
+    assert backend.score("公司业绩大涨，获机构增持") > 0
+    assert backend.score("公司股价跌停，遭证监会立案") < 0
+    assert backend.score("公司召开股东大会") == 0.0
+
+
+def test_longest_term_wins(backend):
+    # 不及预期 is one negative term, not a negated 预期
+    assert backend.score("三季度业绩不及预期") == -1.0
+
+
+@pytest.mark.parametrize("text", ["业绩未达预期", "营收低于预期"])
+def test_missed_expectations_are_negative(backend, text):
+    assert backend.score(text) < 0
+
+
+def test_negated_positive_flips(backend):
+    assert backend.score("股价未上涨") == -1.0
+
+
+@pytest.mark.parametrize("text", ["无风险", "股价未下跌", "没有亏损"])
+def test_negated_negative_is_not_good_news(backend, text):
+    assert backend.score(text) == 0.0
+
+
+def test_not_negating_compounds(backend):
+    # 非常 intensifies; its 非 must not flip the term
+    assert backend.score("非常看好") == 1.0
+    assert backend.score("未来增长") == 1.0
+
+
+def test_disclaimer_boilerplate_is_ignored(backend):
+    story = "公司中标重大项目"
+    assert backend.score(f"{story}\n风险提示：市场波动风险，政策风险") == backend.score(story)
+    assert backend.score(f"{story}。投资有风险，入市需谨慎。") == backend.score(story)
+    # A line break ends the disclaimer
+    assert backend.score("风险提示：注意风险\n股价暴跌") == -1.0
+
+
+def test_english_terms_match_whole_words(backend):
+    assert backend.score("Earnings beat estimates") > 0
+    assert backend.score("A buyback was announced") == 0.0
+
+
+def test_score_articles_caches_by_content(tmp_path):
+    cache = sentiment.SentimentCache(str(tmp_path / "sentiment.sqlite"))
+    items = [{"title": "业绩大涨", "summary": ""}, {"title": "股价暴跌", "summary": ""}]
+    scored = sentiment.score_articles(items, backend="lexicon", cache=cache)
+    assert [item["sentiment"] for item in scored] == [1.0, -1.0]
+    assert "sentiment" not in items[0]
+
+    keys = [(sentiment.content_hash(item), sentiment._cache_tag("lexicon")) for item in items]
+    assert cache.get_many(keys) == {keys[0]: 1.0, keys[1]: -1.0}
+
+
+def test_aggregate_labels():
+    summary = sentiment.aggregate([
+        {"title": "a", "sentiment": 0.8},
+        {"title": "b", "sentiment": 0.4},
+        {"title": "c", "sentiment": -0.2},
+    ])
+    assert summary["label"] == "positive"
+    assert (summary["positive"], summary["negative"], summary["neutral"]) == (2, 1, 0)
+    assert summary["most_positive"] == "a" and summary["most_negative"] == "c"
+    assert sentiment.aggregate([])["label"] == "neutral"
@@ -0,0 +1,69 @@
+import pytest
+
+from utils import symbols
+from utils.common import format_stock_code, short_stock_code
+
+
+@pytest.mark.parametrize("text, code, exchange, asset", [
+    ("600519", "600519", "SH", "stock"),
+    ("sh600519", "600519", "SH", "stock"),
+    ("600519.SS", "600519", "SH", "stock"),
+    ("000001", "000001", "SZ", "stock"),
+    ("SH000001", "000001", "SH", "index"),
+    ("000001.SZ", "000001", "SZ", "stock"),
+    ("300750", "300750", "SZ", "stock"),
+    ("688981", "688981", "SH", "stock"),
+    ("510300", "510300", "SH", "etf"),
+    ("159915", "159915", "SZ", "etf"),
+    ("399006", "399006", "SZ", "index"),
+    ("830799", "830799", "BJ", "stock"),
+    ("920118", "920118", "BJ", "stock"),
+    ("沪深300", "000300", "SH", "index"),
+    ("0700.HK", "00700", "HK", "stock"),
+    ("HK2800", "02800", "HK", "etf"),
+    ("AAPL", "AAPL", "US", "stock"),
+    ("BRK.B", "BRK-B", "US", "stock"),
+    ("spy", "SPY", "US", "etf"),
+    ("^GSPC", "^GSPC", "US", "index"),
+    ("spx", "^GSPC", "US", "index"),
+])
+def test_classify(text, code, exchange, asset):
+    assert symbols.classify(text) == symbols.Symbol(code, exchange, asset)
+
+
+@pytest.mark.parametrize("text", ["SH600519.SZ", "123456", "not a ticker", ""])
+def test_classify_rejects(text):
+    with pytest.raises(ValueError):
+        symbols.classify(text)
+
+
+def test_provider_spellings():
+    moutai = symbols.classify("600519")
+    assert (moutai.prefixed, moutai.sina, moutai.yahoo) == ("SH600519", "sh600519", "600519.SS")
+    assert moutai.provider == "akshare"
+    tencent = symbols.classify("700.HK")
+    assert (tencent.prefixed, tencent.yahoo, tencent.provider) == ("00700", "0700.HK", "yfinance")
+    assert symbols.classify("830799").yahoo == "830799.BJ"
+
+
+def test_yahoo_symbol_passes_unknown_through():
+    assert symbols.yahoo_symbol("000001.SZ") == "000001.SZ"
+    assert symbols.yahoo_symbol(" ??? ") == "???"
+
+
+def test_wrong_market():
+    assert symbols.wrong_market("600519", "cn") is None
+    blocked = symbols.wrong_market("AAPL", "cn")
+    assert blocked["status"] == "error" and "Yahoo Finance" in blocked["message"]
+    assert "A-share" in symbols.wrong_market("600519", "us")["message"]
+    assert symbols.wrong_market("123456", "cn")["status"] == "error"
+
+
+def test_format_stock_code():
+    assert format_stock_code("600519") == "SH600519"
+    assert format_stock_code("sz000001") == "SZ000001"
+    assert short_stock_code("SH600519") == "600519"
+    # Non-A-share and unrecognized codes are left alone
+    assert format_stock_code("AAPL") == "AAPL"
+    assert format_stock_code("0700.HK") == "0700.HK"
+    assert short_stock_code("123456") == "123456"
@@ -0,0 +1,69 @@
+import datetime as dt
+import json
+
+import pytest
+
+from utils.trading_calendar import MARKET_TZ, TradingCalendar
+
+# Late September to mid October 2024, with the National Day holiday (Oct 1-7)
+TRADE_DATES = ["20240926", "20240927", "20240930", "20241008", "20241009", "20241010", "20241011"]
+
+
+@pytest.fixture
+def calendar(tmp_path):
+    path = tmp_path / "trade_dates.json"
+    # A far-future check date keeps the calendar from refreshing over the network
+    path.write_text(json.dumps({"dates": TRADE_DATES, "checked": "99991231"}), encoding="utf-8")
+    return TradingCalendar(str(path))
+
+
+def at(day: str, hour: int, minute: int = 0) -> dt.datetime:
+    return dt.datetime.combine(dt.date.fromisoformat(day), dt.time(hour, minute), MARKET_TZ)
+
+
+def test_holidays_and_weekends(calendar):
+    assert calendar.is_trading_day(dt.date(2024, 9, 30))
+    assert not calendar.is_trading_day(dt.date(2024, 10, 2))
+    assert not calendar.is_trading_day(dt.date(2024, 9, 28))
+    # Past the stored calendar, weekdays are assumed to trade
+    assert calendar.is_trading_day(dt.date(2024, 10, 14))
+    assert not calendar.is_trading_day(dt.date(2024, 10, 13))
+
+
+def test_previous_and_last_trading_day(calendar):
+    assert calendar.previous_trading_day(dt.date(2024, 10, 8)) == dt.date(2024, 9, 30)
+    assert calendar.last_trading_day(at("2024-10-08", 10)) == dt.date(2024, 9, 30)
+    assert calendar.last_trading_day(at("2024-10-08", 15)) == dt.date(2024, 10, 8)
+
+
+def test_is_open(calendar):
+    assert calendar.is_open(at("2024-10-08", 9, 30))
+    assert not calendar.is_open(at("2024-10-08", 12))
+    assert not calendar.is_open(at("2024-10-08", 15))
+    assert not calendar.is_open(at("2024-10-03", 10))
+
+
+def test_last_change_spans_the_holiday(calendar):
+    assert calendar.last_change(at("2024-10-05", 12)) == at("2024-09-30", 15)
+    assert calendar.last_change(at("2024-10-08", 12)) == at("2024-10-08", 11, 30)
+    assert calendar.last_change(at("2024-10-08", 10)) == at("2024-10-08", 10)
+    # The settle period extends the session past its close
+    assert calendar.last_change(at("2024-10-08", 15, 10), settle=30 * 60) == at("2024-10-08", 15, 10)
+
+
+def test_is_fresh(calendar):
+    fetched = at("2024-09-30", 16).timestamp()
+    # Nothing traded over the holiday, so the post-close fetch stays fresh
+    assert calendar.is_fresh(fetched, now=at("2024-10-07", 20))
+    assert not calendar.is_fresh(fetched, now=at("2024-10-08", 9, 20))
+
+    now = at("2024-10-08", 10)
+    assert not calendar.is_fresh(now.timestamp() - 120, now=now)
+    assert calendar.is_fresh(now.timestamp() - 30, now=now, intraday_ttl=60)
+    # A fetch before the settle period ended is stale once it has passed
+    assert not calendar.is_fresh(at("2024-10-08", 15, 5).timestamp(), now=at("2024-10-08", 16), settle=30 * 60)
+
+
+def test_last_daily(calendar):
+    assert calendar.last_daily(dt.time(17), now=at("2024-10-08", 16)) == at("2024-09-30", 17)
+    assert calendar.last_daily(dt.time(17), now=at("2024-10-08", 18)) == at("2024-10-08", 17)
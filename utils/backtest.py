@@ -0,0 +1,352 @@
+"""
+Vectorized Backtests
+
+Backtests simple long/flat signal rules on cached daily bars, for many
+symbols and a whole parameter grid at once. Signals are array operations
+over a days x symbols matrix; the simulation then steps through the days
+once with every (symbol, parameter set) pair as one element of an array.
+A-share trading rules are applied when filling orders: nothing trades on
+a suspended day, a buy at the limit-up price or a sell at the limit-down
+price does not fill, and shares bought on a day cannot be sold that day
+(T+1). Fills use forward-adjusted prices; limits are checked on raw prices.
+ST stocks are held to their board's normal limit rather than 5%.
+"""
+
+import contextvars
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import bar_store, symbols
+from .bar_cache import PRICE_COLUMNS, PRICE_DECIMALS
+
+TRADING_DAYS = 252
+
+# Commission on both sides and stamp duty on sells, as fractions of the traded value
+COMMISSION = 0.00025
+STAMP_DUTY = 0.0005
+
+
+def price_limit(listing: symbols.Symbol) -> float:
+    """Daily price limit: 20% on ChiNext and STAR, 30% on the BSE, 10% on the main boards.
+
+    The 5% limit of ST and *ST main-board stocks is not modelled: ST status
+    comes and goes over a backtest window and the bar store has no record of
+    it, so those stocks are checked against the wider board limit.
+    """
+    if listing.exchange == "BJ":
+        return 0.30
+    if listing.code.startswith(("300", "301", "688", "689")):
+        return 0.20
+    return 0.10
+
+
+@dataclass
+class BarMatrix:
+    """OHLC matrices (days x symbols) on a shared calendar; NaN where a symbol has no bar."""
+
+    days: np.ndarray  # int32 day numbers
+    symbols: List[str]
+    open: np.ndarray  # forward-adjusted
+    close: np.ndarray
+    limit_up: np.ndarray  # bool: the price is at the limit-up price
+    limit_up_open: np.ndarray
+    limit_down: np.ndarray
+    limit_down_open: np.ndarray
+
+    @property
+    def tradable(self) -> np.ndarray:
+        return ~np.isnan(self.close)
+
+
+def _at_limits(raw: np.ndarray, prev_close: np.ndarray, limit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Limit prices are rounded to the fen; half a fen absorbs float error
+    with np.errstate(invalid="ignore"):
+        up = raw >= np.round(prev_close * (1 + limit), 2) - 0.005
+        down = raw <= np.round(prev_close * (1 - limit), 2) + 0.005
+    return up, down
+
+
+def load_bars(
+    tickers: Sequence[str],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    store: Optional[bar_store.BarStore] = None,
+) -> BarMatrix:
+    """Bars for the tickers from the bar store, on the union of their trading days."""
+    store = store or bar_store.get_store()
+    listings = [symbols.classify(t) for t in tickers]
+    packed = [store.packed(t) for t in tickers]
+    rows = [p.window(start_date, end_date) for p in packed]
+    days = np.unique(np.concatenate([np.asarray(p.dates[r]) for p, r in zip(packed, rows)]))
+    shape = (len(days), len(tickers))
+    raw_open, raw_close, factor = np.full(shape, np.nan), np.full(shape, np.nan), np.ones(shape)
+    open_idx, close_idx = PRICE_COLUMNS.index("开盘"), PRICE_COLUMNS.index("收盘")
+    for i, (ticker, p, r) in enumerate(zip(tickers, packed, rows)):
+        symbol_days = np.asarray(p.dates[r])
+        at = np.searchsorted(days, symbol_days)
+        # Zero-volume bars are suspensions some sources still report
+        traded = np.asarray(p.volume[r]) > 0
+        raw_open[at[traded], i] = p.prices[r][traded, open_idx].astype(np.float64).round(PRICE_DECIMALS)
+        raw_close[at[traded], i] = p.prices[r][traded, close_idx].astype(np.float64).round(PRICE_DECIMALS)
+        if bar_store.has_factors(ticker) and len(symbol_days):
+            qfq = bar_store.factors_on(symbol_days.astype("datetime64[D]"), store.factors(ticker), "qfq")
+            factor[at, i] = qfq
+
+    # Previous close is the last traded close, across suspensions
+    prev_close = np.vstack([np.full((1, shape[1]), np.nan), _carry(raw_close)[:-1]])
+    limit = np.array([price_limit(listing) for listing in listings])
+    limit_up, limit_down = _at_limits(raw_close, prev_close, limit)
+    limit_up_open, limit_down_open = _at_limits(raw_open, prev_close, limit)
+    return BarMatrix(
+        days, [listing.code for listing in listings], raw_open / factor, raw_close / factor,
+        limit_up, limit_up_open, limit_down, limit_down_open,
+    )
+
+
+# Moving averages already computed during the current signals() call, which
+# sets a dict of its own; grid combinations share most of their windows.
+# (id(values), window) -> (values, average): holding the input keeps its id
+# from being reused by another array while the call runs.
+_averages: "contextvars.ContextVar[Optional[Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]]]" = contextvars.ContextVar(
+    "moving_averages", default=None
+)
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean along axis 0 from a cumulative sum; NaN until a full window."""
+    cache = _averages.get()
+    key = (id(values), window)
+    if cache is not None and key in cache and cache[key][0] is values:
+        return cache[key][1]
+    total = np.cumsum(np.vstack([np.zeros((1,) + values.shape[1:]), values]), axis=0)
+    result = np.full(values.shape, np.nan)
+    result[window - 1:] = (total[window:] - total[:-window]) / window
+    if cache is not None:
+        cache[key] = (values, result)
+    return result
+
+
+def _carry(close: np.ndarray) -> np.ndarray:
+    """Close with suspensions filled by the last close, so rules run over calendar gaps."""
+    idx = np.where(~np.isnan(close), np.arange(len(close))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return close[idx, np.arange(close.shape[1])]
+
+
+def ma_cross(close: np.ndarray, fast: int = 20, slow: int = 60) -> np.ndarray:
+    """Long while the fast moving average is above the slow one."""
+    if fast >= slow:
+        return np.zeros(close.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        return moving_average(close, fast) > moving_average(close, slow)
+
+
+def momentum(close: np.ndarray, lookback: int = 20) -> np.ndarray:
+    """Long while the close is above the close `lookback` days earlier."""
+    signal = np.zeros(close.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        signal[lookback:] = close[lookback:] > close[:-lookback]
+    return signal
+
+
+def rsi_reversion(close: np.ndarray, period: int = 14, lower: float = 30, upper: float = 70) -> np.ndarray:
+    """Enter when RSI drops below `lower`, exit when it rises above `upper`."""
+    change = np.diff(close, axis=0, prepend=np.nan)
+    gain, loss = np.clip(np.nan_to_num(change), 0, None), np.clip(-np.nan_to_num(change), 0, None)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100 - 100 / (1 + moving_average(gain, period) / moving_average(loss, period))
+    # Hold the last entry/exit event: forward-fill the index of the latest event
+    event = np.where(rsi < lower, 1, np.where(rsi > upper, 0, -1))
+    idx = np.where(event >= 0, np.arange(len(event))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    held = event[idx, np.arange(event.shape[1])]
+    return held == 1
+
+
+# Signal rules: name -> (function(close, **params) -> bool target position, default parameter grid).
+# Rules get closes with suspended days filled by the last close.
+_RULES: Dict[str, Tuple[Callable[..., np.ndarray], Dict[str, List]]] = {
+    "ma_cross": (ma_cross, {"fast": [5, 10, 20], "slow": [30, 60, 120]}),
+    "momentum": (momentum, {"lookback": [10, 20, 60, 120]}),
+    "rsi": (rsi_reversion, {"period": [14], "lower": [20, 30], "upper": [60, 70]}),
+}
+
+
+def register_rule(name: str, rule: Callable[..., np.ndarray], grid: Dict[str, List]):
+    """Add a signal rule; it maps a (carried) close matrix to a boolean long/flat matrix of the same shape."""
+    _RULES[name] = (rule, grid)
+
+
+def rule_names() -> List[str]:
+    return sorted(_RULES)
+
+
+def parse_grid(text: str) -> Dict[str, List]:
+    """'fast=5,10;slow=60' -> {'fast': [5, 10], 'slow': [60]}."""
+    grid = {}
+    for part in text.replace("；", ";").split(";"):
+        if not part.strip():
+            continue
+        name, _, values = part.partition("=")
+        grid[name.strip()] = [float(v) if "." in v else int(v) for v in values.replace("，", ",").split(",") if v.strip()]
+    return grid
+
+
+def signals(close: np.ndarray, rule: str, grid: Optional[Dict[str, List]] = None) -> Tuple[np.ndarray, List[Dict]]:
+    """Target positions (days x symbols x combinations) for every combination in the grid."""
+    function, defaults = _RULES[rule]
+    grid = {**defaults, **(grid or {})}
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    carried = _carry(close)
+    token = _averages.set({})
+    try:
+        return np.stack([function(carried, **combo) for combo in combos], axis=2), combos
+    finally:
+        _averages.reset(token)
+
+
+def simulate(bars: BarMatrix, targets: np.ndarray, execution: str = "open", slippage: float = 0.0) -> Dict[str, np.ndarray]:
+    """Statistics per (symbol, combination) for target positions of shape (days, symbols, combinations).
+
+    With execution "open", the signal at a close is traded at the next
+    day's open; with "close" it is traded at that same close. Statistics
+    are accumulated day by day, so memory does not grow with the length of
+    the backtest.
+    """
+    days, count, combos = targets.shape
+    close, tradable = bars.close[:, :, None], bars.tradable[:, :, None]
+    if execution == "open":
+        price, blocked_up, blocked_down = bars.open[:, :, None], bars.limit_up_open[:, :, None], bars.limit_down_open[:, :, None]
+    else:
+        price, blocked_up, blocked_down = close, bars.limit_up[:, :, None], bars.limit_down[:, :, None]
+
+    buy_cost, sell_cost = COMMISSION + slippage, COMMISSION + STAMP_DUTY + slippage
+    shape = (count, combos)
+    position = np.zeros(shape, dtype=bool)
+    bought_on = np.full(shape, -1)
+    last_close = np.full((count, 1), np.nan)
+    wealth, peak, max_drawdown = np.ones(shape), np.ones(shape), np.zeros(shape)
+    total, total_sq = np.zeros(shape), np.zeros(shape)
+    trades, blocked_buys, blocked_sells, held_days = (np.zeros(shape, dtype=np.int64) for _ in range(4))
+
+    for t in range(days):
+        # With next-open execution, yesterday's signal is what gets traded today
+        if execution == "open":
+            want = targets[t - 1] if t else np.zeros(shape, dtype=bool)
+        else:
+            want = targets[t]
+        can_trade = tradable[t]
+        buy_wanted = want & ~position
+        # T+1: a position can only be sold from the day after it was bought
+        sell_wanted = ~want & position & (bought_on < t)
+        buy = buy_wanted & can_trade & ~blocked_up[t]
+        sell = sell_wanted & can_trade & ~blocked_down[t]
+        blocked_buys += buy_wanted & can_trade & blocked_up[t]
+        blocked_sells += sell_wanted & can_trade & blocked_down[t]
+
+        c, p = close[t], price[t]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            held = position & ~sell & can_trade
+            day = np.where(held, c / last_close - 1, 0.0)
+            day = np.where(buy, c / p - 1 - buy_cost, day)
+            day = np.where(sell, p / last_close - 1 - sell_cost, day)
+        day = np.nan_to_num(day)
+
+        wealth *= 1 + day
+        np.maximum(peak, wealth, out=peak)
+        np.minimum(max_drawdown, wealth / peak - 1, out=max_drawdown)
+        total += day
+        total_sq += day * day
+
+        position = (position | buy) & ~sell
+        bought_on = np.where(buy, t, bought_on)
+        trades += buy + sell
+        held_days += position
+        last_close = np.where(can_trade, c, last_close)
+
+    mean = total / days
+    std = np.sqrt(np.clip(total_sq / days - mean * mean, 0, None) * days / max(days - 1, 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), np.nan)
+    return {
+        "total_return": wealth - 1,
+        "annual_return": wealth ** (TRADING_DAYS / days) - 1,
+        "sharpe": sharpe,
+        "max_drawdown": max_drawdown,
+        "trades": trades,
+        "blocked_buys": blocked_buys,
+        "blocked_sells": blocked_sells,
+        "exposure": held_days / days,
+    }
+
+
+def buy_and_hold(bars: BarMatrix) -> np.ndarray:
+    """Total return from the first to the last close per symbol."""
+    carried = _carry(bars.close)
+    first = np.argmax(~np.isnan(bars.close), axis=0)
+    return carried[-1] / carried[first, np.arange(carried.shape[1])] - 1
+
+
+def run(
+    bars: BarMatrix,
+    rule: str = "ma_cross",
+    grid: Optional[Dict[str, List]] = None,
+    execution: str = "open",
+    top: int = 10,
+) -> Dict:
+    """Backtest a rule over its parameter grid and summarize it for an agent."""
+    targets, combos = signals(bars.close, rule, grid)
+    stats = simulate(bars, targets, execution)
+    hold = buy_and_hold(bars)
+
+    def pct(value) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value) * 100, 2)
+
+    def num(value) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 3)
+
+    # Combinations ranked by their median Sharpe ratio across the symbols
+    with np.errstate(invalid="ignore"):
+        median_sharpe = np.nanmedian(np.where(np.isnan(stats["sharpe"]), -np.inf, stats["sharpe"]), axis=0)
+    ranked = np.argsort(-median_sharpe)[:top]
+    summary = {
+        "rule": rule,
+        "execution": execution,
+        "period": {"start": str(bars.days[0].astype("datetime64[D]")), "end": str(bars.days[-1].astype("datetime64[D]")), "days": len(bars.days)},
+        "symbols": len(bars.symbols),
+        "combinations": len(combos),
+        "buy_and_hold_median_pct": pct(np.nanmedian(hold)),
+        "best": [
+            {
+                "params": combos[k],
+                "median_total_return_pct": pct(np.median(stats["total_return"][:, k])),
+                "median_annual_return_pct": pct(np.median(stats["annual_return"][:, k])),
+                "median_sharpe": num(np.nanmedian(stats["sharpe"][:, k])) if not np.isnan(stats["sharpe"][:, k]).all() else None,
+                "median_max_drawdown_pct": pct(np.median(stats["max_drawdown"][:, k])),
+                "beat_buy_and_hold": int((stats["total_return"][:, k] > hold).sum()),
+                "trades": int(stats["trades"][:, k].sum()),
+                "blocked_by_limits": int(stats["blocked_buys"][:, k].sum() + stats["blocked_sells"][:, k].sum()),
+            }
+            for k in ranked
+        ],
+    }
+    if len(bars.symbols) <= 10:
+        best = ranked[0]
+        summary["per_symbol"] = [
+            {
+                "symbol": code,
+                "params": combos[best],
+                "total_return_pct": pct(stats["total_return"][i, best]),
+                "buy_and_hold_pct": pct(hold[i]),
+                "sharpe": num(stats["sharpe"][i, best]),
+                "max_drawdown_pct": pct(stats["max_drawdown"][i, best]),
+                "trades": int(stats["trades"][i, best]),
+                "exposure_pct": pct(stats["exposure"][i, best]),
+            }
+            for i, code in enumerate(bars.symbols)
+        ]
+    return summary
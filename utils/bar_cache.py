@@ -0,0 +1,205 @@
+"""
+In-Memory Bar Cache
+
+Recent daily bars for many symbols held as packed typed arrays instead of
+DataFrames: dates as int32 day numbers, prices and percentages as float32,
+volume as int64. That is a fraction of a DataFrame with object dates and
+Chinese column labels, so a whole universe fits in memory. Entries are
+evicted least-recently-used once their total size passes a byte budget, and
+a DataFrame is only built, for the requested date range, when a caller
+needs one.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+# Byte budget for the process-wide cache
+DEFAULT_BUDGET_MB = float(os.environ.get("CN_FINANCE_BAR_CACHE_MB", "256"))
+
+PRICE_COLUMNS = ("开盘", "收盘", "最高", "最低", "涨跌额")
+PERCENT_COLUMNS = ("振幅", "涨跌幅", "换手率")
+
+# Decimals restored on unpacking; float32 keeps about 7 significant digits,
+# more than the 2-3 decimals the sources quote prices in
+PRICE_DECIMALS = 3
+PERCENT_DECIMALS = 2
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def day_number(date) -> int:
+    """Days since 1970-01-01 for a date, Timestamp or YYYY-MM-DD string."""
+    return int((np.datetime64(pd.Timestamp(date).date(), "D") - _EPOCH).astype(np.int32))
+
+
+class PackedBars:
+    """One symbol's bars as column arrays, in the column order they arrived in."""
+
+    __slots__ = ("code", "columns", "dates", "prices", "percents", "volume", "amount", "fetched_at")
+
+    def __init__(self, bars: pd.DataFrame, fetched_at: float):
+        self.columns: Tuple[str, ...] = tuple(bars.columns)
+        self.code: Optional[str] = str(bars["股票代码"].iloc[0]) if "股票代码" in bars and len(bars) else None
+        if bars.empty:
+            # Delisted or new codes and provider outages come back as empty frames, often without columns;
+            # packed as zero rows, they unpack to an empty frame the tools report as no data
+            self.dates = np.empty(0, dtype=np.int32)
+            self.volume = np.empty(0, dtype=np.int64)
+        else:
+            dates = pd.to_datetime(bars["日期"]).to_numpy(dtype="datetime64[D]")
+            self.dates = (dates - _EPOCH).astype(np.int32)
+            self.volume = np.nan_to_num(bars["成交量"].to_numpy(dtype=float)).round().astype(np.int64)
+        self.prices = self._block(bars, PRICE_COLUMNS)
+        self.percents = self._block(bars, PERCENT_COLUMNS)
+        # Turnover in yuan runs to 1e10 and above, past float32's precision
+        self.amount = bars["成交额"].to_numpy(dtype=np.float64) if "成交额" in bars else None
+        self.fetched_at = fetched_at
+
+    # Record layout used for the cross-process shared cache
+    RECORD_DTYPE = np.dtype([
+        ("date", np.int32),
+        ("prices", np.float32, (len(PRICE_COLUMNS),)),
+        ("percents", np.float32, (len(PERCENT_COLUMNS),)),
+        ("volume", np.int64),
+        ("amount", np.float64),
+    ])
+
+    def to_records(self) -> Tuple[np.ndarray, Dict]:
+        """(record array, meta) for utils.shared_cache."""
+        records = np.empty(len(self), dtype=self.RECORD_DTYPE)
+        records["date"], records["prices"], records["percents"], records["volume"] = (
+            self.dates, self.prices, self.percents, self.volume
+        )
+        records["amount"] = self.amount if self.amount is not None else np.nan
+        return records, {"code": self.code, "columns": list(self.columns)}
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, meta: Dict, fetched_at: float) -> "PackedBars":
+        """Bars whose columns are views into records, e.g. a read-only shared mapping; nothing is copied."""
+        packed = cls.__new__(cls)
+        packed.code, packed.columns, packed.fetched_at = meta["code"], tuple(meta["columns"]), fetched_at
+        packed.dates, packed.prices, packed.percents, packed.volume = (
+            records["date"], records["prices"], records["percents"], records["volume"]
+        )
+        packed.amount = records["amount"] if "成交额" in packed.columns else None
+        return packed
+
+    @staticmethod
+    def _block(bars: pd.DataFrame, columns) -> np.ndarray:
+        block = np.full((len(bars), len(columns)), np.nan, dtype=np.float32)
+        for i, column in enumerate(columns):
+            if column in bars:
+                block[:, i] = bars[column].to_numpy(dtype=float)
+        return block
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.dates, self.prices, self.percents, self.volume, self.amount)
+        return sum(a.nbytes for a in arrays if a is not None) + 64 * len(self.columns)
+
+    @property
+    def last_date(self) -> Optional[str]:
+        return str(_EPOCH + int(self.dates[-1])) if len(self) else None
+
+    def window(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> slice:
+        """Row slice between YYYY-MM-DD dates (inclusive); dates are sorted, so this is a binary search."""
+        lo = np.searchsorted(self.dates, day_number(start_date), side="left") if start_date else 0
+        hi = np.searchsorted(self.dates, day_number(end_date), side="right") if end_date else len(self)
+        return slice(int(lo), int(hi))
+
+    def to_frame(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """The bars in their original layout (datetime.date dates), built only for the requested rows."""
+        rows = self.window(start_date, end_date)
+        dates = (_EPOCH + self.dates[rows]).astype("datetime64[D]").astype(object)
+        data: Dict[str, object] = {"日期": dates, "成交量": self.volume[rows]}
+        if self.code is not None:
+            data["股票代码"] = self.code
+        if self.amount is not None:
+            data["成交额"] = self.amount[rows]
+        for block, columns, decimals in (
+            (self.prices, PRICE_COLUMNS, PRICE_DECIMALS),
+            (self.percents, PERCENT_COLUMNS, PERCENT_DECIMALS),
+        ):
+            values = block[rows].astype(np.float64).round(decimals)
+            for i, column in enumerate(columns):
+                data[column] = values[:, i]
+        return pd.DataFrame(data, columns=[c for c in self.columns if c in data])
+
+
+class BarCache:
+    """Symbol -> PackedBars, least-recently-used first out once past `max_bytes`."""
+
+    def __init__(self, max_bytes: int = int(DEFAULT_BUDGET_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries: "OrderedDict[str, PackedBars]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[PackedBars]:
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return packed
+
+    def put(self, key: str, bars: pd.DataFrame, fetched_at: float) -> PackedBars:
+        """Pack and store a symbol's bars."""
+        return self.put_packed(key, PackedBars(bars, fetched_at))
+
+    def put_packed(self, key: str, packed: PackedBars) -> PackedBars:
+        """Store packed bars, evicting the least recently used symbols to stay in budget."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            # A single symbol larger than the whole budget is returned but not kept
+            if packed.nbytes <= self.max_bytes:
+                self._entries[key] = packed
+                self.nbytes += packed.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+        return packed
+
+    def discard(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "symbols": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+
+
+def get_cache() -> BarCache:
+    global _cache
+    if _cache is None:
+        _cache = BarCache()
+        metrics.gauge("bar_cache", _cache.stats)
+    return _cache
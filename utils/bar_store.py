@@ -0,0 +1,269 @@
+"""
+Daily Bar Store
+
+Keeps unadjusted daily bars plus a per-symbol adjustment factor table, and
+derives forward (qfq) or backward (hfq) adjusted prices on read. A dividend
+or split only changes the small factor table, so stored bars are never
+refetched; updates just append the bars since the last stored date.
+"""
+
+import datetime as dt
+from typing import Dict, Optional, Tuple
+
+import akshare as ak
+import numpy as np
+import pandas as pd
+
+from . import bar_cache, deadline, hedging, symbols
+from .bar_cache import PackedBars
+from .cache import DiskCache
+from .datasources import FRESHNESS
+from .ratelimit import get_limiter
+from .shared_cache import SharedCache
+
+PRICE_COLUMNS = ["开盘", "收盘", "最高", "最低"]
+
+# First date requested when a symbol has no stored bars yet
+HISTORY_START = "19900101"
+
+
+# stock_zh_a_hist's column layout, which every bar source is converted to
+BAR_COLUMNS = ["日期", "股票代码", "开盘", "收盘", "最高", "最低", "成交量", "成交额", "振幅", "涨跌幅", "涨跌额", "换手率"]
+
+
+def fill_changes(bars: pd.DataFrame) -> pd.DataFrame:
+    """Fill 涨跌额, 涨跌幅 and 振幅 where a source left them out, from the previous close."""
+    prev_close = bars["收盘"].shift()
+    derived = {
+        "涨跌额": bars["收盘"] - prev_close,
+        "涨跌幅": (bars["收盘"] - prev_close) / prev_close * 100,
+        "振幅": (bars["最高"] - bars["最低"]) / prev_close * 100,
+    }
+    for column, values in derived.items():
+        bars[column] = bars[column].fillna(values.round(2))
+    return bars
+
+
+def to_em_layout(frame: pd.DataFrame, code: str, volume_lots, amount=np.nan, turnover=np.nan) -> pd.DataFrame:
+    """Sina/Tencent bars (English columns) in Eastmoney's layout; volume in lots, turnover in percent."""
+    bars = pd.DataFrame({
+        "日期": pd.to_datetime(frame["date"]).dt.date,
+        "股票代码": code,
+        "开盘": frame["open"].astype(float),
+        "收盘": frame["close"].astype(float),
+        "最高": frame["high"].astype(float),
+        "最低": frame["low"].astype(float),
+        "成交量": volume_lots.round().astype("int64"),
+        "成交额": amount,
+        "振幅": np.nan,
+        "涨跌幅": np.nan,
+        "涨跌额": np.nan,
+        "换手率": turnover,
+    })
+    return fill_changes(bars.reset_index(drop=True))[BAR_COLUMNS]
+
+
+def _em_bars(listing: symbols.Symbol, start_date: str, end_date: str) -> pd.DataFrame:
+    return ak.stock_zh_a_hist(symbol=listing.code, period="daily", start_date=start_date, end_date=end_date, adjust="")
+
+
+def _sina_bars(listing: symbols.Symbol, start_date: str, end_date: str) -> pd.DataFrame:
+    frame = ak.stock_zh_a_daily(symbol=listing.sina, start_date=start_date, end_date=end_date, adjust="")
+    # Sina reports volume in shares and turnover as a ratio
+    return to_em_layout(
+        frame, listing.code, frame["volume"].astype(float) / 100, frame["amount"].astype(float), frame["turnover"].astype(float) * 100
+    )
+
+
+def _tencent_bars(listing: symbols.Symbol, start_date: str, end_date: str) -> pd.DataFrame:
+    frame = ak.stock_zh_a_hist_tx(symbol=listing.sina, start_date=start_date, end_date=end_date, adjust="")
+    # Tencent's "amount" column is the volume in lots; it has no turnover value
+    return to_em_layout(frame, listing.code, frame["amount"].astype(float))
+
+
+# Eastmoney first; Sina and Tencent serve the same unadjusted bars as hedges
+STOCK_BAR_SOURCES = [
+    hedging.Source("eastmoney_hist", "eastmoney", _em_bars),
+    hedging.Source("sina_daily", "sina", _sina_bars),
+    hedging.Source("tencent_hist", "tencent", _tencent_bars),
+]
+
+
+def fetch_raw_bars(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """Unadjusted daily bars in stock_zh_a_hist's layout, for stocks, ETFs and indices."""
+    listing = symbols.classify(symbol)
+    if listing.asset == "stock":
+        return hedging.hedged_call(STOCK_BAR_SOURCES, listing, start_date, end_date)
+    with get_limiter("eastmoney"):
+        if listing.asset == "index":
+            return ak.index_zh_a_hist(symbol=listing.code, period="daily", start_date=start_date, end_date=end_date)
+        return ak.fund_etf_hist_em(symbol=listing.code, period="daily", start_date=start_date, end_date=end_date, adjust="")
+
+
+def fetch_factors(symbol: str) -> pd.DataFrame:
+    """Sina qfq/hfq factor tables merged on their effective dates."""
+    sina_symbol = symbols.classify(symbol).sina
+    with get_limiter("sina"):
+        qfq = ak.stock_zh_a_daily(symbol=sina_symbol, adjust="qfq-factor")
+    with get_limiter("sina"):
+        hfq = ak.stock_zh_a_daily(symbol=sina_symbol, adjust="hfq-factor")
+    factors = pd.merge(qfq, hfq, on="date", how="outer")
+    factors["date"] = pd.to_datetime(factors["date"])
+    factors = factors.sort_values("date").ffill().bfill().reset_index(drop=True)
+    return factors.astype({"qfq_factor": float, "hfq_factor": float})
+
+
+def factors_on(bar_dates: np.ndarray, factors: pd.DataFrame, adjust: str) -> np.ndarray:
+    """The qfq or hfq factor in effect on each date (datetime64 array)."""
+    factor_dates = factors["date"].to_numpy()
+    values = factors[f"{adjust}_factor"].to_numpy()
+    idx = np.clip(np.searchsorted(factor_dates, bar_dates.astype(factor_dates.dtype), side="right") - 1, 0, len(values) - 1)
+    return values[idx]
+
+
+def apply_factors(raw: pd.DataFrame, factors: pd.DataFrame, adjust: str) -> pd.DataFrame:
+    """Vectorized qfq/hfq view of raw bars; each bar uses the latest factor in effect on its date."""
+    if adjust not in ("qfq", "hfq"):
+        return raw.copy()
+
+    factor = factors_on(pd.to_datetime(raw["日期"]).to_numpy(), factors, adjust)
+
+    adjusted = raw.copy()
+    prices = raw[PRICE_COLUMNS].to_numpy(dtype=float)
+    prices = prices / factor[:, None] if adjust == "qfq" else prices * factor[:, None]
+    adjusted[PRICE_COLUMNS] = prices.round(4)
+    if "涨跌额" in adjusted:
+        change = np.diff(adjusted["收盘"].to_numpy(), prepend=np.nan)
+        change[0] = adjusted["涨跌额"].iloc[0] * factor[0] if adjust == "hfq" else adjusted["涨跌额"].iloc[0] / factor[0]
+        adjusted["涨跌额"] = change.round(4)
+    return adjusted
+
+
+def store_key(symbol: str) -> str:
+    """Stocks are stored under the bare code; ETFs and indices under the prefixed one (SH000001 is not 000001)."""
+    listing = symbols.classify(symbol)
+    return listing.code if listing.asset == "stock" else listing.prefixed
+
+
+def has_factors(symbol: str) -> bool:
+    """Only stocks have dividend and split factors; ETF and index bars are used as they come."""
+    return symbols.classify(symbol).asset == "stock"
+
+
+class BarStore:
+    """Raw bars and adjustment factors per symbol on top of the disk cache."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.raw_cache = DiskCache("bars_raw", root)
+        self.factor_cache = DiskCache("bars_factors", root)
+        # The process-wide cache is for the default store; other roots get their own
+        self.memory = bar_cache.get_cache() if root is None else bar_cache.BarCache()
+        self.shared = SharedCache("bars", root)
+        # store key -> (factor table, fetched_at)
+        self._factors: Dict[str, Tuple[pd.DataFrame, float]] = {}
+
+    def update_raw(self, symbol: str, refresh: bool = False) -> pd.DataFrame:
+        """Append bars since the last stored date when the market has traded since the last update."""
+        return self.packed(symbol, refresh).to_frame()
+
+    def packed(self, symbol: str, refresh: bool = False) -> PackedBars:
+        """Up-to-date raw bars from the in-memory cache, falling back to the shared mapping, the disk store and providers."""
+        key = store_key(symbol)
+        packed = self.memory.get(key)
+        if packed is not None and not refresh and FRESHNESS["hist"](packed.fetched_at):
+            return packed
+
+        def fill():
+            bars, fetched_at = self._update_disk(symbol, refresh)
+            return (*PackedBars(bars, fetched_at).to_records(), fetched_at)
+
+        # Workers on one host map the same file; only one of them updates a stale symbol
+        records, meta, fetched_at = self.shared.cached(key, fill, refresh=refresh, is_fresh=FRESHNESS["hist"])
+        return self.memory.put_packed(key, PackedBars.from_records(records, meta, fetched_at))
+
+    def _update_disk(self, symbol: str, refresh: bool) -> Tuple[pd.DataFrame, float]:
+        key = store_key(symbol)
+        entry = self.raw_cache.get(key)
+        if entry is not None and not refresh and FRESHNESS["hist"](entry[1]):
+            return entry
+
+        started = dt.datetime.now().timestamp()
+        end_date = dt.datetime.now().strftime("%Y%m%d")
+        if entry is None or entry[0].empty:
+            bars = deadline.call(lambda: fetch_raw_bars(symbol, HISTORY_START, end_date), f"fetching bars for {symbol}")
+        else:
+            stored = entry[0]
+            # Refetch the last stored day too, it may have been an in-progress bar
+            last_date = pd.to_datetime(stored["日期"].iloc[-1]).strftime("%Y%m%d")
+            try:
+                recent = deadline.call(lambda: fetch_raw_bars(symbol, last_date, end_date), f"fetching bars for {symbol}")
+            except deadline.DeadlineExceeded:
+                print(f"Deadline reached, using stored bars for {symbol} through {last_date}")
+                return entry
+            bars = pd.concat([stored, recent], ignore_index=True)
+            bars = bars.drop_duplicates(subset="日期", keep="last").reset_index(drop=True)
+            # Backup sources can't compute the first fetched bar's change on their own
+            bars = fill_changes(bars)
+
+        self.raw_cache.put(key, bars, fetched_at=started)
+        return bars, started
+
+    def factors(self, symbol: str, refresh: bool = False) -> pd.DataFrame:
+        """Factor table, refetched once per trading day before the open to pick up ex-dates."""
+        key = store_key(symbol)
+        memo = self._factors.get(key)
+        if memo is not None and not refresh and FRESHNESS["adjust_factors"](memo[1]):
+            return memo[0]
+        factors = self.factor_cache.cached(
+            key, lambda: fetch_factors(symbol), refresh=refresh, is_fresh=FRESHNESS["adjust_factors"]
+        )
+        # Kept in memory too: basket tools read hundreds of factor tables per call
+        entry = self.factor_cache.get(key)
+        self._factors[key] = (factors, entry[1] if entry else 0.0)
+        return factors
+
+    def update(self, symbol: str, refresh: bool = False):
+        """Bring both the raw bars and the factor table up to date."""
+        factors = self.factors(symbol, refresh) if has_factors(symbol) else None
+        return self.update_raw(symbol, refresh), factors
+
+    def load(
+        self,
+        symbol: str,
+        adjust: str = "qfq",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Daily bars between YYYY-MM-DD dates, adjusted on read."""
+        # Only the requested date range is unpacked into a DataFrame
+        raw = self.packed(symbol).to_frame(start_date, end_date)
+        if adjust in ("qfq", "hfq") and not raw.empty and has_factors(symbol):
+            return apply_factors(raw, self.factors(symbol), adjust)
+        return raw
+
+    def closes(
+        self,
+        symbol: str,
+        adjust: str = "qfq",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(day numbers, adjusted closes) straight from the packed arrays, without building a DataFrame."""
+        packed = self.packed(symbol)
+        rows = packed.window(start_date, end_date)
+        days = np.asarray(packed.dates[rows])
+        closes = packed.prices[rows, bar_cache.PRICE_COLUMNS.index("收盘")].astype(np.float64)
+        if adjust in ("qfq", "hfq") and len(days) and has_factors(symbol):
+            factor = factors_on(days.astype("datetime64[D]"), self.factors(symbol), adjust)
+            closes = closes / factor if adjust == "qfq" else closes * factor
+        return days, closes
+
+
+_store = None
+
+
+def get_store() -> BarStore:
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
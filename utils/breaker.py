@@ -0,0 +1,142 @@
+"""
+Circuit Breakers
+
+Per-source breakers for the flaky scraped news sources. A source that keeps
+failing or answering slowly is opened and skipped instantly; after a
+cooldown a single probe request is let through (half-open) and its outcome
+closes the breaker again or reopens it for a longer cooldown. Breaker state
+is persisted so a fresh process doesn't rediscover a dead source, and is
+exposed as a gauge in utils.metrics.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from . import metrics
+from .cache import CACHE_DIR, atomic_write_bytes
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+STATE_PATH = os.path.join(CACHE_DIR, "breakers.json")
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over the outcomes of the last `window` calls."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 10,
+        min_calls: int = 4,
+        failure_rate: float = 0.5,
+        slow_call: float = 5.0,
+        cooldown: float = 300.0,
+        max_cooldown: float = 3600.0,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; an open breaker lets one probe through after its cooldown."""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            allowed = self.state == CLOSED
+        if not allowed:
+            metrics.incr(f"breaker.{self.name}.rejected")
+        return allowed
+
+    def record(self, ok: bool, seconds: float, truncated: bool = False):
+        """Count a call; slow calls count as failures.
+
+        truncated marks a call whose timeout was cut short by the request
+        deadline. Its failure says nothing about the source, so it is not
+        counted, though a probe it carried is released for the next call.
+        """
+        failed = not ok or seconds >= self.slow_call
+        if failed and truncated:
+            metrics.incr(f"breaker.{self.name}.truncated")
+            with self._lock:
+                self.probing = False
+            return
+        metrics.observe(f"breaker.{self.name}.latency", seconds)
+        metrics.incr(f"breaker.{self.name}.{'failures' if failed else 'successes'}")
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if failed:
+                    # A failed probe doubles the cooldown
+                    self._open(min(self.max_cooldown, self.cooldown * 2))
+                else:
+                    self.state, self.cooldown = CLOSED, self.base_cooldown
+                    self.outcomes.clear()
+                changed = True
+            else:
+                self.outcomes.append(failed)
+                changed = (
+                    self.state == CLOSED
+                    and len(self.outcomes) >= self.min_calls
+                    and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate
+                )
+                if changed:
+                    self._open(self.base_cooldown)
+        if changed:
+            print(f"Circuit breaker {self.name} is now {self.state}")
+            save_states()
+
+    def _open(self, cooldown: float):
+        self.state, self.cooldown, self.opened_at = OPEN, cooldown, time.time()
+        self.outcomes.clear()
+        metrics.incr(f"breaker.{self.name}.opened")
+
+    def to_dict(self) -> Dict:
+        return {"state": self.state, "cooldown": self.cooldown, "opened_at": self.opened_at}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _load_states() -> Dict:
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_states():
+    with _breakers_lock:
+        states = {name: breaker.to_dict() for name, breaker in _breakers.items()}
+    atomic_write_bytes(STATE_PATH, json.dumps(states).encode("utf-8"))
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """Process-wide breaker for a source, resuming any open state a previous run saved."""
+    with _breakers_lock:
+        if name in _breakers:
+            return _breakers[name]
+        breaker = _breakers[name] = CircuitBreaker(name, **options)
+        saved = _load_states().get(name)
+    if saved and saved["state"] != CLOSED:
+        # A probe that was in flight when the process exited counts as not yet made
+        breaker.state, breaker.cooldown, breaker.opened_at = OPEN, saved["cooldown"], saved["opened_at"]
+    metrics.gauge(f"breaker.{name}.state", lambda: breaker.state)
+    return breaker
@@ -0,0 +1,132 @@
+"""
+Local Disk Cache
+
+Pickle-backed cache shared by the data sources, the cache warmer and the
+agents. Entries are grouped by namespace and written atomically so several
+processes can fill the same cache directory, and a host-wide lock per entry
+makes concurrent processes that miss the same key fetch it only once.
+"""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from . import deadline
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process fill lock
+    fcntl = None
+
+CACHE_DIR = os.environ.get(
+    "CN_FINANCE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cn-finance-assistant")
+)
+
+
+def atomic_write_bytes(path: str, payload: bytes):
+    """Write to a temp file in the same directory, then rename over the target."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def key_filename(key: str) -> str:
+    """File name (without extension) for a cache key: readable prefix plus a hash."""
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    safe = "".join(ch if ch.isalnum() else "_" for ch in key)[:48]
+    return f"{safe}-{digest}"
+
+
+@contextlib.contextmanager
+def fill_lock(path: str, poll: float = 0.05):
+    """Exclusive host-wide lock for filling the cache file at path; released if the holder dies."""
+    if fcntl is None:
+        yield
+        return
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f".{name}.lock"), "a") as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                deadline.check(f"waiting for another process to fill {name}")
+                time.sleep(poll)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class DiskCache:
+    """Namespace of pickled values, each stored with the time it was fetched."""
+
+    def __init__(self, namespace: str, root: Optional[str] = None):
+        self.namespace = namespace
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key_filename(key)}.pkl")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, fetched_at) or None when the key was never stored."""
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry["value"], entry["fetched_at"]
+
+    def put(self, key: str, value: Any, fetched_at: Optional[float] = None):
+        entry = {"value": value, "fetched_at": fetched_at or time.time()}
+        atomic_write_bytes(self._path(key), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def cached(
+        self,
+        key: str,
+        fetch: Callable[[], Any],
+        max_age: Optional[float] = None,
+        refresh: bool = False,
+        is_fresh: Optional[Callable[[float], bool]] = None,
+    ) -> Any:
+        """Return the stored value while it is fresh, else fetch and store.
+
+        Freshness is either an age limit in seconds or an is_fresh(fetched_at)
+        check such as the trading calendar's. When the request deadline runs
+        out during the fetch, a stale stored value is returned if there is one.
+        """
+
+        def fresh(fetched_at: float) -> bool:
+            return is_fresh(fetched_at) if is_fresh else time.time() - fetched_at < max_age
+
+        entry = self.get(key)
+        if entry is not None and not refresh and fresh(entry[1]):
+            return entry[0]
+        try:
+            with fill_lock(self._path(key)):
+                # Another process may have filled the entry while this one waited
+                latest = self.get(key)
+                if latest is not None and (entry is None or latest[1] != entry[1]) and (refresh or fresh(latest[1])):
+                    return latest[0]
+                # Stamp with the request start so changes made during the fetch aren't missed
+                started = time.time()
+                value = deadline.call(fetch, f"fetching {self.namespace}/{key}")
+                self.put(key, value, fetched_at=started)
+        except deadline.DeadlineExceeded:
+            if entry is None:
+                raise
+            print(f"Deadline reached, using stale {self.namespace}/{key}")
+            return entry[0]
+        return value
@@ -1,14 +1,20 @@
+from . import symbols
+
 def format_date(date_obj, format='%Y%m%d'):
     return date_obj.strftime(format)
 
 def format_stock_code(code):
-    if code.startswith('6'):
-        return 'SH' + code
-    elif code.startswith(('0', '3')):
-        return 'SZ' + code
-    return code
+    """SH/SZ/BJ prefixed A-share code; anything else is returned unchanged."""
+    try:
+        symbol = symbols.classify(code)
+    except ValueError:
+        return code
+    return symbol.prefixed if symbol.market == 'cn' else code
 
 def short_stock_code(code):
-    if len(code) == 8 and code.startswith(('SH', 'SZ')):
-        return code[2:]
-    return code
\ No newline at end of file
+    """Bare 6-digit A-share code; anything else is returned unchanged."""
+    try:
+        symbol = symbols.classify(code)
+    except ValueError:
+        return code
+    return symbol.code if symbol.market == 'cn' else code
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Cached Market Data Sources
+
+Rate-limited, disk-cached wrappers around the AKShare endpoints the agents
+use. The tools read through these, and the cache warmer fills them ahead of
+time so the first query of the day doesn't pay the cold fetch cost.
+"""
+
+import datetime as dt
+
+import akshare as ak
+
+from . import hedging
+from .cache import DiskCache
+from .ratelimit import get_limiter
+from .shared_cache import SharedCache, frame_to_records, records_to_frame
+from .trading_calendar import MARKET_TZ, daily_freshness, freshness
+
+# How long data that changes outside trading hours stays usable, in seconds
+MAX_AGE = {
+    "universe": 24 * 3600,
+    "company_info": 7 * 24 * 3600,
+    "news": 12 * 3600,
+}
+
+# Market data is fresh for as long as the exchanges have been closed since the
+# fetch; settle covers providers finalizing numbers shortly after a session.
+# Data that changes once a day is fresh until that day's update time.
+FRESHNESS = {
+    "hist": freshness(settle=30 * 60, intraday_ttl=60),
+    "spot": freshness(settle=5 * 60, intraday_ttl=15),
+    "financial_indicator": daily_freshness(dt.time(21, 0)),
+    "adjust_factors": daily_freshness(dt.time(9, 0)),
+}
+
+
+def spot_quotes(refresh: bool = False):
+    """Eastmoney snapshot of every A-share quote."""
+
+    def fill():
+        with get_limiter("eastmoney"):
+            return frame_to_records(ak.stock_zh_a_spot_em()), {}
+
+    # Mapped from a shared file, so worker processes on a host fetch the snapshot once
+    records, _, _ = SharedCache("spot").cached("all", fill, refresh=refresh, is_fresh=FRESHNESS["spot"])
+    return records_to_frame(records)
+
+
+def a_share_universe(refresh: bool = False):
+    """Code and name of every listed A-share."""
+
+    def fetch():
+        with get_limiter("eastmoney"):
+            return ak.stock_info_a_code_name()
+
+    return DiskCache("universe").cached("a_share", fetch, MAX_AGE["universe"], refresh=refresh)
+
+
+def _xueqiu_profile(standard_code: str) -> dict:
+    frame = ak.stock_individual_basic_info_xq(symbol=standard_code)
+    items = dict(zip(frame["item"], frame["value"]))
+    industry = items.get("affiliate_industry")
+    return {
+        "company_name": items.get("org_name_cn"),
+        "sector": items.get("classi_name"),
+        "industry": industry.get("ind_name") if isinstance(industry, dict) else industry,
+        "description": items.get("main_operation_business"),
+        "website": items.get("org_website"),
+        "register_asset": items.get("reg_asset"),
+        "employees": items.get("staff_num"),
+        "province": items.get("provincial_name"),
+        # Same layout as the Eastmoney profile: listing date as YYYYMMDD like 上市时间; no market value here
+        "listing_date": _listing_date(items.get("listed_date")),
+        "market_cap": None,
+        "source": "xueqiu",
+    }
+
+
+def _listing_date(listed_ms) -> int:
+    """Xueqiu's listing date (epoch milliseconds) as a YYYYMMDD int, None when missing."""
+    if not isinstance(listed_ms, (int, float)) or listed_ms != listed_ms:
+        return None
+    return int(dt.datetime.fromtimestamp(listed_ms / 1000, MARKET_TZ).strftime("%Y%m%d"))
+
+
+def _eastmoney_profile(standard_code: str) -> dict:
+    frame = ak.stock_individual_info_em(symbol=standard_code[2:])
+    items = dict(zip(frame["item"], frame["value"]))
+    # Eastmoney has fewer profile fields, but adds market value
+    return {
+        "company_name": items.get("股票简称"),
+        "sector": None,
+        "industry": items.get("行业"),
+        "description": None,
+        "website": None,
+        "register_asset": None,
+        "employees": None,
+        "province": None,
+        "listing_date": items.get("上市时间"),
+        "market_cap": items.get("总市值"),
+        "source": "eastmoney",
+    }
+
+
+# Xueqiu has the fuller profile; Eastmoney answers when it is slow or failing
+PROFILE_SOURCES = [
+    hedging.Source("xueqiu_profile", "xueqiu", _xueqiu_profile),
+    hedging.Source("eastmoney_profile", "eastmoney", _eastmoney_profile),
+]
+
+
+def company_profile(standard_code: str, refresh: bool = False) -> dict:
+    """Company profile keyed by the SH/SZ/BJ prefixed code, from Xueqiu hedged with Eastmoney."""
+    return DiskCache("company_profile").cached(
+        standard_code, lambda: hedging.hedged_call(PROFILE_SOURCES, standard_code), MAX_AGE["company_info"], refresh=refresh
+    )
+
+
+def stock_news(stock_code: str, refresh: bool = False):
+    """Eastmoney news for a 6-digit code."""
+
+    def fetch():
+        with get_limiter("eastmoney"):
+            return ak.stock_news_em(symbol=stock_code)
+
+    return DiskCache("news").cached(stock_code, fetch, MAX_AGE["news"], refresh=refresh)
+
+
+def financial_indicator(stock_code: str, refresh: bool = False):
+    """Sina financial analysis indicators for the last two years."""
+
+    def fetch():
+        start_year = str(dt.datetime.now().year - 1)
+        with get_limiter("sina"):
+            return ak.stock_financial_analysis_indicator(symbol=stock_code, start_year=start_year)
+
+    return DiskCache("financial_indicator").cached(
+        stock_code, fetch, refresh=refresh, is_fresh=FRESHNESS["financial_indicator"]
+    )
+
+
+def industry_boards(refresh: bool = False):
+    """Eastmoney industry boards with their names and codes."""
+
+    def fetch():
+        with get_limiter("eastmoney"):
+            return ak.stock_board_industry_name_em()
+
+    return DiskCache("industry_boards").cached("all", fetch, MAX_AGE["universe"], refresh=refresh)
+
+
+def industry_constituents(board: str, refresh: bool = False):
+    """Stocks in an Eastmoney industry board, with their latest quote and valuation."""
+
+    def fetch():
+        with get_limiter("eastmoney"):
+            return ak.stock_board_industry_cons_em(symbol=board)
+
+    return DiskCache("industry_constituents").cached(board, fetch, MAX_AGE["universe"], refresh=refresh)
+
+
+# Statutory disclosure deadline (month, day) for each reporting period end; annual reports are due the next year
+REPORT_DEADLINES = {(3, 31): (4, 30), (6, 30): (8, 31), (9, 30): (10, 31), (12, 31): (4, 30)}
+
+
+def latest_report_period(today: dt.date = None) -> str:
+    """Most recent reporting period every listed company has had to disclose, as YYYYMMDD."""
+    today = today or dt.date.today()
+    periods = []
+    for year in (today.year - 1, today.year):
+        for (month, day), (due_month, due_day) in REPORT_DEADLINES.items():
+            due_year = year + 1 if month == 12 else year
+            if dt.date(due_year, due_month, due_day) < today:
+                periods.append(dt.date(year, month, day))
+    return max(periods).strftime("%Y%m%d")
+
+
+def performance_report(period: str = None, refresh: bool = False):
+    """Eastmoney results of every A-share for one reporting period (YYYYMMDD)."""
+    period = period or latest_report_period()
+
+    def fetch():
+        with get_limiter("eastmoney"):
+            return ak.stock_yjbb_em(date=period)
+
+    return DiskCache("performance_report").cached(
+        period, fetch, refresh=refresh, is_fresh=FRESHNESS["financial_indicator"]
+    )
@@ -0,0 +1,127 @@
+"""
+Request Deadlines
+
+A time budget for one user request, carried in a context variable so every
+tool, provider fetch and agent node started on its behalf can see how much
+time is left. Stages take their share of the remaining budget instead of a
+fixed timeout, and give back what they have when it runs out.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before a stage finished."""
+
+
+class Deadline:
+    """Absolute point in time by which the request should answer."""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, parts: int, floor: float = 0.0) -> float:
+        """Even split of the remaining time over the stages still to run."""
+        return max(floor, self.remaining() / max(1, parts))
+
+
+_current: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar("deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left on the current deadline, or default when there is none."""
+    deadline = _current.get()
+    return default if deadline is None else deadline.remaining()
+
+
+def expired() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
+
+
+def cap(timeout: float, floor: float = 0.1) -> float:
+    """A per-call timeout such as requests' timeout=, shortened to fit the remaining budget."""
+    deadline = _current.get()
+    return timeout if deadline is None else max(floor, min(timeout, deadline.remaining()))
+
+
+def share(parts: int, default: Optional[float], floor: float = 0.0) -> Optional[float]:
+    """A stage's timeout: its share of the remaining budget, or default without a deadline."""
+    deadline = _current.get()
+    return default if deadline is None else deadline.share(parts, floor)
+
+
+def check(stage: str = "request"):
+    deadline = _current.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"Deadline of {deadline.budget:.0f}s exceeded before {stage}")
+
+
+@contextlib.contextmanager
+def budget(seconds: Optional[float]):
+    """Run the block under a deadline; a nested budget never extends an outer one."""
+    if seconds is None:
+        yield _current.get()
+        return
+    deadline = Deadline(seconds)
+    outer = _current.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def submit(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """pool.submit that carries the caller's deadline into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def call(fn: Callable[[], Any], stage: str = "call") -> Any:
+    """Run a blocking call that has no timeout of its own within the remaining budget.
+
+    Without a deadline this is a plain call. Otherwise the call runs on a
+    daemon thread and DeadlineExceeded is raised once the budget is spent;
+    the abandoned call finishes in the background and its result is dropped.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return fn()
+    check(stage)
+
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(target,), daemon=True).start()
+    if not done.wait(deadline.remaining()):
+        raise DeadlineExceeded(f"Deadline of {deadline.budget:.0f}s exceeded during {stage}")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
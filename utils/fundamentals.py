@@ -0,0 +1,201 @@
+"""
+Fundamentals Snapshot
+
+A columnar table of the key metrics get_financial_metrics reports, one row
+per tracked symbol, built by a nightly job (build_fundamentals.py). Every
+A-share comes from two bulk AKShare endpoints, the spot snapshot for
+valuation and the results report for growth and profitability; watchlist
+symbols (US and HK ones included) add the rest from yfinance. The table is
+stored in the shared memory-mapped cache, so every worker process maps the
+same pages, and is indexed by Yahoo symbol. A lookup is a dict probe and a
+row read; a stale snapshot, a missing symbol or a row with none of the
+yfinance-only fields returns None, and the caller falls back to a live fetch.
+"""
+
+import datetime as dt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import datasources, deadline, metrics, symbols
+from .ratelimit import get_limiter
+from .shared_cache import SharedCache
+
+NAMESPACE = "fundamentals"
+KEY = "snapshot"
+
+# Snapshot field -> yfinance info key, in the order get_financial_metrics reports them
+YAHOO_FIELDS = {
+    "market_cap": "marketCap",
+    "pe_ratio": "trailingPE",
+    "forward_pe": "forwardPE",
+    "peg_ratio": "pegRatio",
+    "price_to_book": "priceToBook",
+    "dividend_yield": "dividendYield",
+    "profit_margins": "profitMargins",
+    "revenue_growth": "revenueGrowth",
+    "debt_to_equity": "debtToEquity",
+    "return_on_equity": "returnOnEquity",
+    "current_ratio": "currentRatio",
+    "beta": "beta",
+}
+FIELDS = tuple(YAHOO_FIELDS)
+
+# Fields only yfinance has; the bulk A-share endpoints leave them NaN
+YAHOO_ONLY = ("forward_pe", "peg_ratio", "dividend_yield", "debt_to_equity", "current_ratio", "beta")
+
+# Built after the results data's evening update; until tonight's build lands, callers fetch live
+is_fresh = datasources.FRESHNESS["financial_indicator"]
+
+# How often a process holding a stale snapshot looks for a newer file, in seconds
+RELOAD_INTERVAL = 60.0
+
+
+def from_yahoo(info: Dict) -> Dict[str, Optional[float]]:
+    """Snapshot fields from a yfinance Ticker.info dict, None where missing."""
+    row = {}
+    for field, key in YAHOO_FIELDS.items():
+        value = info.get(key)
+        row[field] = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return row
+
+
+def a_share_frame(period: Optional[str] = None) -> pd.DataFrame:
+    """Every A-share's fields from the bulk endpoints, indexed by Yahoo symbol, in yfinance units."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        spot = deadline.submit(pool, datasources.spot_quotes)
+        report = deadline.submit(pool, datasources.performance_report, period)
+        spot, report = spot.result(), report.result()
+    period = period or datasources.latest_report_period()
+
+    def numeric(frame: pd.DataFrame, column: str) -> pd.Series:
+        return pd.to_numeric(frame[column], errors="coerce")
+
+    valuation = pd.DataFrame(
+        {
+            "market_cap": numeric(spot, "总市值").to_numpy(),
+            "pe_ratio": numeric(spot, "市盈率-动态").to_numpy(),
+            "price_to_book": numeric(spot, "市净率").to_numpy(),
+        },
+        index=spot["代码"].astype(str),
+    )
+    # Yahoo has no P/E for loss makers; Eastmoney reports it negative
+    valuation.loc[valuation["pe_ratio"] <= 0, "pe_ratio"] = np.nan
+
+    revenue = numeric(report, "营业总收入-营业总收入")
+    # Report figures are year to date; ROE is annualized to compare with Yahoo's trailing twelve months
+    months = int(period[4:6])
+    results = pd.DataFrame(
+        {
+            "revenue_growth": (numeric(report, "营业总收入-同比增长") / 100).to_numpy(),
+            "profit_margins": (numeric(report, "净利润-净利润") / revenue.where(revenue > 0)).to_numpy(),
+            "return_on_equity": (numeric(report, "净资产收益率") / 100 * 12 / months).to_numpy(),
+        },
+        index=report["股票代码"].astype(str),
+    )
+    results = results[~results.index.duplicated(keep="last")]
+
+    frame = valuation.join(results, how="left")
+    frame.index = [symbols.yahoo_symbol(code) for code in frame.index]
+    return frame.reindex(columns=FIELDS)
+
+
+def yahoo_frame(tickers: Iterable[str], workers: int = 4) -> pd.DataFrame:
+    """Fields from yfinance for each ticker, indexed by Yahoo symbol; tickers that fail are left out."""
+    import yfinance as yf
+
+    def fetch(symbol: str) -> Optional[Dict]:
+        try:
+            with get_limiter("yahoo"):
+                return from_yahoo(yf.Ticker(symbol).info)
+        except Exception as e:
+            print(f"Yahoo fundamentals failed for {symbol}: {str(e)}")
+            return None
+
+    tickers = list(dict.fromkeys(symbols.yahoo_symbol(t) for t in tickers))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = dict(zip(tickers, pool.map(fetch, tickers)))
+    rows = {symbol: row for symbol, row in rows.items() if row is not None}
+    return pd.DataFrame.from_dict(rows, orient="index", columns=list(FIELDS), dtype=np.float64)
+
+
+def to_records(frame: pd.DataFrame) -> np.ndarray:
+    """Snapshot record array sorted by symbol: a fixed-width symbol field and one float64 per field."""
+    frame = frame.sort_index()
+    width = max([len(s) for s in frame.index] + [1])
+    records = np.empty(len(frame), dtype=[("symbol", f"U{width}")] + [(field, np.float64) for field in FIELDS])
+    records["symbol"] = frame.index.to_numpy(dtype=str)
+    for field in FIELDS:
+        records[field] = frame[field].to_numpy(dtype=np.float64)
+    return records
+
+
+def build(watchlist: Iterable[str] = (), period: Optional[str] = None, workers: int = 4) -> Dict:
+    """Build and store the snapshot: bulk A-share data, with yfinance filling the gaps for watchlist symbols."""
+    started = time.time()
+    frame = a_share_frame(period)
+    watchlist = list(watchlist)
+    if watchlist:
+        # Eastmoney's valuation is the fresher one; Yahoo adds the fields it doesn't have
+        frame = frame.combine_first(yahoo_frame(watchlist, workers)).reindex(columns=FIELDS)
+    records = to_records(frame)
+    meta = {"period": period or datasources.latest_report_period(), "watchlist": len(watchlist)}
+    SharedCache(NAMESPACE).put(KEY, records, meta, fetched_at=started)
+    return {"symbols": len(records), **meta, "seconds": round(time.time() - started, 1)}
+
+
+class Snapshot:
+    """A mapped snapshot with its symbol index."""
+
+    def __init__(self, records: np.ndarray, meta: Dict, fetched_at: float):
+        self.records = records
+        self.meta = meta
+        self.fetched_at = fetched_at
+        self.index = {symbol: i for i, symbol in enumerate(records["symbol"].tolist())}
+
+    def fresh(self) -> bool:
+        return is_fresh(self.fetched_at)
+
+    def row(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        record = self.records[i]
+        return {field: None if np.isnan(record[field]) else float(record[field]) for field in FIELDS}
+
+
+_snapshot: Optional[Snapshot] = None
+_checked_at = 0.0
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """The latest stored snapshot, mapped on first use and remapped once a newer one is written."""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if (_snapshot is None or not _snapshot.fresh()) and now - _checked_at >= RELOAD_INTERVAL:
+        _checked_at = now
+        entry = SharedCache(NAMESPACE).get(KEY)
+        if entry is not None and (_snapshot is None or entry[2] != _snapshot.fetched_at):
+            _snapshot = Snapshot(*entry)
+    return _snapshot
+
+
+def lookup(ticker: str) -> Optional[Dict]:
+    """Snapshot fields for a ticker plus the snapshot's date, or None when a live fetch is needed."""
+    snapshot = get_snapshot()
+    if snapshot is None or not snapshot.fresh():
+        metrics.incr("fundamentals.stale")
+        return None
+    row = snapshot.row(symbols.yahoo_symbol(ticker))
+    if row is None:
+        metrics.incr("fundamentals.misses")
+        return None
+    if all(row[field] is None for field in YAHOO_ONLY):
+        # Bulk data only (an A-share off the watchlist): the live fetch has every field
+        metrics.incr("fundamentals.partial")
+        return None
+    metrics.incr("fundamentals.hits")
+    return {**row, "as_of": dt.datetime.fromtimestamp(snapshot.fetched_at).strftime("%Y-%m-%d %H:%M")}
@@ -0,0 +1,157 @@
+"""
+Hedged Provider Requests
+
+Some data is served by more than one provider. A hedged call sends the
+request to the primary source and, if it hasn't answered within that
+source's observed p95 latency (or it fails), sends a backup request to the
+next source. Whichever answers first is used, so one slow provider no
+longer sets the tail latency users see.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from . import deadline, metrics
+from .ratelimit import get_limiter
+
+# Hedge delay until a source has enough samples for a p95 of its own, in seconds
+DEFAULT_HEDGE_AFTER = 2.0
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling window of a source's successful response times."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def hedge_after(self) -> float:
+        p95 = self.p95()
+        return DEFAULT_HEDGE_AFTER if p95 is None else p95
+
+
+@dataclass(frozen=True)
+class Source:
+    """One provider endpoint for a piece of data; fetch results must share one layout."""
+
+    name: str
+    provider: str
+    fetch: Callable[..., Any]
+
+
+class Cancelled(Exception):
+    """A backup request that lost the race before it was sent."""
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+def get_tracker(name: str) -> LatencyTracker:
+    with _lock:
+        if name not in _trackers:
+            _trackers[name] = LatencyTracker()
+        return _trackers[name]
+
+
+def _count(name: str, event: str):
+    with _lock:
+        counts = _stats.setdefault(name, {"calls": 0, "wins": 0, "hedges": 0, "failures": 0})
+        counts[event] += 1
+
+
+def stats() -> Dict[str, Dict]:
+    """Per-source call, win, hedge and failure counts plus the current p95."""
+    with _lock:
+        counts = {name: dict(values) for name, values in _stats.items()}
+    for name, values in counts.items():
+        values["p95"] = get_tracker(name).p95()
+    return counts
+
+
+metrics.gauge("hedging", stats)
+
+
+def _attempt(source: Source, cancelled: threading.Event, args: tuple, kwargs: Dict):
+    with get_limiter(source.provider):
+        # The other request may have answered while this one waited for its rate limit
+        if cancelled.is_set():
+            raise Cancelled(source.name)
+        _count(source.name, "calls")
+        started = time.monotonic()
+        value = source.fetch(*args, **kwargs)
+    get_tracker(source.name).record(time.monotonic() - started)
+    return value
+
+
+def hedged_call(sources: List[Source], *args, **kwargs) -> Any:
+    """Fetch from the first source, hedging to the next ones; the first success wins.
+
+    Python can't abort a request already on the wire, so the losing request
+    is cancelled if it hasn't been sent yet and otherwise finishes in the
+    background with its result discarded.
+    """
+    queue = list(sources)
+    pending = {}
+    errors = []
+    cancelled = threading.Event()
+
+    def launch():
+        source = queue.pop(0)
+        pending[deadline.submit(_pool, _attempt, source, cancelled, args, kwargs)] = source
+        return source
+
+    latest = launch()
+    try:
+        while pending:
+            # Wait for the latest request's p95, or for the deadline once there is nothing left to hedge to
+            hedge_after = get_tracker(latest.name).hedge_after() if queue else None
+            timeouts = [t for t in (hedge_after, deadline.remaining()) if t is not None]
+            done, _ = wait(pending, timeout=min(timeouts) if timeouts else None, return_when=FIRST_COMPLETED)
+
+            if not done:
+                deadline.check(f"{latest.name} answered")
+                if queue:
+                    _count(latest.name, "hedges")
+                    print(f"{latest.name} slower than its p95, hedging to {queue[0].name}")
+                    latest = launch()
+                continue
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    _count(source.name, "failures")
+                    errors.append(f"{source.name}: {str(e)}")
+                    continue
+                _count(source.name, "wins")
+                return value
+
+            # Everything in flight failed: go to the next source without waiting
+            if not pending and queue:
+                latest = launch()
+
+        raise RuntimeError(f"All sources failed: {'; '.join(errors)}")
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
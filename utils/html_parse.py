@@ -0,0 +1,249 @@
+"""
+HTML Parsing Backends
+
+Pluggable parsers for the scraped news pages. The lxml backend parses in C
+and runs selectors compiled once to XPath; BeautifulSoup stays available
+as a fallback. Each news source has a precompiled selector set, and
+extraction stops as soon as enough items have been found instead of
+walking every match on the page.
+"""
+
+import os
+import re
+import warnings
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Simple CSS compound selectors: tag, .class, [attr] and [attr="value"]
+_COMPOUND = re.compile(r"^([a-zA-Z][\w-]*|\*)?((?:\.[\w-]+|\[[\w-]+(?:=\"[^\"]*\"|='[^']*'|=[\w-]+)?\])*)$")
+_PART = re.compile(r"\.([\w-]+)|\[([\w-]+)(?:=(?:\"([^\"]*)\"|'([^']*)'|([\w-]+)))?\]")
+
+
+def css_to_xpath(selector: str) -> str:
+    """XPath, relative to the context node, for a descendant chain of simple CSS selectors."""
+    steps = []
+    for compound in selector.split():
+        match = _COMPOUND.match(compound)
+        if not match:
+            raise ValueError(f"Unsupported selector {selector!r}")
+        tag, rest = match.group(1) or "*", match.group(2)
+        predicates = []
+        for cls, attr, dq, sq, bare in _PART.findall(rest):
+            if cls:
+                predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')")
+            elif dq or sq or bare:
+                value = dq or sq or bare
+                predicates.append(f"@{attr}='{value}'")
+            else:
+                predicates.append(f"@{attr}")
+        steps.append(tag + "".join(f"[{p}]" for p in predicates))
+    return ".//" + "//".join(steps)
+
+
+class LxmlBackend:
+    """lxml.html with selectors compiled to XPath."""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+
+        self._html = lxml.html
+        self._etree = etree
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+
+    def compile(self, selector: str):
+        # The position bound lets libxml2 stop collecting matches at the limit
+        return self._etree.XPath(f"({css_to_xpath(selector)})[position() <= $limit]")
+
+    def parse(self, html: str):
+        # Bytes with an explicit encoding, since str input rejects pages that declare one
+        return self._html.fromstring(html.encode("utf-8"), parser=self._parser)
+
+    def select(self, node, compiled, limit: Optional[int] = None) -> List:
+        return compiled(node, limit=limit or 1_000_000)
+
+    def iter_links(self, root):
+        return root.iter("a")
+
+    @staticmethod
+    def tag(node) -> str:
+        return node.tag
+
+    @staticmethod
+    def text(node) -> str:
+        return node.text_content()
+
+    @staticmethod
+    def attr(node, name: str) -> str:
+        return node.get(name, "")
+
+
+class Bs4Backend:
+    """BeautifulSoup with soupsieve selectors, using lxml underneath when it is installed."""
+
+    name = "bs4"
+
+    def __init__(self):
+        import soupsieve
+        from bs4 import BeautifulSoup
+
+        self._soup = BeautifulSoup
+        self._soupsieve = soupsieve
+        try:
+            import lxml  # noqa: F401
+
+            self._features = "lxml"
+        except ImportError:
+            self._features = "html.parser"
+
+    def compile(self, selector: str):
+        return self._soupsieve.compile(selector)
+
+    def parse(self, html: str):
+        with warnings.catch_warnings():
+            # Some pages start with an XML declaration; they are still HTML
+            warnings.simplefilter("ignore")
+            return self._soup(html, self._features)
+
+    def select(self, node, compiled, limit: Optional[int] = None) -> List:
+        return compiled.select(node, limit=limit or 0)
+
+    def iter_links(self, root):
+        return root.find_all("a")
+
+    @staticmethod
+    def tag(node) -> str:
+        return node.name
+
+    @staticmethod
+    def text(node) -> str:
+        return node.text
+
+    @staticmethod
+    def attr(node, name: str) -> str:
+        return node.get(name, "")
+
+
+_BACKENDS: Dict[str, Callable] = {"lxml": LxmlBackend, "bs4": Bs4Backend}
+_instances: Dict[str, object] = {}
+
+
+def register_backend(name: str, factory: Callable):
+    """Register a parser factory; the instance must implement LxmlBackend's methods."""
+    _BACKENDS[name] = factory
+    _instances.pop(name, None)
+
+
+def get_backend(name: Optional[str] = None):
+    """The named backend, else $CN_FINANCE_HTML_PARSER, else lxml when it is installed."""
+    if name is None:
+        name = os.environ.get("CN_FINANCE_HTML_PARSER")
+    if name is None:
+        try:
+            return get_backend("lxml")
+        except ImportError:
+            return get_backend("bs4")
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+@dataclass
+class SelectorSet:
+    """How to find news items on one source's page."""
+
+    # Item containers; alternatives are tried in order and the first that matches is used
+    items: List[str]
+    # Title and link inside an item; None means the item element itself
+    title: Optional[str] = None
+    link: Optional[str] = None
+    base_url: str = ""
+    # Fallback when no container matches: any link whose href contains this
+    link_fallback: Optional[str] = None
+    _compiled: Dict[str, Tuple] = field(default_factory=dict, repr=False)
+
+    def compiled(self, backend) -> Tuple:
+        """Selectors compiled once per backend."""
+        if backend.name not in self._compiled:
+            compile_ = backend.compile
+            self._compiled[backend.name] = (
+                [compile_(s) for s in self.items],
+                compile_(self.title) if self.title else None,
+                compile_(self.link) if self.link else None,
+                compile_("a"),
+            )
+        return self._compiled[backend.name]
+
+
+SOURCES = {
+    "marketwatch": SelectorSet(
+        items=[".article__content"], title=".article__headline", link="a.link", base_url="https://www.marketwatch.com"
+    ),
+    "cnbc": SelectorSet(items=[".SearchResult-searchResultContent"], title=".Card-title", link="a.resultlink"),
+    "seeking_alpha": SelectorSet(
+        items=["article"],
+        title='a[data-test-id="post-list-item-title"]',
+        link='a[data-test-id="post-list-item-title"]',
+        base_url="https://seekingalpha.com",
+    ),
+    # Google's result markup changes often, so several container classes are tried
+    "google_news": SelectorSet(
+        items=["div.SoaBEf", "div.dbsr", "g-card", ".WlydOe", ".ftSUBd"], link_fallback="news"
+    ),
+}
+
+
+def _clean_link(link: str, base_url: str) -> str:
+    if link.startswith("/url?q="):
+        link = link.split("/url?q=")[1].split("&")[0]
+    if link and not link.startswith("http") and base_url:
+        link = f"{base_url}{link}"
+    return link
+
+
+def extract(html: str, source: str, limit: int = 5, backend=None) -> List[Dict[str, str]]:
+    """Up to `limit` {"title", "url"} items from a source's page."""
+    backend = backend or get_backend()
+    spec = SOURCES[source]
+    item_selectors, title_selector, link_selector, anchor = spec.compiled(backend)
+    root = backend.parse(html)
+
+    elements = []
+    for selector in item_selectors:
+        # Only the first `limit` matches are ever looked at
+        elements = backend.select(root, selector, limit)
+        if elements:
+            break
+
+    items = []
+
+    def add(title: str, link: str):
+        title, link = title.strip(), _clean_link(link, spec.base_url)
+        if title and link and {"title": title, "url": link} not in items:
+            items.append({"title": title, "url": link})
+
+    for element in elements:
+        if title_selector is None:
+            # Generic containers: the element itself if it is a link, else its first link
+            if backend.tag(element) != "a":
+                anchors = backend.select(element, anchor, 1)
+                if not anchors:
+                    continue
+                element = anchors[0]
+            if len(backend.text(element).strip()) > 10:
+                add(backend.text(element), backend.attr(element, "href"))
+            continue
+        titles = backend.select(element, title_selector, 1)
+        links = backend.select(element, link_selector, 1)
+        if titles and links:
+            add(backend.text(titles[0]), backend.attr(links[0], "href"))
+
+    if not elements and spec.link_fallback:
+        for link in backend.iter_links(root):
+            if len(items) >= limit:
+                break
+            if spec.link_fallback in backend.attr(link, "href").lower() and len(backend.text(link).strip()) > 20:
+                add(backend.text(link), backend.attr(link, "href"))
+    return items[:limit]
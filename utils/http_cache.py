@@ -0,0 +1,162 @@
+"""
+HTTP Response Cache
+
+On-disk cache for the scraped news pages. Responses are stored with their
+body compressed and their validators (ETag, Last-Modified). A response that
+is still fresh under its Cache-Control / Expires headers is served locally;
+a stale one is revalidated with a conditional GET, so an unchanged page
+costs a 304 instead of a full download.
+"""
+
+import email.utils
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+
+from . import metrics
+from .cache import DiskCache
+
+# Cap on heuristic freshness (10% of the time since Last-Modified), in seconds
+HEURISTIC_MAX = 3600
+
+# Response headers kept with a cached body
+KEPT_HEADERS = ("Cache-Control", "Expires", "Date", "Age", "ETag", "Last-Modified", "Content-Type")
+
+
+class CachedResponse:
+    """The parts of requests.Response the scrapers use, for stored and live responses alike."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict, content: bytes, encoding: Optional[str], source: str):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        # "network", "revalidated" (304) or "fresh" (no request made)
+        self.source = source
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict) -> Optional[float]:
+    """Seconds the response stays fresh; None when it must not be stored at all."""
+    directives = parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        age = max(0.0, float(headers.get("Age") or 0))
+    except ValueError:
+        # A malformed Age is ignored, as if the response came straight from the origin
+        age = 0.0
+    if directives.get("max-age") is not None:
+        try:
+            return max(0.0, float(directives["max-age"]) - age)
+        except ValueError:
+            return 0.0
+
+    date = _http_date(headers.get("Date")) or time.time()
+    expires = _http_date(headers.get("Expires"))
+    if headers.get("Expires"):
+        # An unparseable Expires such as "0" means already expired
+        return max(0.0, expires - date - age) if expires else 0.0
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified:
+        return min(HEURISTIC_MAX, max(0.0, 0.1 * (date - last_modified)))
+    return 0.0
+
+
+class HttpCache:
+    """Conditional-GET cache on top of DiskCache, one entry per URL."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.store = DiskCache("http", root)
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: float = 10) -> CachedResponse:
+        entry = self.store.get(url)
+        stored = entry[0] if entry else None
+        if stored and time.time() < stored["fresh_until"]:
+            metrics.incr("http_cache.fresh")
+            return self._response(url, stored, "fresh")
+
+        request_headers = dict(headers or {})
+        if stored:
+            if stored["headers"].get("ETag"):
+                request_headers["If-None-Match"] = stored["headers"]["ETag"]
+            if stored["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = stored["headers"]["Last-Modified"]
+
+        started = time.time()
+        response = requests.get(url, headers=request_headers, timeout=timeout)
+        metrics.incr("http_cache.bytes_downloaded", len(response.content))
+
+        if response.status_code == 304 and stored:
+            metrics.incr("http_cache.revalidated")
+            # A 304 carries updated freshness headers for the stored body
+            stored["headers"].update({k: response.headers[k] for k in KEPT_HEADERS if k in response.headers})
+            lifetime = freshness_lifetime(stored["headers"])
+            stored["fresh_until"] = started + (lifetime or 0.0)
+            self.store.put(url, stored, fetched_at=started)
+            return self._response(url, stored, "revalidated")
+
+        metrics.incr("http_cache.miss")
+        kept = {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers}
+        lifetime = freshness_lifetime(kept)
+        # Only successful pages are worth keeping; block pages and errors are refetched
+        if response.status_code == 200 and lifetime is not None:
+            self.store.put(
+                url,
+                {
+                    "status_code": 200,
+                    "headers": kept,
+                    "body": zlib.compress(response.content, 6),
+                    "encoding": response.encoding,
+                    "fresh_until": started + lifetime,
+                },
+                fetched_at=started,
+            )
+        return CachedResponse(url, response.status_code, kept, response.content, response.encoding, "network")
+
+    @staticmethod
+    def _response(url: str, stored: Dict, source: str) -> CachedResponse:
+        return CachedResponse(
+            url, stored["status_code"], stored["headers"], zlib.decompress(stored["body"]), stored["encoding"], source
+        )
+
+
+_cache = None
+
+
+def get_cache() -> HttpCache:
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def get(url: str, headers: Optional[Dict] = None, timeout: float = 10) -> CachedResponse:
+    """requests.get through the process-wide HTTP cache."""
+    return get_cache().get(url, headers=headers, timeout=timeout)
@@ -0,0 +1,354 @@
+"""
+Incremental Technical Indicators
+
+Moving averages, RSI, MACD and VWAP kept as running state that is updated in
+constant time per new bar. peek() answers "what would the indicator be if the
+current bar closed at this price" without touching the state, which is how
+live intraday technicals are reported from the latest quote. State is
+checkpointed per symbol as JSON and rebuilt from the bar history when the
+checkpoint is missing or no longer matches the bars.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from .cache import CACHE_DIR, atomic_write_bytes
+
+
+class SMA:
+    """Simple moving average over the last window values."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        if len(self.values) + 1 < self.window:
+            return None
+        dropped = self.values[0] if len(self.values) == self.window else 0.0
+        return (self.total - dropped + value) / self.window
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total / self.window if len(self.values) == self.window else None
+
+    def to_dict(self) -> Dict:
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "SMA":
+        sma = cls(state["window"])
+        for value in state["values"]:
+            sma.update(value)
+        return sma
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first span values."""
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.count = 0
+        self.current = None
+        self.seed_total = 0.0
+
+    def _next(self, value: float):
+        if self.count + 1 < self.span:
+            return None, self.seed_total + value
+        if self.count + 1 == self.span:
+            return (self.seed_total + value) / self.span, 0.0
+        return self.current + self.alpha * (value - self.current), 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.current, self.seed_total = self._next(value)
+        self.count += 1
+        return self.current
+
+    def peek(self, value: float) -> Optional[float]:
+        return self._next(value)[0]
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.current
+
+    def to_dict(self) -> Dict:
+        return {"span": self.span, "count": self.count, "current": self.current, "seed_total": self.seed_total}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "EMA":
+        ema = cls(state["span"])
+        ema.count, ema.current, ema.seed_total = state["count"], state["current"], state["seed_total"]
+        return ema
+
+
+class RSI:
+    """Relative strength index with Wilder's smoothing."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.current = None
+
+    def _next(self, value: float):
+        if self.previous is None:
+            return None, self.avg_gain, self.avg_loss
+        change = value - self.previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.count < self.period:
+            # Plain average over the first period changes
+            avg_gain = (self.avg_gain * self.count + gain) / (self.count + 1)
+            avg_loss = (self.avg_loss * self.count + loss) / (self.count + 1)
+            if self.count + 1 < self.period:
+                return None, avg_gain, avg_loss
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        if avg_loss == 0:
+            return 100.0, avg_gain, avg_loss
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss), avg_gain, avg_loss
+
+    def update(self, value: float) -> Optional[float]:
+        rsi, self.avg_gain, self.avg_loss = self._next(value)
+        if self.previous is not None:
+            self.count += 1
+        self.previous = value
+        self.current = rsi
+        return rsi
+
+    def peek(self, value: float) -> Optional[float]:
+        return self._next(value)[0]
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.current
+
+    def to_dict(self) -> Dict:
+        return {
+            "period": self.period, "previous": self.previous, "count": self.count,
+            "avg_gain": self.avg_gain, "avg_loss": self.avg_loss, "current": self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RSI":
+        rsi = cls(state["period"])
+        rsi.previous, rsi.count = state["previous"], state["count"]
+        rsi.avg_gain, rsi.avg_loss, rsi.current = state["avg_gain"], state["avg_loss"], state["current"]
+        return rsi
+
+
+class MACD:
+    """MACD line, signal line and histogram built from three EMAs."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    @staticmethod
+    def _result(macd, signal):
+        if macd is None:
+            return None
+        return {"macd": macd, "signal": signal, "histogram": macd - signal if signal is not None else None}
+
+    def update(self, value: float) -> Optional[Dict]:
+        fast, slow = self.fast.update(value), self.slow.update(value)
+        if fast is None or slow is None:
+            return None
+        macd = fast - slow
+        return self._result(macd, self.signal.update(macd))
+
+    def peek(self, value: float) -> Optional[Dict]:
+        fast, slow = self.fast.peek(value), self.slow.peek(value)
+        if fast is None or slow is None:
+            return None
+        macd = fast - slow
+        return self._result(macd, self.signal.peek(macd))
+
+    @property
+    def value(self) -> Optional[Dict]:
+        if self.fast.value is None or self.slow.value is None:
+            return None
+        return self._result(self.fast.value - self.slow.value, self.signal.value)
+
+    def to_dict(self) -> Dict:
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(), "signal": self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "MACD":
+        macd = cls()
+        macd.fast, macd.slow = EMA.from_dict(state["fast"]), EMA.from_dict(state["slow"])
+        macd.signal = EMA.from_dict(state["signal"])
+        return macd
+
+
+class VWAP:
+    """Volume-weighted average price over the last window bars."""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.bars = deque(maxlen=window)
+        self.amount = 0.0
+        self.volume = 0.0
+
+    def update(self, amount: float, volume: float) -> Optional[float]:
+        if len(self.bars) == self.window:
+            old_amount, old_volume = self.bars[0]
+            self.amount -= old_amount
+            self.volume -= old_volume
+        self.bars.append((amount, volume))
+        self.amount += amount
+        self.volume += volume
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.amount / self.volume if self.volume else None
+
+    def to_dict(self) -> Dict:
+        return {"window": self.window, "bars": list(self.bars)}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "VWAP":
+        vwap = cls(state["window"])
+        for amount, volume in state["bars"]:
+            vwap.update(amount, volume)
+        return vwap
+
+
+class IndicatorSet:
+    """All indicators for one symbol, fed one daily bar at a time."""
+
+    SMA_WINDOWS = (5, 20, 60)
+
+    def __init__(self):
+        self.sma = {window: SMA(window) for window in self.SMA_WINDOWS}
+        self.rsi = RSI(14)
+        self.macd = MACD()
+        self.vwap = VWAP(20)
+        self.last_date = None
+        self.last_close = None
+
+    def update_bar(self, date: str, close: float, volume: float, amount: float) -> bool:
+        """Apply a bar; bars at or before the last applied date are ignored."""
+        if self.last_date is not None and date <= self.last_date:
+            return False
+        for sma in self.sma.values():
+            sma.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        # Eastmoney daily volume is in lots of 100 shares
+        self.vwap.update(amount, volume * 100)
+        self.last_date, self.last_close = date, close
+        return True
+
+    def snapshot(self, price: Optional[float] = None) -> Dict:
+        """Indicator values as of the last bar, or live if the current bar closed at price."""
+        if price is None:
+            values = {f"ma{w}": sma.value for w, sma in self.sma.items()}
+            values.update({"rsi14": self.rsi.value, "macd": self.macd.value})
+        else:
+            values = {f"ma{w}": sma.peek(price) for w, sma in self.sma.items()}
+            values.update({"rsi14": self.rsi.peek(price), "macd": self.macd.peek(price)})
+        values["vwap20"] = self.vwap.value
+        values["as_of"] = self.last_date
+        return values
+
+    def to_dict(self) -> Dict:
+        return {
+            "sma": [sma.to_dict() for sma in self.sma.values()],
+            "rsi": self.rsi.to_dict(),
+            "macd": self.macd.to_dict(),
+            "vwap": self.vwap.to_dict(),
+            "last_date": self.last_date,
+            "last_close": self.last_close,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "IndicatorSet":
+        indicators = cls()
+        indicators.sma = {s["window"]: SMA.from_dict(s) for s in state["sma"]}
+        indicators.rsi = RSI.from_dict(state["rsi"])
+        indicators.macd = MACD.from_dict(state["macd"])
+        indicators.vwap = VWAP.from_dict(state["vwap"])
+        indicators.last_date, indicators.last_close = state["last_date"], state["last_close"]
+        return indicators
+
+
+class IndicatorBook:
+    """In-memory indicator state for many symbols with per-symbol JSON checkpoints."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(CACHE_DIR, "indicators")
+        self.sets: Dict[str, IndicatorSet] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.json")
+
+    def load(self, symbol: str) -> Optional[IndicatorSet]:
+        try:
+            with open(self._path(symbol), encoding="utf-8") as f:
+                return IndicatorSet.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, symbol: str):
+        payload = json.dumps(self.sets[symbol].to_dict()).encode("utf-8")
+        atomic_write_bytes(self._path(symbol), payload)
+
+    def sync(self, symbol: str, bars, through: Optional[str] = None) -> IndicatorSet:
+        """Bring a symbol's state up to date with a daily bar frame (stock_zh_a_hist columns).
+
+        Only bars newer than the checkpoint and no later than through (the
+        last completed trading day, so an in-progress bar is never applied)
+        are applied. If the close at the checkpoint date no longer matches
+        the bars (a qfq re-adjustment), the state is rebuilt from the full
+        history.
+        """
+        with self._lock:
+            indicators = self.sets.get(symbol) or self.load(symbol)
+            dates = bars["日期"].astype(str).tolist()
+            closes = bars["收盘"].astype(float).tolist()
+
+            if indicators is not None and indicators.last_date is not None:
+                if indicators.last_date in dates:
+                    stored_close = closes[dates.index(indicators.last_date)]
+                    if abs(stored_close - indicators.last_close) > 1e-6:
+                        indicators = None
+                elif dates and indicators.last_date < dates[0]:
+                    indicators = None
+            if indicators is None:
+                indicators = IndicatorSet()
+
+            volumes = bars["成交量"].astype(float).tolist()
+            amounts = bars["成交额"].astype(float).tolist()
+            changed = False
+            for date, close, volume, amount in zip(dates, closes, volumes, amounts):
+                if through is not None and date > through:
+                    break
+                changed |= indicators.update_bar(date, close, volume, amount)
+
+            self.sets[symbol] = indicators
+            if changed:
+                self.save(symbol)
+            return indicators
+
+
+_book = IndicatorBook()
+
+
+def get_book() -> IndicatorBook:
+    return _book
@@ -0,0 +1,314 @@
+"""
+Memory Profiling
+
+Opt-in instrumentation for finding what makes a long-running process grow.
+Enabled with CN_FINANCE_MEMPROFILE=1 (or --memprofile on the service and
+the swarm CLI); otherwise every hook here is a no-op. Each request records:
+
+- how much traced memory it left behind after a full collection, and at
+  which of our source lines that memory was allocated (tracemalloc);
+- its traced peak and its peak RSS;
+- the types whose live object count grew, i.e. objects that survived it.
+
+A type that grows across several requests in a row is reported as a leak
+suspect. Tool calls record their retained and peak memory the same way:
+every agent the create_*_agent functions and the swarm build is
+instrumented, and tools called directly are wrapped in tool(). The
+summary is registered as the "memory" gauge, so it is written with the
+latency metrics after each query.
+
+Peaks are process-wide: concurrent tools share them, and requests are
+assumed to run one at a time per process, as in the worker pool. Taking
+snapshots and counting objects adds around a second per request in a
+process with the agents loaded, and tracing slows allocation throughout,
+which is why this is opt-in.
+"""
+
+import contextlib
+import gc
+import itertools
+import os
+import re
+import resource
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from . import metrics
+
+ENV = "CN_FINANCE_MEMPROFILE"
+
+# Stack depth stored per allocation, enough to get from library internals back to our code
+FRAMES = 25
+# Allocation sites and surviving types reported per request
+TOP = 10
+# Requests kept in full in the summary
+RECENT = 5
+# A type whose live count grew after this many consecutive requests is a leak suspect
+SUSPECT_STREAK = 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+def _rss_kb(field: str) -> int:
+    """VmRSS or VmHWM (the RSS high-water mark) in KB, from /proc on Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            return int(re.search(rf"{field}:\s+(\d+)", f.read()).group(1))
+    except (OSError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_high_water():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        # Not Linux, or not permitted: peaks are then for the process lifetime
+        pass
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    """Innermost frame in this repository's code, else the innermost frame."""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(ROOT) and "site-packages" not in frame.filename:
+            return f"{os.path.relpath(frame.filename, ROOT)}:{frame.lineno}"
+    frame = traceback[-1]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _traced_by_site() -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Traced bytes and blocks per allocation site.
+
+    Plain str -> int dicts, which the collector doesn't track, so holding
+    them across a request doesn't show up among its surviving objects.
+    """
+    sizes: Dict[str, int] = {}
+    blocks: Dict[str, int] = {}
+    for stat in tracemalloc.take_snapshot().statistics("traceback"):
+        site = _site(stat.traceback)
+        sizes[site] = sizes.get(site, 0) + stat.size
+        blocks[site] = blocks.get(site, 0) + stat.count
+    return sizes, blocks
+
+
+def _type_counts() -> Dict[str, int]:
+    """Live objects per type among those the collector tracks (containers and class instances)."""
+    counts = Counter(map(type, gc.get_objects()))
+    return {f"{cls.__module__}.{cls.__qualname__}": count for cls, count in counts.items()}
+
+
+class Profiler:
+    """Per-request and per-tool memory records for this process."""
+
+    def __init__(self):
+        self.requests: Dict[str, Dict] = {}
+        self.tools: Dict[str, Dict] = {}
+        self.recent = deque(maxlen=RECENT)
+        self.streaks = Counter()
+        # Open scopes (requests and tool calls) -> [traced peak, RSS high-water KB] seen while open
+        self._scopes: Dict[int, List[int]] = {}
+        self._tokens = itertools.count()
+        self._tool_calls: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(FRAMES)
+        metrics.gauge("memory", self.stats)
+
+    def _fold(self):
+        # One global peak and high-water mark serve every open scope: hand the
+        # peak since the last fold to all of them, then start a new interval
+        _, peak = tracemalloc.get_traced_memory()
+        high_water = _rss_kb("VmHWM")
+        tracemalloc.reset_peak()
+        _reset_high_water()
+        for scope in self._scopes.values():
+            scope[0] = max(scope[0], peak)
+            scope[1] = max(scope[1], high_water)
+
+    def open(self) -> tuple:
+        """Start a scope; returns (token, traced bytes, RSS KB) at the start."""
+        with self._lock:
+            self._fold()
+            traced, _ = tracemalloc.get_traced_memory()
+            rss = _rss_kb("VmRSS")
+            token = next(self._tokens)
+            self._scopes[token] = [traced, rss]
+            return token, traced, rss
+
+    def close(self, token: int) -> tuple:
+        """End a scope; returns (traced bytes now, traced peak, RSS KB now, RSS peak KB)."""
+        with self._lock:
+            self._fold()
+            peak, high_water = self._scopes.pop(token)
+            traced, _ = tracemalloc.get_traced_memory()
+            return traced, peak, _rss_kb("VmRSS"), high_water
+
+    @staticmethod
+    def _aggregate(table: Dict[str, Dict], name: str, seconds: float, retained: float, peak: float, rss_peak: float):
+        entry = table.setdefault(name, {
+            "count": 0, "seconds": 0.0, "retained_mb": 0.0, "max_retained_mb": 0.0, "max_peak_mb": 0.0, "max_rss_peak_mb": 0.0,
+        })
+        entry["count"] += 1
+        entry["seconds"] = round(entry["seconds"] + seconds, 3)
+        entry["retained_mb"] = round(entry["retained_mb"] + retained, 3)
+        entry["max_retained_mb"] = max(entry["max_retained_mb"], round(retained, 3))
+        entry["max_peak_mb"] = max(entry["max_peak_mb"], round(peak, 3))
+        entry["max_rss_peak_mb"] = max(entry["max_rss_peak_mb"], round(rss_peak, 3))
+
+    @contextlib.contextmanager
+    def request(self, kind: str):
+        gc.collect()
+        types_before = _type_counts()
+        sites_before = _traced_by_site()
+        token, traced_before, rss_before = self.open()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            _, peak, _, rss_peak = self.close(token)
+            # Whatever is still alive after a full collection outlived the request
+            gc.collect()
+            types_after = _type_counts()
+            traced_after, _ = tracemalloc.get_traced_memory()
+            rss_after = _rss_kb("VmRSS")
+            self._record(kind, seconds, traced_before, traced_after, peak, rss_before, rss_after, rss_peak,
+                         sites_before, _traced_by_site(), types_before, types_after)
+
+    def _record(self, kind, seconds, traced_before, traced_after, peak, rss_before, rss_after, rss_peak,
+                sites_before, sites_after, types_before, types_after):
+        growth = []
+        for site, size in sites_after[0].items():
+            old_size = sites_before[0].get(site, 0)
+            if size > old_size:
+                growth.append((size - old_size, sites_after[1][site] - sites_before[1].get(site, 0), site))
+        growth.sort(reverse=True)
+
+        survived = Counter(types_after)
+        survived.subtract(types_before)
+        survived = +survived
+        with self._lock:
+            for name in list(self.streaks):
+                if name not in survived:
+                    del self.streaks[name]
+            self.streaks.update(survived.keys())
+
+        retained = (traced_after - traced_before) / MB
+        record = {
+            "kind": kind,
+            "time": time.time(),
+            "seconds": round(seconds, 3),
+            "retained_mb": round(retained, 3),
+            "traced_peak_mb": round((peak - traced_before) / MB, 3),
+            "traced_mb": round(traced_after / MB, 3),
+            "rss_mb": round(rss_after / 1024, 1),
+            "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+            "rss_peak_mb": round((rss_peak - rss_before) / 1024, 1),
+            "hot_spots": [{"site": site, "retained_kb": round(size / 1024, 1), "blocks": blocks} for size, blocks, site in growth[:TOP]],
+            "survivors": dict(survived.most_common(TOP)),
+        }
+        self._aggregate(self.requests, kind, seconds, retained, record["traced_peak_mb"], record["rss_peak_mb"])
+        self.recent.append(record)
+        metrics.incr("memprofile.requests")
+
+    @contextlib.contextmanager
+    def tool(self, name: str):
+        """Record a tool called directly rather than through an instrumented agent."""
+        call = object()
+        self.tool_started(call, name)
+        try:
+            yield
+        finally:
+            self.tool_finished(call)
+
+    def tool_started(self, tool_use_id: Hashable, name: str):
+        token, traced, rss = self.open()
+        self._tool_calls[tool_use_id] = (token, name, time.perf_counter(), traced, rss)
+
+    def tool_finished(self, tool_use_id: Hashable):
+        started = self._tool_calls.pop(tool_use_id, None)
+        if started is None:
+            return
+        token, name, started_at, traced_before, rss_before = started
+        traced, peak, _, rss_peak = self.close(token)
+        self._aggregate(
+            self.tools, name, time.perf_counter() - started_at,
+            (traced - traced_before) / MB, (peak - traced_before) / MB, (rss_peak - rss_before) / 1024,
+        )
+
+    def stats(self) -> Dict:
+        traced, _ = tracemalloc.get_traced_memory()
+        return {
+            "traced_mb": round(traced / MB, 1),
+            "rss_mb": round(_rss_kb("VmRSS") / 1024, 1),
+            "requests": self.requests,
+            "tools": self.tools,
+            "leak_suspects": sorted(name for name, streak in self.streaks.items() if streak >= SUSPECT_STREAK),
+            "recent": list(self.recent),
+        }
+
+
+class ToolHooks:
+    """strands hook provider recording memory around each tool call."""
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    def register_hooks(self, registry, **kwargs):
+        from strands.hooks import AfterToolCallEvent, BeforeToolCallEvent
+
+        registry.add_callback(BeforeToolCallEvent, self._before)
+        registry.add_callback(AfterToolCallEvent, self._after)
+
+    def _before(self, event):
+        self.profiler.tool_started(event.tool_use["toolUseId"], event.tool_use["name"])
+
+    def _after(self, event):
+        self.profiler.tool_finished(event.tool_use["toolUseId"])
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.environ.get(ENV, "") not in ("", "0")
+
+
+def enable():
+    """Turn profiling on for this process and the worker processes it starts."""
+    os.environ[ENV] = "1"
+
+
+def get_profiler() -> Optional[Profiler]:
+    global _profiler
+    if not enabled():
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+    return _profiler
+
+
+def request(kind: str):
+    """Context manager recording one request's memory when profiling is on."""
+    profiler = get_profiler()
+    return profiler.request(kind) if profiler else contextlib.nullcontext()
+
+
+def tool(name: str):
+    """Context manager recording one direct tool call's memory when profiling is on."""
+    profiler = get_profiler()
+    return profiler.tool(name) if profiler else contextlib.nullcontext()
+
+
+def instrument(agent):
+    """Record memory around the agent's tool calls when profiling is on."""
+    profiler = get_profiler()
+    if profiler is not None:
+        agent.hooks.add_hook(ToolHooks(profiler))
+    return agent
@@ -0,0 +1,118 @@
+"""
+Process Metrics
+
+A small in-process registry of counters, latency timings and gauges. The
+agents record into it while they run and write a JSON snapshot to the cache
+directory after each query, so operational state (latencies, breaker
+states, hedge rates) can be inspected without attaching to the process.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from .cache import CACHE_DIR, atomic_write_bytes
+
+METRICS_DIR = os.path.join(CACHE_DIR, "metrics")
+
+
+def percentile(ordered, q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Registry:
+    """Counters, timings (last `window` samples per name) and gauges."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.counters: Dict[str, float] = {}
+        self.timings: Dict[str, deque] = {}
+        self.gauges: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self.timings:
+                self.timings[name] = deque(maxlen=self.window)
+            self.timings[name].append(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def gauge(self, name: str, read: Callable[[], Any]):
+        """Register a value that is read when a snapshot is taken."""
+        with self._lock:
+            self.gauges[name] = read
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {name: sorted(samples) for name, samples in self.timings.items()}
+            gauges = dict(self.gauges)
+        return {
+            "time": time.time(),
+            "pid": os.getpid(),
+            "counters": counters,
+            "timings": {
+                name: {
+                    "count": len(samples),
+                    "p50": percentile(samples, 0.5),
+                    "p95": percentile(samples, 0.95),
+                    "max": samples[-1] if samples else None,
+                }
+                for name, samples in timings.items()
+            },
+            "gauges": {name: read() for name, read in gauges.items()},
+        }
+
+    def write(self, path: Optional[str] = None) -> str:
+        """Write the snapshot as JSON, by default to one file per process."""
+        path = path or os.path.join(METRICS_DIR, f"metrics-{os.getpid()}.json")
+        atomic_write_bytes(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2, default=str).encode("utf-8"))
+        return path
+
+
+_registry = Registry()
+
+
+def get_registry() -> Registry:
+    return _registry
+
+
+def incr(name: str, value: float = 1):
+    _registry.incr(name, value)
+
+
+def observe(name: str, seconds: float):
+    _registry.observe(name, seconds)
+
+
+def timer(name: str):
+    return _registry.timer(name)
+
+
+def gauge(name: str, read: Callable[[], Any]):
+    _registry.gauge(name, read)
+
+
+def snapshot() -> Dict:
+    return _registry.snapshot()
+
+
+def write(path: Optional[str] = None) -> str:
+    return _registry.write(path)
@@ -0,0 +1,206 @@
+"""
+Industry Peers
+
+Compares a stock with the other members of its Eastmoney industry board.
+Peer metrics come from two bulk endpoints, the spot snapshot (valuation)
+and the results report (growth and profitability), fetched concurrently
+once rather than per peer. Each board's distribution is built once a day
+as sorted arrays per metric, so a percentile rank is a binary search;
+precompute() builds every board ahead of time for the cache warmer.
+"""
+
+import difflib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import common, datasources, deadline
+from .cache import DiskCache
+
+# Metric -> column in the spot snapshot or the results report
+METRICS = {
+    "pe": "市盈率-动态",
+    "pb": "市净率",
+    "market_cap": "总市值",
+    "revenue_growth": "营业总收入-同比增长",
+    "profit_growth": "净利润-同比增长",
+    "roe": "净资产收益率",
+    "gross_margin": "销售毛利率",
+}
+
+# A negative P/E or P/B means losses or negative equity, not a cheap valuation
+POSITIVE_ONLY = ("pe", "pb")
+
+# Largest members by market value listed with each comparison
+LEADERS = 5
+
+# Rebuilt with the results data, once a day after the evening update
+is_fresh = datasources.FRESHNESS["financial_indicator"]
+
+_BOARD_SUFFIX = re.compile(r"(行业|板块|[ⅠⅡⅢ]+|[IVX]+)$")
+
+
+@dataclass
+class Distribution:
+    """Sorted metric values across one industry board's members, NaNs dropped."""
+
+    board: str
+    codes: List[str]
+    values: Dict[str, np.ndarray]
+    leaders: List[Dict]
+
+    def percentile(self, metric: str, value: float) -> Optional[float]:
+        """Share of peers at or below the value, 0-100."""
+        values = self.values.get(metric)
+        if values is None or not len(values) or value is None or np.isnan(value):
+            return None
+        return round(100.0 * np.searchsorted(values, value, side="right") / len(values), 1)
+
+    def summary(self, metric: str) -> Optional[Dict]:
+        values = self.values.get(metric)
+        if values is None or not len(values):
+            return None
+        p25, median, p75 = np.quantile(values, [0.25, 0.5, 0.75])
+        return {"p25": round(float(p25), 2), "median": round(float(median), 2), "p75": round(float(p75), 2), "peers": len(values)}
+
+
+# board -> (distribution, built_at)
+_distributions: Dict[str, Tuple[Distribution, float]] = {}
+
+
+def peer_table(refresh: bool = False) -> pd.DataFrame:
+    """Metrics of every A-share indexed by 6-digit code, with a name column."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        spot = deadline.submit(pool, datasources.spot_quotes, refresh=refresh)
+        report = deadline.submit(pool, datasources.performance_report, refresh=refresh)
+        spot, report = spot.result(), report.result()
+
+    valuation = spot.set_index(spot["代码"].astype(str))[["名称", METRICS["pe"], METRICS["pb"], METRICS["market_cap"]]]
+    results = report.set_index(report["股票代码"].astype(str))
+    results = results[~results.index.duplicated(keep="last")]
+    table = valuation.join(results[[METRICS[m] for m in ("revenue_growth", "profit_growth", "roe", "gross_margin")]], how="left")
+    table = table.rename(columns={column: metric for metric, column in METRICS.items()}).rename(columns={"名称": "name"})
+    for metric in METRICS:
+        table[metric] = pd.to_numeric(table[metric], errors="coerce")
+    for metric in POSITIVE_ONLY:
+        table.loc[table[metric] <= 0, metric] = np.nan
+    return table
+
+
+def build(board: str, members: Iterable[str], table: pd.DataFrame) -> Distribution:
+    """Distribution of the members' metrics, looked up in a peer_table()."""
+    codes = [str(code) for code in members]
+    peers = table.reindex(codes)
+    values = {}
+    for metric in METRICS:
+        column = peers[metric].to_numpy(dtype=np.float64)
+        values[metric] = np.sort(column[~np.isnan(column)])
+    leaders = peers.dropna(subset=["market_cap"]).nlargest(LEADERS, "market_cap")
+    return Distribution(
+        board=board,
+        codes=codes,
+        values=values,
+        leaders=[
+            {"code": code, "name": row["name"], **{m: None if pd.isna(row[m]) else round(float(row[m]), 2) for m in METRICS}}
+            for code, row in leaders.iterrows()
+        ],
+    )
+
+
+def _members(board: str, refresh: bool = False) -> List[str]:
+    return datasources.industry_constituents(board, refresh=refresh)["代码"].astype(str).tolist()
+
+
+def distribution(board: str, table: Optional[pd.DataFrame] = None, refresh: bool = False) -> Distribution:
+    """The board's distribution from memory, the disk cache or built from fresh data."""
+    entry = _distributions.get(board)
+    if entry is not None and not refresh and is_fresh(entry[1]):
+        return entry[0]
+
+    def fill():
+        return build(board, _members(board, refresh), table if table is not None else peer_table(refresh))
+
+    built = DiskCache("peer_distributions").cached(board, fill, refresh=refresh, is_fresh=is_fresh)
+    _distributions[board] = (built, time.time())
+    return built
+
+
+def precompute(boards: Optional[Iterable[str]] = None, workers: int = 8, refresh: bool = False) -> int:
+    """Build the distributions of the given boards (default: all), fetching members concurrently."""
+    boards = list(boards) if boards is not None else board_names()
+    table = peer_table(refresh)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [deadline.submit(pool, distribution, board, table, refresh) for board in boards]
+        built = 0
+        for board, future in zip(boards, futures):
+            try:
+                future.result()
+                built += 1
+            except Exception as e:
+                print(f"Failed to build peer distribution for {board}: {str(e)}")
+    return built
+
+
+def board_names() -> List[str]:
+    return datasources.industry_boards()["板块名称"].astype(str).tolist()
+
+
+def resolve_board(industry: str) -> Optional[str]:
+    """Eastmoney board for an industry name, which may come from another classification (e.g. Xueqiu's)."""
+    names = board_names()
+    if industry in names:
+        return industry
+
+    def normalize(name: str) -> str:
+        return _BOARD_SUFFIX.sub("", name.strip())
+
+    target = normalize(industry)
+    if not target:
+        return None
+    normalized = {normalize(name): name for name in names}
+    if target in normalized:
+        return normalized[target]
+    contained = [name for key, name in normalized.items() if key and (key in target or target in key)]
+    if contained:
+        return min(contained, key=len)
+    close = difflib.get_close_matches(target, list(normalized), n=1, cutoff=0.5)
+    return normalized[close[0]] if close else None
+
+
+def compare(ticker: str, industry: Optional[str] = None) -> Dict:
+    """The stock's metrics ranked within its industry board."""
+    code = common.short_stock_code(ticker)
+    if not industry:
+        industry = datasources.company_profile(common.format_stock_code(ticker)).get("industry")
+        if not industry:
+            raise ValueError(f"No industry on record for {ticker}")
+    board = resolve_board(industry)
+    if board is None:
+        raise ValueError(f"No Eastmoney industry board matches {industry}")
+
+    table = peer_table()
+    peers = distribution(board, table)
+    row = table.loc[code] if code in table.index else None
+    metrics = {}
+    for metric in METRICS:
+        value = None if row is None or pd.isna(row[metric]) else float(row[metric])
+        metrics[metric] = {
+            "value": None if value is None else round(value, 2),
+            "percentile": None if value is None else peers.percentile(metric, value),
+            **(peers.summary(metric) or {}),
+        }
+    return {
+        "symbol": code,
+        "name": None if row is None else row["name"],
+        "industry": industry,
+        "board": board,
+        "members": len(peers.codes),
+        "in_board": code in peers.codes,
+        "metrics": metrics,
+        "largest_peers": peers.leaders,
+    }
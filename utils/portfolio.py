@@ -0,0 +1,268 @@
+"""
+Portfolio Risk
+
+Risk statistics for a basket of A-share symbols from the local bar store.
+Closes are aligned on the benchmark index's trading days into one returns
+matrix (days x symbols), and everything is computed on that matrix at
+once: pairwise covariance and correlation, full-period and rolling beta,
+historical and parametric VaR with expected shortfall, and drawdowns.
+Symbols that were suspended on a day carry their last close; days before a
+symbol listed are missing and left out of its statistics.
+"""
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import bar_store, symbols
+
+DEFAULT_BENCHMARK = "SH000300"
+TRADING_DAYS = 252
+
+
+@dataclass
+class ReturnMatrix:
+    """Daily simple returns aligned on the benchmark's trading days; NaN where a symbol has no price yet."""
+
+    days: np.ndarray  # int32 day numbers
+    symbols: List[str]
+    returns: np.ndarray  # days x symbols
+    benchmark: np.ndarray  # days
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.days.astype("datetime64[D]")
+
+
+def align(days: np.ndarray, symbol_days: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """Closes on the given days, carrying the last close over suspensions; NaN before the first bar."""
+    if not len(symbol_days):
+        return np.full(len(days), np.nan)
+    idx = np.searchsorted(symbol_days, days, side="right") - 1
+    aligned = closes[np.clip(idx, 0, None)]
+    aligned[idx < 0] = np.nan
+    return aligned
+
+
+def load_returns(
+    tickers: Sequence[str],
+    benchmark: str = DEFAULT_BENCHMARK,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    store: Optional[bar_store.BarStore] = None,
+) -> ReturnMatrix:
+    """Forward-adjusted daily returns for the tickers and the benchmark from the bar store."""
+    store = store or bar_store.get_store()
+    days, bench_closes = store.closes(benchmark, adjust="", start_date=start_date, end_date=end_date)
+    if len(days) < 2:
+        raise ValueError(f"Not enough benchmark bars for {benchmark}")
+
+    codes = [symbols.classify(t).code for t in tickers]
+    prices = np.empty((len(days), len(codes)))
+    for i, ticker in enumerate(tickers):
+        prices[:, i] = align(days, *store.closes(ticker, adjust="qfq", start_date=start_date, end_date=end_date))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = prices[1:] / prices[:-1] - 1
+    return ReturnMatrix(days[1:], codes, returns, bench_closes[1:] / bench_closes[:-1] - 1)
+
+
+def pairwise_cov(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(covariance, correlation, overlap days) over the days both symbols have returns, as matrix products."""
+    present = (~np.isnan(returns)).astype(np.float64)
+    x = np.nan_to_num(returns)
+    n = present.T @ present
+    sum_x = x.T @ present  # [i, j]: sum of i's returns on days j also has one
+    sum_xx = (x * x).T @ present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (x.T @ x - sum_x * sum_x.T / n) / (n - 1)
+        var = (sum_xx - sum_x * sum_x / n) / (n - 1)
+        corr = cov / np.sqrt(var * var.T)
+    cov[n < 2] = np.nan
+    corr[n < 2] = np.nan
+    return cov, np.clip(corr, -1.0, 1.0), n
+
+
+def betas(returns: np.ndarray, benchmark: np.ndarray) -> np.ndarray:
+    """Full-period beta of each column against the benchmark."""
+    present = ~np.isnan(returns)
+    x, b = np.nan_to_num(returns), np.where(present, benchmark[:, None], 0.0)
+    n = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (x * b).sum(axis=0) - x.sum(axis=0) * b.sum(axis=0) / n
+        var = (b * b).sum(axis=0) - b.sum(axis=0) ** 2 / n
+        return np.where(n > 1, cov / var, np.nan)
+
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int = 60) -> np.ndarray:
+    """Beta over each trailing window (days x symbols) from windowed cumulative sums; NaN until a full window."""
+    present = (~np.isnan(returns)).astype(np.float64)
+    x = np.nan_to_num(returns)
+    b = benchmark[:, None] * present
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        total = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+        return total[window:] - total[:-window]
+
+    n, sx, sb = windowed(present), windowed(x), windowed(b)
+    sxb, sbb = windowed(x * b), windowed(b * b)
+    result = np.full(returns.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxb - sx * sb / n) / (sbb - sb * sb / n)
+    result[window - 1:] = np.where(n >= window, beta, np.nan)
+    return result
+
+
+def historical_var(returns: np.ndarray, level: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """(VaR, expected shortfall) per column as positive one-day loss fractions."""
+    # One sort serves every column; np.nanquantile would loop over the columns in Python
+    ordered = np.sort(returns, axis=0)  # NaNs sort last
+    counts = (~np.isnan(returns)).sum(axis=0)
+    position = (counts - 1) * (1 - level)
+    lower = np.clip(np.floor(position).astype(int), 0, None)
+    upper = np.clip(np.ceil(position).astype(int), 0, None)
+    columns = np.arange(returns.shape[1])
+    cutoff = ordered[lower, columns] + (ordered[upper, columns] - ordered[lower, columns]) * (position - lower)
+    # Expected shortfall: mean of the returns at or below the cutoff
+    tail = np.where(ordered <= cutoff, ordered, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shortfall = tail.sum(axis=0) / (ordered <= cutoff).sum(axis=0)
+    cutoff[counts == 0] = np.nan
+    shortfall[counts == 0] = np.nan
+    return -cutoff, -shortfall
+
+
+def parametric_var(returns: np.ndarray, level: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """(VaR, expected shortfall) per column under a normal model."""
+    mu, sigma = np.nanmean(returns, axis=0), np.nanstd(returns, axis=0, ddof=1)
+    z = NormalDist().inv_cdf(1 - level)
+    shortfall = -mu + sigma * NormalDist().pdf(z) / (1 - level)
+    return -(mu + z * sigma), shortfall
+
+
+def drawdowns(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(drawdown path, maximum drawdown, index of the trough) per column, drawdowns as negative fractions."""
+    wealth = np.cumprod(1 + np.nan_to_num(returns), axis=0)
+    peak = np.maximum.accumulate(wealth, axis=0)
+    path = wealth / peak - 1
+    return path, path.min(axis=0), path.argmin(axis=0)
+
+
+def parse_weights(text: str) -> Tuple[List[str], Optional[np.ndarray]]:
+    """'600519:0.4, 000858:0.6' or '600519 000858' -> (tickers, weights or None for equal weights)."""
+    tickers, weights = [], []
+    for part in text.replace("，", ",").replace(",", " ").split():
+        ticker, _, weight = part.partition(":")
+        tickers.append(ticker)
+        weights.append(float(weight) if weight else None)
+    if all(w is None for w in weights):
+        return tickers, None
+    if any(w is None for w in weights):
+        raise ValueError("Give a weight for every ticker or for none")
+    return tickers, np.array(weights, dtype=float)
+
+
+def analyze(
+    matrix: ReturnMatrix,
+    weights: Optional[np.ndarray] = None,
+    window: int = 60,
+    levels: Sequence[float] = (0.95, 0.99),
+    top_pairs: int = 5,
+) -> Dict:
+    """Portfolio and per-symbol risk summary, small enough to hand to an agent."""
+    returns, bench = matrix.returns, matrix.benchmark
+    count = returns.shape[1]
+    weights = np.full(count, 1.0 / count) if weights is None else weights / weights.sum()
+    # A symbol without a price yet contributes nothing that day
+    portfolio = np.nan_to_num(returns) @ weights
+    both = np.column_stack([portfolio, bench])
+
+    cov, corr, overlap = pairwise_cov(returns)
+    beta = betas(returns, bench)
+    latest_beta = rolling_beta(returns, bench, window)[-1] if len(returns) >= window else np.full(count, np.nan)
+    portfolio_beta = rolling_beta(both[:, :1], bench, window)[:, 0] if len(returns) >= window else np.array([np.nan])
+    path, max_dd, trough = drawdowns(np.column_stack([returns, both]))
+    vol = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+
+    risk = {}
+    for level in levels:
+        hist_var, hist_es = historical_var(np.column_stack([returns, portfolio]), level)
+        norm_var, norm_es = parametric_var(np.column_stack([returns, portfolio]), level)
+        risk[f"{level:.0%}"] = {"hist": (hist_var, hist_es), "normal": (norm_var, norm_es)}
+
+    def pct(value) -> Optional[float]:
+        return None if value is None or np.isnan(value) else round(float(value) * 100, 2)
+
+    def num(value) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 3)
+
+    dates = matrix.dates
+    summary = {
+        "period": {"start": str(dates[0]), "end": str(dates[-1]), "days": len(dates)},
+        "portfolio": {
+            "annual_return_pct": pct((1 + portfolio).prod() ** (TRADING_DAYS / len(portfolio)) - 1),
+            "annual_volatility_pct": pct(portfolio.std(ddof=1) * np.sqrt(TRADING_DAYS)),
+            "beta": num(betas(portfolio[:, None], bench)[0]),
+            "rolling_beta": {
+                "window": window,
+                "latest": num(portfolio_beta[-1]),
+                "min": num(np.nanmin(portfolio_beta)) if not np.isnan(portfolio_beta).all() else None,
+                "max": num(np.nanmax(portfolio_beta)) if not np.isnan(portfolio_beta).all() else None,
+            },
+            "max_drawdown_pct": pct(max_dd[count]),
+            "max_drawdown_date": str(dates[trough[count]]),
+            "current_drawdown_pct": pct(path[-1, count]),
+            "benchmark_max_drawdown_pct": pct(max_dd[count + 1]),
+            "var": {
+                level: {
+                    "historical_pct": pct(values["hist"][0][count]),
+                    "historical_es_pct": pct(values["hist"][1][count]),
+                    "parametric_pct": pct(values["normal"][0][count]),
+                    "parametric_es_pct": pct(values["normal"][1][count]),
+                }
+                for level, values in risk.items()
+            },
+        },
+        "symbols": [
+            {
+                "symbol": code,
+                "weight": round(float(weights[i]), 4),
+                "annual_volatility_pct": pct(vol[i]),
+                "beta": num(beta[i]),
+                "rolling_beta": num(latest_beta[i]),
+                "max_drawdown_pct": pct(max_dd[i]),
+                **{f"var_{level}_pct": pct(values["hist"][0][i]) for level, values in risk.items()},
+            }
+            for i, code in enumerate(matrix.symbols)
+        ],
+    }
+
+    off_diagonal = np.triu(np.ones((count, count), dtype=bool), k=1) & ~np.isnan(corr)
+    if count <= 10:
+        summary["correlation"] = {
+            a: {b: num(corr[i, j]) for j, b in enumerate(matrix.symbols)} for i, a in enumerate(matrix.symbols)
+        }
+    elif off_diagonal.any():
+        # Too many pairs to list; the strongest and weakest say more than the full matrix
+        rows, cols = np.nonzero(off_diagonal)
+        values = corr[rows, cols]
+        order = np.argsort(values)
+
+        def pairs(indices) -> List[Dict]:
+            return [
+                {"pair": [matrix.symbols[rows[k]], matrix.symbols[cols[k]]], "correlation": num(values[k]), "days": int(overlap[rows[k], cols[k]])}
+                for k in indices
+            ]
+
+        summary["correlation"] = {
+            "average": num(values.mean()),
+            "most_correlated": pairs(order[::-1][:top_pairs]),
+            "least_correlated": pairs(order[:top_pairs]),
+        }
+    # Diversification: portfolio volatility against the weighted sum of standalone volatilities
+    portfolio_var = float(np.nansum(weights[:, None] * np.nan_to_num(cov) * weights[None, :]))
+    standalone = float(np.nansum(weights * np.sqrt(np.diag(np.nan_to_num(cov)))))
+    if standalone:
+        summary["portfolio"]["diversification_ratio"] = round(standalone / np.sqrt(portfolio_var), 3) if portfolio_var > 0 else None
+    return summary
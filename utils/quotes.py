@@ -0,0 +1,199 @@
+"""
+Real-Time Quote Ingestion
+
+Polls Eastmoney's bulk spot endpoint during trading sessions and keeps the
+recent ticks of every symbol in preallocated ring buffers. Each field is one
+(symbols x capacity) NumPy array, so memory is fixed up front for the whole
+universe and a full-market snapshot is written with a handful of vectorized
+assignments.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .datasources import FRESHNESS, spot_quotes
+from .trading_calendar import get_calendar
+
+# Per-tick history kept in the ring buffers
+TICK_FIELDS = {
+    "timestamp": np.uint32,
+    "price": np.float32,
+    "volume": np.int64,
+    "amount": np.float64,
+}
+
+# Only the latest value is kept for these snapshot fields
+LATEST_FIELDS = {
+    "change_percent": np.float32,
+    "open": np.float32,
+    "high": np.float32,
+    "low": np.float32,
+    "previous_close": np.float32,
+}
+
+# Eastmoney spot column for each stored field
+SPOT_COLUMNS = {
+    "price": "最新价",
+    "volume": "成交量",
+    "amount": "成交额",
+    "change_percent": "涨跌幅",
+    "open": "今开",
+    "high": "最高",
+    "low": "最低",
+    "previous_close": "昨收",
+}
+
+
+class QuoteStore:
+    """Fixed-size tick ring buffers for a universe of symbols."""
+
+    def __init__(self, capacity: int = 240, max_symbols: int = 6000):
+        self.capacity = capacity
+        self.index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(max_symbols)
+
+    def _allocate(self, rows: int):
+        old = (self.ticks, self.latest, self.heads, self.counts) if hasattr(self, "ticks") else None
+        self.ticks = {name: np.zeros((rows, self.capacity), dtype=dtype) for name, dtype in TICK_FIELDS.items()}
+        self.latest = {name: np.full(rows, np.nan, dtype=dtype) for name, dtype in LATEST_FIELDS.items()}
+        self.heads = np.zeros(rows, dtype=np.int32)
+        self.counts = np.zeros(rows, dtype=np.int32)
+        if old is not None:
+            # Only reached when the universe outgrows max_symbols
+            used = len(self.index)
+            for name in TICK_FIELDS:
+                self.ticks[name][:used] = old[0][name][:used]
+            for name in LATEST_FIELDS:
+                self.latest[name][:used] = old[1][name][:used]
+            self.heads[:used] = old[2][:used]
+            self.counts[:used] = old[3][:used]
+
+    def _rows(self, symbols) -> np.ndarray:
+        rows = np.empty(len(symbols), dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            row = self.index.get(symbol)
+            if row is None:
+                row = len(self.index)
+                if row >= len(self.heads):
+                    self._allocate(len(self.heads) * 2)
+                self.index[symbol] = row
+            rows[i] = row
+        return rows
+
+    def ingest(self, frame, timestamp: Optional[float] = None) -> int:
+        """Append one spot snapshot (a stock_zh_a_spot_em frame); returns rows written."""
+        frame = frame.dropna(subset=[SPOT_COLUMNS["price"]])
+        timestamp = int(timestamp or time.time())
+        with self._lock:
+            rows = self._rows(frame["代码"].astype(str).tolist())
+            pos = self.heads[rows]
+            self.ticks["timestamp"][rows, pos] = timestamp
+            for name in ("price", "volume", "amount"):
+                values = frame[SPOT_COLUMNS[name]].fillna(0).to_numpy()
+                self.ticks[name][rows, pos] = values.astype(TICK_FIELDS[name])
+            for name in LATEST_FIELDS:
+                self.latest[name][rows] = frame[SPOT_COLUMNS[name]].to_numpy(dtype=np.float32)
+            self.heads[rows] = (pos + 1) % self.capacity
+            self.counts[rows] = np.minimum(self.counts[rows] + 1, self.capacity)
+        return len(rows)
+
+    def last(self, symbol: str) -> Optional[Dict]:
+        """Most recent tick and snapshot fields for a symbol."""
+        with self._lock:
+            row = self.index.get(symbol)
+            if row is None or self.counts[row] == 0:
+                return None
+            pos = (self.heads[row] - 1) % self.capacity
+            quote = {name: self.ticks[name][row, pos].item() for name in TICK_FIELDS}
+            quote.update({name: self.latest[name][row].item() for name in LATEST_FIELDS})
+        return quote
+
+    def history(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Ticks for a symbol in arrival order, oldest first."""
+        with self._lock:
+            row = self.index.get(symbol)
+            if row is None:
+                return {name: np.empty(0, dtype=dtype) for name, dtype in TICK_FIELDS.items()}
+            count, head = int(self.counts[row]), int(self.heads[row])
+            order = (np.arange(head - count, head) % self.capacity)
+            return {name: self.ticks[name][row, order].copy() for name in TICK_FIELDS}
+
+    def nbytes(self) -> int:
+        arrays = list(self.ticks.values()) + list(self.latest.values()) + [self.heads, self.counts]
+        return sum(a.nbytes for a in arrays)
+
+
+class QuotePoller(threading.Thread):
+    """Background thread that ingests the bulk spot snapshot while the market is open."""
+
+    def __init__(self, store: QuoteStore, interval: float = 10.0, fetch=None):
+        super().__init__(name="quote-poller", daemon=True)
+        self.store = store
+        self.interval = interval
+        self.fetch = fetch or _fetch_spot
+        self.stop_event = threading.Event()
+        self.last_poll = None
+
+    def poll_once(self) -> int:
+        started = time.time()
+        frame = self.fetch()
+        written = self.store.ingest(frame, started)
+        self.last_poll = started
+        return written
+
+    def due(self) -> bool:
+        """Poll while trading, once at start, and once more after each session's settle window.
+
+        The last in-session snapshot predates the closing call auction, so
+        without the settled one the store would report the pre-auction price
+        as the close.
+        """
+        return get_calendar().is_open() or self.last_poll is None or not FRESHNESS["spot"](self.last_poll)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.due():
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    print(f"Error polling spot quotes: {str(e)}")
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def _fetch_spot():
+    # refresh while trading, otherwise reuse the closing snapshot once it has settled
+    return spot_quotes(refresh=get_calendar().is_open())
+
+
+_store = QuoteStore()
+_poller = None
+
+
+def get_store() -> QuoteStore:
+    return _store
+
+
+def start_polling(interval: float = 10.0) -> QuotePoller:
+    """Start the process-wide poller once; later calls return the running one."""
+    global _poller
+    if _poller is None or not _poller.is_alive():
+        _poller = QuotePoller(_store, interval)
+        _poller.start()
+    return _poller
+
+
+def latest_quote(symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+    """Latest in-memory quote, or None if missing or older than max_age seconds while trading."""
+    quote = _store.last(symbol)
+    if quote is None:
+        return None
+    if max_age is not None and get_calendar().is_open() and time.time() - quote["timestamp"] > max_age:
+        return None
+    return quote
@@ -0,0 +1,86 @@
+"""
+Provider Rate Limits
+
+Token buckets that keep our request rate under what each upstream data
+provider tolerates before it starts returning empty frames or blocking us.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from . import deadline
+
+# Sustained requests per second and burst size for each upstream provider
+PROVIDER_LIMITS = {
+    "eastmoney": (5.0, 5),
+    "xueqiu": (2.0, 2),
+    "sina": (2.0, 2),
+    "tencent": (2.0, 2),
+    "yahoo": (2.0, 4),
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent, but not past the request deadline."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            left = deadline.remaining()
+            if left is not None and wait > left:
+                raise deadline.DeadlineExceeded("Deadline exceeded waiting for the provider rate limit")
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+_share = 1.0
+
+
+def set_share(fraction: float):
+    """Give this process only a fraction of each provider's budget.
+
+    Worker processes each call this with 1 / workers so that together they
+    stay within the providers' sustained rates. Bursts can't be split below
+    one request per process: with more workers than a provider's burst size
+    (xueqiu's 2 over 4 workers), their combined burst after an idle spell is
+    one request per worker, above the provider's burst, though the rate they
+    settle into stays within the limit.
+    """
+    global _share
+    with _limiters_lock:
+        _share = fraction
+        _limiters.clear()
+
+
+def get_limiter(provider: str) -> RateLimiter:
+    """Process-wide limiter for a provider."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate, burst = PROVIDER_LIMITS.get(provider, (1.0, 1))
+            # At least one token, or the process could never send; see set_share
+            _limiters[provider] = RateLimiter(rate * _share, max(1, int(burst * _share)))
+        return _limiters[provider]
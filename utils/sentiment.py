@@ -0,0 +1,255 @@
+"""
+News Sentiment Scoring
+
+Batch sentiment scoring for the items returned by get_stock_news. Scores are
+cached on disk by article content hash, so an article is only scored once no
+matter how many times it shows up in later queries.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .cache import CACHE_DIR
+
+POSITIVE_WORDS = [
+    "上涨", "大涨", "涨停", "增长", "增持", "回购", "利好", "盈利", "扭亏", "超预期", "新高",
+    "突破", "分红", "中标", "签约", "买入", "推荐", "看好", "上调", "提升", "创新高", "获批",
+    "走强", "反弹", "净流入", "景气", "稳健", "领先",
+    "beat", "beats", "surge", "surges", "gain", "gains", "growth", "upgrade", "upgraded",
+    "record", "profit", "bullish", "outperform", "buy", "rally", "strong",
+]
+
+NEGATIVE_WORDS = [
+    "下跌", "大跌", "暴跌", "跌停", "下滑", "减持", "利空", "亏损", "预亏", "不及预期", "未达预期", "低于预期", "新低",
+    "跌破", "违规", "处罚", "立案", "诉讼", "风险", "卖出", "下调", "质押", "退市", "冻结",
+    "走弱", "净流出", "承压", "爆雷", "问询", "警示",
+    "miss", "misses", "plunge", "plunges", "loss", "losses", "downgrade", "downgraded",
+    "lawsuit", "probe", "bearish", "underperform", "sell", "weak", "decline", "falls",
+]
+
+NEGATORS = ["不", "未", "没有", "无", "非", "not", "no", "never"]
+
+# Words that start with a negator character but don't negate what follows
+NOT_NEGATING = ["非常", "无论", "无疑", "无不", "不断", "不仅", "不少", "不过", "未来"]
+
+# Disclaimers appended to most CN financial news ("风险提示：投资有风险"), which say nothing about the
+# story; a marker drops the rest of its line
+BOILERPLATE = re.compile(
+    r"(?:风险提示|免责声明|特别声明|特别提示)\s*[:：][^\n]*|(?:投资|股市|入市)有风险[，,]?\s*(?:投资|入市)?(?:需|须)谨慎[。.!！]?"
+)
+
+INTENSIFIERS = {"大幅": 1.5, "显著": 1.5, "持续": 1.2, "非常": 1.5, "sharply": 1.5, "significantly": 1.5}
+
+
+def _term_pattern(words: Iterable[str]) -> re.Pattern:
+    """Alternation of the words, longest first; English words only match whole words."""
+    terms = sorted(words, key=len, reverse=True)
+    return re.compile(
+        "|".join(rf"\b{re.escape(term)}\b" if term.isascii() else re.escape(term) for term in terms),
+        re.IGNORECASE,
+    )
+
+
+def content_hash(item: Dict) -> str:
+    """Hash the text of a news item so identical articles share a cache entry."""
+    text = f"{item.get('title', '')}\n{item.get('summary', '')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class LexiconBackend:
+    """Dictionary-based scorer that works on Chinese text without word segmentation."""
+
+    name = "lexicon"
+    # Bumped whenever scoring changes, so scores cached by an older version are recomputed
+    version = 3
+
+    def __init__(self, positive=None, negative=None, negators=None, intensifiers=None):
+        self.weights = {word: 1.0 for word in (positive or POSITIVE_WORDS)}
+        self.weights.update({word: -1.0 for word in (negative or NEGATIVE_WORDS)})
+        self.negators = {word.lower() for word in (negators or NEGATORS)}
+        self.intensifiers = {word.lower(): factor for word, factor in (intensifiers or INTENSIFIERS).items()}
+        # Longest terms first so "不及预期" wins over shorter overlapping terms
+        self.pattern = _term_pattern(self.weights)
+        # Compounds like 非常 are matched whole, so their 非 doesn't count as a negator
+        self.negator_pattern = _term_pattern(self.negators | set(NOT_NEGATING))
+        self.intensifier_pattern = _term_pattern(self.intensifiers)
+
+    def score(self, text: str) -> float:
+        text = BOILERPLATE.sub(" ", text)
+        total = 0.0
+        hits = 0
+        for match in self.pattern.finditer(text):
+            weight = self.weights.get(match.group(0)) or self.weights.get(match.group(0).lower(), 0.0)
+            window = text[max(0, match.start() - 6):match.start()]
+            if any(m.group(0).lower() in self.negators for m in self.negator_pattern.finditer(window)):
+                if weight < 0:
+                    # "无风险" or "未下跌" only rules the bad news out; it isn't good news
+                    continue
+                weight = -weight
+            for m in self.intensifier_pattern.finditer(window):
+                weight *= self.intensifiers[m.group(0).lower()]
+            total += weight
+            hits += 1
+        if not hits:
+            return 0.0
+        return max(-1.0, min(1.0, total / hits))
+
+
+class TextBlobBackend:
+    """Polarity from textblob, useful for the English sources."""
+
+    name = "textblob"
+
+    def __init__(self):
+        from textblob import TextBlob
+
+        self._blob = TextBlob
+
+    def score(self, text: str) -> float:
+        return float(self._blob(text).sentiment.polarity)
+
+
+_BACKENDS: Dict[str, Callable] = {
+    "lexicon": LexiconBackend,
+    "textblob": TextBlobBackend,
+}
+_instances: Dict[str, object] = {}
+
+
+def register_backend(name: str, factory: Callable):
+    """Register a scorer factory; the instance must expose name and score(text)."""
+    _BACKENDS[name] = factory
+    _instances.pop(name, None)
+
+
+def get_backend(name: str = "lexicon"):
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def _cache_tag(name: str) -> str:
+    """Backend name as stored with cached scores, with its scoring version if it has one."""
+    version = getattr(get_backend(name), "version", None)
+    return f"{name}@{version}" if version else name
+
+
+def default_backend_name(text: str) -> str:
+    """Lexicon for Chinese text, textblob for English when it is installed."""
+    if re.search(r"[一-鿿]", text):
+        return "lexicon"
+    try:
+        get_backend("textblob")
+        return "textblob"
+    except ImportError:
+        return "lexicon"
+
+
+class SentimentCache:
+    """SQLite store of scores keyed by content hash and backend."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, "sentiment.sqlite")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (hash TEXT, backend TEXT, score REAL, PRIMARY KEY (hash, backend))"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[tuple]) -> Dict[tuple, float]:
+        found = {}
+        with self._lock:
+            for digest, backend in keys:
+                row = self._conn.execute(
+                    "SELECT score FROM scores WHERE hash = ? AND backend = ?", (digest, backend)
+                ).fetchone()
+                if row is not None:
+                    found[(digest, backend)] = row[0]
+        return found
+
+    def put_many(self, scores: Dict[tuple, float]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (hash, backend, score) VALUES (?, ?, ?)",
+                [(digest, backend, score) for (digest, backend), score in scores.items()],
+            )
+            self._conn.commit()
+
+
+_cache = None
+
+
+def get_cache() -> SentimentCache:
+    global _cache
+    if _cache is None:
+        _cache = SentimentCache()
+    return _cache
+
+
+def score_articles(items: Iterable[Dict], backend: Optional[str] = None, cache: Optional[SentimentCache] = None) -> List[Dict]:
+    """Return copies of the news items with a "sentiment" score in [-1, 1]."""
+    items = [dict(item) for item in items]
+    if not items:
+        return items
+    cache = cache or get_cache()
+
+    keys = []
+    names = []
+    for item in items:
+        text = f"{item.get('title', '')} {item.get('summary', '')}"
+        names.append(backend or default_backend_name(text))
+        keys.append((content_hash(item), _cache_tag(names[-1])))
+
+    scores = cache.get_many(keys)
+    misses = {}
+    for item, key, name in zip(items, keys, names):
+        if key not in scores:
+            text = f"{item.get('title', '')} {item.get('summary', '')}"
+            misses[key] = round(get_backend(name).score(text), 3)
+    if misses:
+        cache.put_many(misses)
+        scores.update(misses)
+
+    for item, key in zip(items, keys):
+        item["sentiment"] = scores[key]
+    return items
+
+
+def aggregate(scored_items: List[Dict], threshold: float = 0.1) -> Dict:
+    """Compact per-ticker summary the agents can read instead of the article bodies."""
+    values = [item["sentiment"] for item in scored_items if "sentiment" in item]
+    if not values:
+        return {"count": 0, "mean": 0.0, "label": "neutral", "positive": 0, "negative": 0, "neutral": 0}
+
+    mean = sum(values) / len(values)
+    ranked = sorted(scored_items, key=lambda item: item["sentiment"])
+    return {
+        "count": len(values),
+        "mean": round(mean, 3),
+        "label": "positive" if mean > threshold else "negative" if mean < -threshold else "neutral",
+        "positive": sum(1 for value in values if value > threshold),
+        "negative": sum(1 for value in values if value < -threshold),
+        "neutral": sum(1 for value in values if -threshold <= value <= threshold),
+        "most_positive": ranked[-1]["title"] if ranked[-1]["sentiment"] > threshold else None,
+        "most_negative": ranked[0]["title"] if ranked[0]["sentiment"] < -threshold else None,
+    }
+
+
+def summarize_by_ticker(news_by_ticker: Dict[str, List[Dict]], backend: Optional[str] = None) -> Dict[str, Dict]:
+    """Score several tickers' news in one batch and aggregate per ticker."""
+    tickers = []
+    flat = []
+    for ticker, items in news_by_ticker.items():
+        tickers.extend([ticker] * len(items))
+        flat.extend(items)
+
+    grouped = {ticker: [] for ticker in news_by_ticker}
+    for ticker, item in zip(tickers, score_articles(flat, backend=backend)):
+        grouped[ticker].append(item)
+    return {ticker: aggregate(items) for ticker, items in grouped.items()}
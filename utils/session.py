@@ -0,0 +1,198 @@
+"""
+Multi-Turn Session Mode
+
+Opt-in conversation state for the command-line agents. Instead of resetting
+agent.messages after every query, a session keeps the last few turns
+verbatim and compacts older ones to their question and final answer. Tool
+results are memoized per session by (tool, arguments), so a follow-up such
+as "and what about its PE?" reuses data already fetched in earlier turns.
+Live tools are never memoized and tools over slowly moving data only for a
+few minutes (TOOL_TTL), so "现在价格呢?" gets a current price.
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from strands import tool as make_tool
+
+# Seconds a tool's result may be reused; unlisted tools are reused for the whole session
+TOOL_TTL = {
+    # Live quotes and what is computed from them are fetched again on every call
+    "get_realtime_quote": 0,
+    "get_technical_indicators": 0,
+    "get_portfolio_risk": 0,
+    "get_real_stock_data": 0,
+    # Bars, news and analyses quoting them move during the session, but slowly
+    "get_stock_prices": 300,
+    "get_stock_news": 300,
+    "analyze_company_with_collaborative_swarm": 300,
+    "analyze_company_with_parallel_analysts": 300,
+}
+
+
+class ToolMemo:
+    """Per-session tool results keyed by tool name and arguments."""
+
+    def __init__(self, max_entries: int = 128, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = TOOL_TTL if ttls is None else ttls
+        # key -> (result, stored at)
+        self.results: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, args: tuple, kwargs: Dict) -> str:
+        return json.dumps([name, args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+
+    def call(self, name: str, func, args: tuple, kwargs: Dict):
+        key = self.key(name, args, kwargs)
+        ttl = self.ttls.get(name)
+        with self._lock:
+            entry = self.results.get(key)
+            if entry is not None and (ttl is None or time.time() - entry[1] < ttl):
+                self.hits += 1
+                self.results.move_to_end(key)
+                return entry[0]
+        result = func(*args, **kwargs)
+        # Errors are not memoized so a follow-up can retry them
+        if not (isinstance(result, dict) and result.get("status") == "error"):
+            with self._lock:
+                self.misses += 1
+                self.results[key] = (result, time.time())
+                self.results.move_to_end(key)
+                while len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+        return result
+
+
+def is_turn_start(message: Dict) -> bool:
+    """A user message carrying text (not tool results) begins a new turn."""
+    return message["role"] == "user" and any("text" in block for block in message["content"])
+
+
+def final_text(messages: List[Dict]) -> str:
+    for message in reversed(messages):
+        if message["role"] == "assistant":
+            texts = [block["text"] for block in message["content"] if "text" in block]
+            if texts:
+                return "\n".join(texts)
+    return ""
+
+
+class ChatSession:
+    """Bounded, summarized conversation history plus tool memoization."""
+
+    def __init__(self, keep_turns: int = 2, max_turns: int = 8, summary_chars: int = 600, preamble: int = 2):
+        # preamble is the create_initial_messages() greeting, which is never compacted
+        self.preamble = preamble
+        self.keep_turns = keep_turns
+        self.max_turns = max_turns
+        self.summary_chars = summary_chars
+        self.memo = ToolMemo()
+        self._checkpoint = None
+
+    def wrap_tools(self, tools: List) -> List:
+        """Memoizing copies of @tool functions; live tools and other tools are passed through."""
+        wrapped = []
+        for tool in tools:
+            func = getattr(tool, "_tool_func", None)
+            if func is None or self.memo.ttls.get(tool.tool_name) == 0:
+                wrapped.append(tool)
+                continue
+            wrapped.append(make_tool(self._memoized(tool.tool_name, func)))
+        return wrapped
+
+    def _memoized(self, name: str, func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Positional and keyword calls with the same values share an entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return self.memo.call(name, func, (), dict(bound.arguments))
+
+        return wrapper
+
+    def begin(self, agent):
+        """Remember the history so a failed query can be rolled back."""
+        self._checkpoint = list(agent.messages)
+
+    def rollback(self, agent):
+        if self._checkpoint is not None:
+            agent.messages = self._checkpoint
+
+    def compact(self, agent):
+        """Keep the newest turns verbatim and shrink older ones to question and answer."""
+        preamble, messages = agent.messages[:self.preamble], agent.messages[self.preamble:]
+        starts = [i for i, message in enumerate(messages) if is_turn_start(message)]
+        turns = [messages[start:end] for start, end in zip(starts, starts[1:] + [len(messages)])]
+
+        compacted = []
+        for turn in turns[:-self.keep_turns] if len(turns) > self.keep_turns else []:
+            question = "\n".join(block["text"] for block in turn[0]["content"] if "text" in block)
+            answer = final_text(turn[1:])
+            if not answer:
+                continue
+            if len(answer) > self.summary_chars:
+                answer = answer[:self.summary_chars] + "..."
+            compacted.append([
+                {"role": "user", "content": [{"text": question}]},
+                {"role": "assistant", "content": [{"text": answer}]},
+            ])
+
+        # Oldest summaries fall off once the history is at its bound
+        budget = max(0, self.max_turns - self.keep_turns)
+        compacted = compacted[-budget:] if budget else []
+        recent = turns[-self.keep_turns:] if len(turns) > self.keep_turns else turns
+
+        agent.messages = list(preamble) + [m for turn in compacted for m in turn] + [m for turn in recent for m in turn]
+        self._checkpoint = None
+
+    def stats(self) -> Dict:
+        return {"memo_hits": self.memo.hits, "memo_misses": self.memo.misses, "memo_entries": len(self.memo.results)}
+
+
+def add_session_argument(parser):
+    """The --session flag shared by the command-line agents."""
+    parser.add_argument(
+        "--session", action="store_true", help="keep conversation history and reuse tool results across queries"
+    )
+
+
+def session_from_args(args) -> Optional[ChatSession]:
+    return ChatSession() if args.session else None
+
+
+@contextlib.contextmanager
+def session_turn(agent, session: Optional[ChatSession], initial_messages: Callable[[], List[Dict]], user_message: Dict):
+    """One CLI query's history handling.
+
+    Without a session the message is appended and the history reset to
+    initial_messages() afterwards. With one, the history is rolled back if
+    the query raises and compacted afterwards; the exception propagates.
+    """
+    if session is None:
+        agent.messages.append(user_message)
+    else:
+        session.begin(agent)
+    try:
+        yield
+    except Exception:
+        if session is not None:
+            session.rollback(agent)
+        raise
+    finally:
+        if session is None:
+            # Reset conversation after each query
+            agent.messages = initial_messages()
+        else:
+            session.compact(agent)
@@ -0,0 +1,133 @@
+"""
+Shared Memory-Mapped Cache
+
+Cross-process cache for market data that several agent workers on a host
+read: each entry is a NumPy record array in a file that readers map
+read-only, so every worker shares the same page-cache pages instead of
+holding its own copy. One process fills a missing or stale entry under a
+host-wide lock while the others wait and then map the result, so the host
+makes one provider fetch per key. Writes replace the file atomically;
+readers holding the old mapping keep a consistent snapshot.
+"""
+
+import json
+import os
+import struct
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import deadline, metrics
+from .cache import CACHE_DIR, atomic_write_bytes, fill_lock, key_filename
+
+MAGIC = b"CNSHM001"
+# Record data starts on a 64-byte boundary so field views stay aligned
+ALIGNMENT = 64
+
+# What a fill function returns: (records, meta), or (records, meta, fetched_at)
+# when the data is older than the fill, e.g. a stale copy served past a deadline
+Table = Tuple
+
+
+def frame_to_records(frame: pd.DataFrame) -> np.ndarray:
+    """DataFrame as a record array; text columns become fixed-width unicode fields."""
+    fields, columns = [], []
+    for name in frame.columns:
+        values = frame[name]
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            array = values.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            array = values.to_numpy(dtype="datetime64[ns]")
+        else:
+            array = values.fillna("").astype(str).to_numpy(dtype=str)
+        fields.append((str(name), array.dtype))
+        columns.append(array)
+    records = np.empty(len(frame), dtype=fields)
+    for (name, _), array in zip(fields, columns):
+        records[name] = array
+    return records
+
+
+def records_to_frame(records: np.ndarray) -> pd.DataFrame:
+    """DataFrame copy of a record array (the columns are copied out of the mapping)."""
+    return pd.DataFrame({name: records[name] for name in records.dtype.names})
+
+
+class SharedCache:
+    """Namespace of memory-mapped record arrays, each stored with its metadata and fetch time."""
+
+    def __init__(self, namespace: str, root: Optional[str] = None):
+        self.namespace = namespace
+        self.directory = os.path.join(root or CACHE_DIR, "shared", namespace)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key_filename(key)}.rec")
+
+    def put(self, key: str, records: np.ndarray, meta: Optional[Dict] = None, fetched_at: Optional[float] = None):
+        header = json.dumps({
+            "descr": np.lib.format.dtype_to_descr(records.dtype),
+            "shape": list(records.shape),
+            "meta": meta or {},
+            "fetched_at": fetched_at or time.time(),
+        }, ensure_ascii=False).encode("utf-8")
+        offset = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+        prefix = MAGIC + struct.pack("<Q", offset) + header
+        payload = prefix + b" " * (offset - len(prefix)) + np.ascontiguousarray(records).tobytes()
+        atomic_write_bytes(self._path(key), payload)
+        metrics.incr(f"shared_cache.{self.namespace}.writes")
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, Dict, float]]:
+        """(read-only mapped records, meta, fetched_at), or None when the key was never stored."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                (offset,) = struct.unpack("<Q", f.read(8))
+                header = json.loads(f.read(offset - len(MAGIC) - 8).rstrip(b" ").decode("utf-8"))
+        except (OSError, ValueError, struct.error):
+            return None
+        dtype = np.lib.format.descr_to_dtype(header["descr"])
+        shape = tuple(header["shape"])
+        if not shape[0]:
+            # mmap cannot map zero bytes
+            records = np.empty(shape, dtype=dtype)
+        else:
+            records = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        return records, header["meta"], header["fetched_at"]
+
+    def cached(
+        self,
+        key: str,
+        fill: Callable[[], Table],
+        max_age: Optional[float] = None,
+        refresh: bool = False,
+        is_fresh: Optional[Callable[[float], bool]] = None,
+    ) -> Tuple[np.ndarray, Dict, float]:
+        """The mapped entry while it is fresh; otherwise one process runs fill() and the rest map its result."""
+
+        def fresh(fetched_at: float) -> bool:
+            return is_fresh(fetched_at) if is_fresh else time.time() - fetched_at < max_age
+
+        entry = self.get(key)
+        if entry is not None and not refresh and fresh(entry[2]):
+            metrics.incr(f"shared_cache.{self.namespace}.hits")
+            return entry
+        try:
+            with fill_lock(self._path(key)):
+                latest = self.get(key)
+                if latest is not None and (entry is None or latest[2] != entry[2]) and (refresh or fresh(latest[2])):
+                    metrics.incr(f"shared_cache.{self.namespace}.waited")
+                    return latest
+                metrics.incr(f"shared_cache.{self.namespace}.fills")
+                started = time.time()
+                table = deadline.call(fill, f"filling {self.namespace}/{key}")
+                self.put(key, table[0], table[1], fetched_at=table[2] if len(table) > 2 else started)
+        except deadline.DeadlineExceeded:
+            if entry is None:
+                raise
+            print(f"Deadline reached, using stale {self.namespace}/{key}")
+            return entry
+        return self.get(key)
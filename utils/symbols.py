@@ -0,0 +1,161 @@
+"""
+Symbol Routing
+
+Classifies whatever the user or the model typed as a ticker (600519,
+SH600519, 600519.SS, 830799, 0700.HK, AAPL, BRK.B, ^GSPC, 沪深300 ...) by
+exchange and asset type, so each tool can call the provider that actually
+serves that listing instead of finding out from a failed request.
+"""
+
+import re
+from dataclasses import dataclass
+
+# Exchange -> market and the provider our tools use for it
+EXCHANGES = {
+    "SH": ("cn", "akshare"),
+    "SZ": ("cn", "akshare"),
+    "BJ": ("cn", "akshare"),
+    "HK": ("hk", "yfinance"),
+    "US": ("us", "yfinance"),
+}
+
+# Leading digits of unprefixed 6-digit codes, longest prefix wins
+CN_PREFIXES = {
+    "600": ("SH", "stock"), "601": ("SH", "stock"), "603": ("SH", "stock"), "605": ("SH", "stock"),
+    "688": ("SH", "stock"), "689": ("SH", "stock"), "900": ("SH", "stock"),
+    "51": ("SH", "etf"), "52": ("SH", "etf"), "56": ("SH", "etf"), "58": ("SH", "etf"),
+    "000": ("SZ", "stock"), "001": ("SZ", "stock"), "002": ("SZ", "stock"), "003": ("SZ", "stock"),
+    "200": ("SZ", "stock"), "300": ("SZ", "stock"), "301": ("SZ", "stock"),
+    "159": ("SZ", "etf"), "399": ("SZ", "index"),
+    "920": ("BJ", "stock"), "4": ("BJ", "stock"), "8": ("BJ", "stock"),
+}
+
+# Index names people type instead of codes
+INDEX_ALIASES = {
+    "上证指数": ("SH", "000001"), "上证综指": ("SH", "000001"), "上证50": ("SH", "000016"),
+    "沪深300": ("SH", "000300"), "中证500": ("SH", "000905"), "中证1000": ("SH", "000852"),
+    "科创50": ("SH", "000688"), "深证成指": ("SZ", "399001"), "创业板指": ("SZ", "399006"),
+    "恒生指数": ("HK", "^HSI"), "HSI": ("HK", "^HSI"), "HSCEI": ("HK", "^HSCE"),
+    "SPX": ("US", "^GSPC"), "S&P500": ("US", "^GSPC"), "DJI": ("US", "^DJI"),
+    "DJIA": ("US", "^DJI"), "NDX": ("US", "^NDX"), "NASDAQ": ("US", "^IXIC"), "VIX": ("US", "^VIX"),
+}
+
+# US ETFs can't be told from stocks by the symbol alone; the common ones are listed
+US_ETFS = {
+    "SPY", "VOO", "IVV", "VTI", "QQQ", "DIA", "IWM", "EFA", "EEM", "VEA", "VWO", "AGG", "BND",
+    "TLT", "IEF", "SHY", "LQD", "HYG", "GLD", "SLV", "USO", "XLK", "XLF", "XLE", "XLV", "XLI",
+    "XLY", "XLP", "XLU", "XLB", "XLRE", "XLC", "SMH", "SOXX", "ARKK", "KWEB", "FXI", "MCHI", "ASHR",
+}
+
+CN_PATTERN = re.compile(r"^(?:(SH|SZ|BJ)\.?)?(\d{6})(?:\.(SH|SS|SZ|BJ))?$")
+HK_PATTERN = re.compile(r"^(?:HK\.?)?(\d{1,5})(?:\.HK)?$")
+US_PATTERN = re.compile(r"^\^?[A-Z]{1,5}(?:[.\-/][A-Z]{1,2})?$")
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A ticker resolved to its exchange, asset type and provider spellings."""
+
+    code: str
+    exchange: str
+    asset: str = "stock"
+
+    @property
+    def market(self) -> str:
+        return EXCHANGES[self.exchange][0]
+
+    @property
+    def provider(self) -> str:
+        return EXCHANGES[self.exchange][1]
+
+    @property
+    def prefixed(self) -> str:
+        """SH600519 style, as Xueqiu and format_stock_code use."""
+        return self.exchange + self.code if self.market == "cn" else self.code
+
+    @property
+    def sina(self) -> str:
+        """sh600519 style, as the Sina endpoints use."""
+        return self.prefixed.lower()
+
+    @property
+    def yahoo(self) -> str:
+        """Yahoo Finance symbol, e.g. 600519.SS, 0700.HK or BRK-B."""
+        if self.market == "cn":
+            return f"{self.code}.{'SS' if self.exchange == 'SH' else self.exchange}"
+        if self.market == "hk" and not self.code.startswith("^"):
+            return f"{int(self.code):04d}.HK"
+        return self.code
+
+
+def _cn_symbol(exchange: str, code: str) -> Symbol:
+    if exchange is None:
+        for length in (3, 2, 1):
+            if code[:length] in CN_PREFIXES:
+                exchange, asset = CN_PREFIXES[code[:length]]
+                return Symbol(code, exchange, asset)
+        raise ValueError(f"Unrecognized A-share code {code}")
+
+    # An explicit prefix decides the exchange; SH 000xxx is an index, not 平安银行
+    guess = next((CN_PREFIXES[code[:n]] for n in (3, 2, 1) if code[:n] in CN_PREFIXES), (exchange, "stock"))
+    if exchange == "SH" and code.startswith("000"):
+        return Symbol(code, "SH", "index")
+    return Symbol(code, exchange, guess[1] if guess[0] == exchange else "stock")
+
+
+def _hk_asset(code: str) -> str:
+    number = int(code)
+    return "etf" if 2800 <= number <= 2849 or 3000 <= number <= 3199 else "stock"
+
+
+def classify(text: str) -> Symbol:
+    """Resolve a ticker as typed to a Symbol; raises ValueError when it can't be placed."""
+    raw = text.strip()
+    if raw in INDEX_ALIASES or raw.upper() in INDEX_ALIASES:
+        exchange, code = INDEX_ALIASES.get(raw) or INDEX_ALIASES[raw.upper()]
+        return Symbol(code, exchange, "index")
+
+    upper = raw.upper().replace(" ", "")
+    match = CN_PATTERN.match(upper)
+    if match:
+        prefix, code, suffix = match.groups()
+        suffix = "SH" if suffix == "SS" else suffix
+        if prefix and suffix and prefix != suffix:
+            raise ValueError(f"Conflicting exchange in {text}")
+        return _cn_symbol(prefix or suffix, code)
+
+    match = HK_PATTERN.match(upper)
+    if match and (upper.startswith("HK") or upper.endswith(".HK") or len(match.group(1)) in (4, 5)):
+        code = match.group(1).zfill(5)
+        return Symbol(code, "HK", _hk_asset(code))
+
+    if US_PATTERN.match(upper):
+        if upper.startswith("^"):
+            return Symbol(upper, "US", "index")
+        code = re.sub(r"[./]", "-", upper)
+        return Symbol(code, "US", "etf" if code in US_ETFS else "stock")
+
+    raise ValueError(f"Unrecognized ticker {text}")
+
+
+def yahoo_symbol(text: str) -> str:
+    """Yahoo Finance spelling of any ticker, or the input unchanged when it can't be placed."""
+    try:
+        return classify(text).yahoo
+    except ValueError:
+        return text.strip()
+
+
+def wrong_market(text: str, market: str):
+    """Error dict for a tool that only serves one market, or None when the ticker belongs there."""
+    try:
+        symbol = classify(text)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    if symbol.market == market:
+        return None
+    hint = "the A-share (cn_*) tools" if symbol.market == "cn" else "the US/HK (Yahoo Finance) tools"
+    return {
+        "status": "error",
+        "message": f"{text} is a {symbol.exchange} {symbol.asset}, which this tool does not cover; use {hint}",
+    }
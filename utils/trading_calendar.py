@@ -0,0 +1,180 @@
+"""
+A-Share Trading Calendar
+
+SSE and SZSE share trading days and session times. Trading days come from
+Sina's exchange calendar (holidays included) and are stored locally, so
+checking whether cached market data is still fresh never needs the network.
+"""
+
+import datetime as dt
+import json
+import os
+from typing import List, Optional
+
+from zoneinfo import ZoneInfo
+
+from .cache import CACHE_DIR, atomic_write_bytes
+
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+
+# Opening call auction through the morning session, then the afternoon session
+# (the SZSE closing call auction ends at 15:00 as well)
+SESSIONS = [
+    (dt.time(9, 15), dt.time(11, 30)),
+    (dt.time(13, 0), dt.time(15, 0)),
+]
+
+CALENDAR_PATH = os.path.join(CACHE_DIR, "calendar", "trade_dates.json")
+
+
+class TradingCalendar:
+    """Trading days and sessions for the Shanghai and Shenzhen exchanges."""
+
+    def __init__(self, path: str = CALENDAR_PATH):
+        self.path = path
+        self._dates = None
+        self._last_date = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        state = None
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+
+        today = dt.datetime.now(MARKET_TZ).strftime("%Y%m%d")
+        stale = state is None or (state["dates"][-1] < today and state["checked"] < today)
+        if stale:
+            state = self._refresh(state, today)
+
+        if state is None:
+            # No stored calendar and no network: fall back to weekdays only
+            self._dates = None
+        else:
+            self._dates = set(state["dates"])
+            self._last_date = state["dates"][-1]
+
+    def _refresh(self, state: Optional[dict], today: str) -> Optional[dict]:
+        try:
+            import akshare as ak
+
+            from .ratelimit import get_limiter
+
+            with get_limiter("sina"):
+                frame = ak.tool_trade_date_hist_sina()
+            dates = sorted(str(d).replace("-", "")[:8] for d in frame["trade_date"])
+            state = {"dates": dates, "checked": today}
+        except Exception as e:
+            print(f"Error refreshing trading calendar: {str(e)}")
+            if state is None:
+                return None
+            state["checked"] = today
+
+        atomic_write_bytes(self.path, json.dumps(state).encode("utf-8"))
+        return state
+
+    def is_trading_day(self, day: dt.date) -> bool:
+        if not self._loaded:
+            self._load()
+        key = day.strftime("%Y%m%d")
+        if self._dates is None or key > self._last_date:
+            return day.weekday() < 5
+        return key in self._dates
+
+    def previous_trading_day(self, day: dt.date) -> dt.date:
+        """Latest trading day strictly before the given day."""
+        day -= dt.timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= dt.timedelta(days=1)
+        return day
+
+    def last_trading_day(self, now: Optional[dt.datetime] = None) -> dt.date:
+        """Latest trading day whose close has already happened."""
+        now = now or dt.datetime.now(MARKET_TZ)
+        if self.is_trading_day(now.date()) and now.time() >= SESSIONS[-1][1]:
+            return now.date()
+        return self.previous_trading_day(now.date())
+
+    def is_open(self, now: Optional[dt.datetime] = None) -> bool:
+        now = now or dt.datetime.now(MARKET_TZ)
+        if not self.is_trading_day(now.date()):
+            return False
+        return any(start <= now.time() < end for start, end in SESSIONS)
+
+    def sessions(self, day: dt.date) -> List[tuple]:
+        if not self.is_trading_day(day):
+            return []
+        return [
+            (dt.datetime.combine(day, start, MARKET_TZ), dt.datetime.combine(day, end, MARKET_TZ))
+            for start, end in SESSIONS
+        ]
+
+    def last_change(self, now: Optional[dt.datetime] = None, settle: float = 0.0) -> dt.datetime:
+        """Latest moment up to now at which market data could have changed.
+
+        settle extends each session by that many seconds to cover providers
+        that publish the final numbers a little after the close.
+        """
+        now = now or dt.datetime.now(MARKET_TZ)
+        day = now.date()
+        for _ in range(30):
+            for start, end in reversed(self.sessions(day)):
+                end += dt.timedelta(seconds=settle)
+                if start <= now <= end:
+                    return now
+                if end <= now:
+                    return end
+            day -= dt.timedelta(days=1)
+        return now
+
+    def last_daily(self, at: dt.time, now: Optional[dt.datetime] = None) -> dt.datetime:
+        """Latest trading day's `at` time that is not after now."""
+        now = now or dt.datetime.now(MARKET_TZ)
+        day = now.date()
+        for _ in range(30):
+            if self.is_trading_day(day):
+                moment = dt.datetime.combine(day, at, MARKET_TZ)
+                if moment <= now:
+                    return moment
+            day -= dt.timedelta(days=1)
+        return now
+
+    def is_fresh(self, fetched_at: float, now: Optional[dt.datetime] = None, settle: float = 0.0, intraday_ttl: float = 0.0) -> bool:
+        """True when the market has been closed since fetched_at (epoch seconds).
+
+        While a session is running, data younger than intraday_ttl seconds is
+        also considered fresh.
+        """
+        now = now or dt.datetime.now(MARKET_TZ)
+        if fetched_at >= self.last_change(now, settle).timestamp():
+            return True
+        return now.timestamp() - fetched_at < intraday_ttl
+
+
+_calendar = None
+
+
+def get_calendar() -> TradingCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar()
+    return _calendar
+
+
+def freshness(settle: float = 0.0, intraday_ttl: float = 0.0):
+    """Freshness check for DiskCache.cached driven by the trading calendar."""
+
+    def check(fetched_at: float) -> bool:
+        return get_calendar().is_fresh(fetched_at, settle=settle, intraday_ttl=intraday_ttl)
+
+    return check
+
+
+def daily_freshness(at: dt.time):
+    """Freshness check for data that changes once per trading day, at the given time."""
+
+    def check(fetched_at: float) -> bool:
+        return fetched_at >= get_calendar().last_daily(at).timestamp()
+
+    return check
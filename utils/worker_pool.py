@@ -0,0 +1,221 @@
+"""
+Agent Worker Pool
+
+Supervisor for N worker processes that each run a request handler, so the
+CPU-bound parts of the agents (pandas, HTML parsing, serializing large
+tool results) use more than one core. Requests carrying an affinity key
+(normally the ticker) always go to the same worker, keeping that worker's
+in-memory caches hot; requests without one go to the least loaded worker.
+A worker that dies is restarted, the request it was running fails with
+WorkerCrashed and the rest of its queue is handed to the replacement.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from . import metrics, ratelimit
+
+
+# Longest wait before restarting a worker that keeps crashing, in seconds
+MAX_BACKOFF = 30.0
+
+
+class WorkerCrashed(Exception):
+    """The worker process running a request exited before finishing it."""
+
+
+def affinity_slot(key: str, workers: int) -> int:
+    """Stable worker index for a key (the built-in hash is salted per process)."""
+    return zlib.crc32(key.upper().encode("utf-8")) % workers
+
+
+def _worker_main(index: int, workers: int, handler: Callable[[Any], Any], requests, results, running):
+    ratelimit.set_share(1.0 / workers)
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, payload = item
+        # Shared memory rather than a queue message, which could still be unsent if the process dies
+        running.value = request_id
+        try:
+            outcome = ("done", index, request_id, handler(payload))
+        except Exception as e:
+            outcome = ("failed", index, request_id, f"{type(e).__name__}: {str(e)}")
+        finally:
+            # Per-process latency and cache metrics, as the single-process agents write them
+            metrics.write()
+        running.value = -1
+        results.put(outcome)
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.requests = None
+        # request_id -> payload for every queued or running request, in submission order
+        self.pending: Dict[int, Any] = {}
+        # Id of the request the process is running, -1 when idle
+        self.running = None
+        self.completed = 0
+        self.restarts = 0
+        # Crashes since the last completed request, for restart backoff
+        self.crashes = 0
+        self.restart_at = 0.0
+
+
+class WorkerPool:
+    """Process pool with per-worker queues, affinity routing and crash restarts.
+
+    handler must be picklable (a module-level function); it runs in the
+    worker process and its return value must be picklable too.
+    """
+
+    def __init__(self, handler: Callable[[Any], Any], workers: int = 0, poll: float = 0.5):
+        self.handler = handler
+        self.workers = [_Worker(i) for i in range(workers or os.cpu_count() or 1)]
+        self.poll = poll
+        # Spawned rather than forked: the agents start threads that a fork would copy mid-flight
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._futures: Dict[int, Future] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        for worker in self.workers:
+            self._start(worker)
+        self._collector = threading.Thread(target=self._collect, name="worker-pool-collector", daemon=True)
+        self._collector.start()
+        metrics.gauge("worker_pool", self.stats)
+
+    def _start(self, worker: _Worker):
+        worker.requests = self._context.Queue()
+        worker.running = self._context.Value("q", -1, lock=False)
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.index, len(self.workers), self.handler, worker.requests, self._results, worker.running),
+            name=f"agent-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        for request_id, payload in worker.pending.items():
+            worker.requests.put((request_id, payload))
+
+    def submit(self, payload: Any, key: Optional[str] = None) -> Future:
+        """Queue a request; with a key it always lands on the same worker."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Worker pool is shut down")
+            request_id, self._next_id = self._next_id, self._next_id + 1
+            if key:
+                worker = self.workers[affinity_slot(key, len(self.workers))]
+            else:
+                worker = min(self.workers, key=lambda w: len(w.pending))
+            self._futures[request_id] = future
+            worker.pending[request_id] = payload
+            worker.requests.put((request_id, payload))
+        metrics.incr("worker_pool.submitted")
+        return future
+
+    def _collect(self):
+        checked_at = time.monotonic()
+        while True:
+            try:
+                kind, index, request_id, value = self._results.get(timeout=self.poll)
+            except queue.Empty:
+                if self._closed and not any(w.pending for w in self.workers):
+                    return
+            except (EOFError, OSError):
+                return
+            else:
+                self._settle(kind, self.workers[index], request_id, value)
+            # Every poll interval even while results keep arriving, or a dead worker
+            # goes unnoticed as long as the others are busy
+            if time.monotonic() - checked_at >= self.poll:
+                checked_at = time.monotonic()
+                self._check_workers()
+
+    def _settle(self, kind: str, worker: _Worker, request_id: int, value: Any):
+        with self._lock:
+            worker.pending.pop(request_id, None)
+            worker.completed += 1
+            worker.crashes = 0
+            future = self._futures.pop(request_id, None)
+        metrics.incr(f"worker_pool.{kind}")
+        if future is None:
+            return
+        if kind == "done":
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process.is_alive() or self._closed:
+                continue
+            with self._lock:
+                future = None
+                if worker.restart_at == 0.0:
+                    crashed = worker.running.value
+                    future = self._futures.pop(crashed, None)
+                    worker.pending.pop(crashed, None)
+                    worker.crashes += 1
+                    # Back off when the worker keeps dying, e.g. on startup
+                    worker.restart_at = now + min(MAX_BACKOFF, 0.5 * (2 ** (worker.crashes - 1)) - 0.5)
+                    print(f"Worker {worker.index} exited with code {worker.process.exitcode}, restarting")
+                if now >= worker.restart_at:
+                    worker.restart_at = 0.0
+                    worker.restarts += 1
+                    # The replacement gets a fresh queue; a dead reader can leave the old one locked
+                    self._start(worker)
+                    metrics.incr("worker_pool.restarts")
+            if future is not None:
+                # Not retried: a request that kills its worker would likely kill the next one too
+                future.set_exception(WorkerCrashed(f"Worker {worker.index} exited while running the request"))
+
+    def depths(self) -> List[int]:
+        """Queued plus running requests per worker."""
+        with self._lock:
+            return [len(w.pending) for w in self.workers]
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "worker": w.index,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "queue_depth": len(w.pending),
+                    "completed": w.completed,
+                    "restarts": w.restarts,
+                }
+                for w in self.workers
+            ]
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Stop accepting requests; workers exit once their queues are drained."""
+        with self._lock:
+            self._closed = True
+            for worker in self.workers:
+                worker.requests.put(None)
+        if not wait:
+            return
+        stop_at = None if timeout is None else time.monotonic() + timeout
+        for worker in self.workers:
+            worker.process.join(None if stop_at is None else max(0.0, stop_at - time.monotonic()))
+        self._collector.join(self.poll * 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()